@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+# Persistent connections are per thread, and ASGI runs sync code in throwaway threads
+os.environ['POSTGRES_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
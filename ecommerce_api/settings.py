@@ -43,19 +43,25 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',  # Add this line
     'rest_framework_simplejwt',  # Make sure this is here
     'products',
 ]
 
+# The session, CSRF, auth and messages layers are skipped for requests under
+# API_PATH_PREFIX, which authenticate with JWTs; see products.middleware
+API_PATH_PREFIX = '/api/'
+
 MIDDLEWARE = [
+    'products.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'products.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'products.middleware.CsrfViewMiddleware',
+    'products.middleware.AuthenticationMiddleware',
+    'products.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -94,8 +100,103 @@ DATABASES = {
         'OPTIONS': {
             'connect_timeout': 5,
         },
+        # Seconds connections stay open across requests, checked before reuse;
+        # 0 reconnects per request. Only safe under WSGI, where gunicorn.conf.py
+        # raises the default; each ASGI request thread would leak a connection.
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': bool(int(os.getenv('POSTGRES_CONN_HEALTH_CHECKS', 1))),
+    }
+}
+
+# Read replicas as space-separated "host[:port][/name]" entries, e.g.
+# "replica1 replica2:5433"; credentials are shared with the primary.
+# Product reads are routed to them by products.routers.PrimaryReplicaRouter.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(os.getenv('POSTGRES_REPLICAS', '').split(), start=1):
+    address, _, name = replica.partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['products.routers.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write, which should
+# cover the replication lag
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The local-memory default is per process; point CACHE_BACKEND at a shared
+# cache (e.g. Redis or Memcached) when running several workers, gunicorn.conf.py
+# starts only one otherwise.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'ecommerce-api'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
     }
 }
+# Redis and Memcached evict on their own and hand OPTIONS to their client library
+if not CACHES['default']['BACKEND'].endswith(('RedisCache', 'MemcacheCache')):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000))}
+
+# Cache alias and lifetime (seconds) of cached product list/retrieve responses
+PRODUCT_CACHE_ALIAS = os.getenv('PRODUCT_CACHE_ALIAS', 'default')
+PRODUCT_CACHE_TIMEOUT = int(os.getenv('PRODUCT_CACHE_TIMEOUT', 300))
+
+
+# Serve product lists from values_list() rows instead of model instances
+PRODUCT_LIST_FAST_PATH = bool(int(os.getenv('PRODUCT_LIST_FAST_PATH', 1)))
+
+# Longest ?wait= (seconds) of GET /api/products/changes/ and how often a
+# waiting request looks for new entries
+CHANGE_FEED_MAX_WAIT = float(os.getenv('CHANGE_FEED_MAX_WAIT', 25))
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv('CHANGE_FEED_POLL_INTERVAL', 0.5))
+# Seconds change feed entries are kept before compact_product_changes
+# drops those a later entry of the same product supersedes
+CHANGE_FEED_RETENTION = int(os.getenv('CHANGE_FEED_RETENTION', 7 * 24 * 60 * 60))
+
+# Users served by CachedJWTAuthentication without a query, per process
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))
+
+# Largest number of orders accepted by POST /api/orders/batch/
+ORDER_BATCH_MAX_SIZE = int(os.getenv('ORDER_BATCH_MAX_SIZE', 500))
+
+# "sync" places orders in the request; "async" queues them for the
+# run_order_workers command and answers 202 with a status URL
+ORDER_INTAKE = os.getenv('ORDER_INTAKE', 'sync')
+# Seconds processed intake jobs stay available at their status URL
+ORDER_INTAKE_RETENTION = int(os.getenv('ORDER_INTAKE_RETENTION', 24 * 60 * 60))
+# Failed attempts before a worker rejects an intake job it cannot place
+ORDER_INTAKE_MAX_ATTEMPTS = int(os.getenv('ORDER_INTAKE_MAX_ATTEMPTS', 5))
+
+# Seconds an Idempotency-Key of POST /api/orders/ replays its response
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+# Request instrumentation: Server-Timing headers and the /metrics endpoint
+REQUEST_METRICS = bool(int(os.getenv('REQUEST_METRICS', 1)))
+# Bearer token /metrics requires; without one it is only served with DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Queries at least this slow (ms) are logged with their view; 0 turns it off
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+# Share of requests run under cProfile, and how slow (ms) a profiled request
+# must be for its profile to be written to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '/tmp/profiles')
+# Seconds a /readyz result is reused, so frequent probes don't each query the databases
+HEALTH_CHECK_CACHE_SECONDS = float(os.getenv('HEALTH_CHECK_CACHE_SECONDS', 2))
 
 
 # Password validation
@@ -148,13 +249,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'products.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'products.fastpath.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',  # Add this line
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
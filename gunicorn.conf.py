@@ -0,0 +1,104 @@
+"""
+Gunicorn settings for production, read from ``./gunicorn.conf.py`` by ``gunicorn``.
+
+Every setting can be overridden with a ``GUNICORN_*`` variable. The app is
+loaded once in the master and forked, then each worker warms itself up
+before it accepts connections (see ``products.warmup``). Startup time, the
+warm-up and every worker's first request are logged.
+"""
+import multiprocessing
+import os
+import time
+
+from dotenv import load_dotenv
+
+config_loaded = time.perf_counter()
+load_dotenv()
+
+# `ecommerce_api.asgi:application` serves the async views from an event loop per worker
+wsgi_app = os.getenv('GUNICORN_APP', 'ecommerce_api.wsgi:application')
+serves_asgi = 'asgi' in wsgi_app
+# Reusing connections across requests is only safe for WSGI workers, which
+# serve each request from one of their long-lived threads
+if serves_asgi:
+    os.environ['POSTGRES_CONN_MAX_AGE'] = '0'
+else:
+    os.environ.setdefault('POSTGRES_CONN_MAX_AGE', '60')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker' if serves_asgi else 'gthread'
+)
+# The usual two per core plus one, which keeps a core busy while another worker waits on I/O
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+# Imports Django and the URLconf once in the master and shares the pages between forks
+preload_app = bool(int(os.getenv('GUNICORN_PRELOAD', 1)))
+# Must outlast the change feed's long-poll (CHANGE_FEED_MAX_WAIT)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Recycles workers after this many requests, 0 to never restart them
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+warm_up_workers = bool(int(os.getenv('GUNICORN_WARMUP', 1)))
+
+# Cache backends whose entries each worker keeps to itself
+PROCESS_LOCAL_CACHES = {'LocMemCache', 'DummyCache'}
+
+
+def on_starting(server):
+    # User revocations and primary pins go through the product cache and must
+    # reach every worker, so a per-process cache gets a single worker
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    from django.conf import settings
+
+    backend = settings.CACHES[settings.PRODUCT_CACHE_ALIAS]['BACKEND']
+    if server.num_workers > 1 and backend.rsplit('.', 1)[-1] in PROCESS_LOCAL_CACHES:
+        server.log.warning(
+            '%s is not shared between workers, starting 1 worker instead of %d; set '
+            'CACHE_BACKEND to Redis or Memcached to run more', backend, server.num_workers,
+        )
+        server.num_workers = 1
+
+
+def when_ready(server):
+    server.log.info('Started in %.0f ms', (time.perf_counter() - config_loaded) * 1000)
+
+
+def post_worker_init(worker):
+    # Runs after the app is loaded, which without preload_app happens after the fork
+    worker.first_request = True
+    if not warm_up_workers:
+        return
+    from products.warmup import warm_up
+
+    started = time.perf_counter()
+    try:
+        # Sync workers serve requests from this thread and can reuse its connections
+        timings = warm_up(keep_connections=type(worker).__name__ == 'SyncWorker')
+    except Exception:
+        # A cold worker is better than none, e.g. while the database restarts
+        worker.log.exception('Worker %s warm-up failed', worker.pid)
+        return
+    worker.log.info(
+        'Worker %s warmed up in %.0f ms (%s)', worker.pid, (time.perf_counter() - started) * 1000,
+        ', '.join(f'{step} {ms:.0f} ms' for step, ms in timings.items()),
+    )
+
+
+def pre_request(worker, req):
+    req.started = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    # Not called by ASGI workers
+    if getattr(worker, 'first_request', False):
+        worker.first_request = False
+        worker.log.info(
+            'Worker %s first request %s %s took %.1f ms', worker.pid, req.method, req.path,
+            (time.perf_counter() - req.started) * 1000,
+        )
@@ -0,0 +1,118 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from .authentication import CachedJWTAuthentication
+from .fastpath import FastJSONRenderer, compile_serializer
+from .filters import list_orders, list_products
+from .inventory import with_available_stock
+from .models import Order, Product
+from .pagination import CustomPagination, KeysetPagination, OrderKeysetPagination
+from .serializers import OrderSerializer, ProductSerializer, order_prefetches
+
+authentication = CachedJWTAuthentication()
+renderer = FastJSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
+
+
+def async_api_view(view):
+    """
+    Run ``view`` as an authenticated, GET-only async JSON endpoint.
+
+    The view receives a DRF ``Request`` so query parameters, serializers and
+    paginators behave exactly as in the viewsets, and returns plain data.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        request = Request(request)
+        try:
+            credentials = await authentication.aauthenticate(request)
+            if credentials is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = credentials
+            return json_response(await view(request, *args, **kwargs))
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = json_response(detail, status=exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = authentication.authenticate_header(request)
+            return response
+    return wrapper
+
+
+def product_queryset(serializer):
+    queryset = Product.objects.defer('search_vector')
+    if 'stock' in serializer.fields:
+        queryset = with_available_stock(queryset)
+    return queryset
+
+
+@async_api_view
+async def product_list(request):
+    serializer = ProductSerializer(context={'request': request})
+    plan = compile_serializer(serializer)
+    paginator = KeysetPagination() if KeysetPagination.is_requested(request) else CustomPagination()
+    extra = [
+        field for field in getattr(paginator, 'get_cursor_fields', lambda r: [])(request)
+        if field not in plan.sources
+    ]
+    # Filters such as in_stock and q run queries of their own while building the queryset
+    queryset = await sync_to_async(list_products)(product_queryset(serializer), request.query_params)
+    rows = await paginator.apaginate_queryset(
+        queryset.values_list(*plan.sources, *extra, named=True), request
+    )
+    return paginator.get_paginated_response(plan.to_representation(rows)).data
+
+
+@async_api_view
+async def product_detail(request, pk):
+    serializer = ProductSerializer(context={'request': request})
+    plan = compile_serializer(serializer)
+    try:
+        row = await product_queryset(serializer).values_list(*plan.sources).aget(pk=pk)
+    except Product.DoesNotExist:
+        raise exceptions.NotFound()
+    return plan.to_representation([row])[0]
+
+
+def order_queryset(serializer):
+    queryset = Order.objects.all()
+    deferred = serializer.deferred_model_fields()
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    if 'items' in serializer.fields:
+        queryset = queryset.prefetch_related(*order_prefetches())
+    return queryset
+
+
+@async_api_view
+async def order_list(request):
+    context = {'request': request}
+    queryset = list_orders(order_queryset(OrderSerializer(context=context)), request.query_params)
+    paginator = OrderKeysetPagination()
+    # Iterating a queryset asynchronously runs its prefetches as well
+    orders = await paginator.apaginate_queryset(queryset, request)
+    return paginator.get_paginated_response(
+        OrderSerializer(orders, many=True, context=context).data
+    ).data
+
+
+@async_api_view
+async def order_detail(request, pk):
+    context = {'request': request}
+    queryset = order_queryset(OrderSerializer(context=context)).filter(pk=pk)
+    orders = [order async for order in queryset]
+    if not orders:
+        raise exceptions.NotFound()
+    return OrderSerializer(orders[0], context=context).data
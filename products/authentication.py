@@ -0,0 +1,191 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import get_cache
+
+
+# A revision of None means the user was never revoked
+_UNREAD = object()
+
+
+def _revision_key(user_id):
+    return f'products:user-revision:{user_id}'
+
+
+class UserCache:
+    """
+    Bounded, thread-safe LRU of users by id whose entries expire after ``ttl`` seconds.
+
+    Each process has its own cache. ``revoke()`` drops an entry here and
+    changes the user's revision in the shared cache (``PRODUCT_CACHE_ALIAS``);
+    every process compares an entry's revision with it on each hit, so a
+    revocation reaches them all on their next request. Saving or deleting a
+    user revokes it (see ``products.signals``); ``QuerySet.update()`` sends
+    no signals, so call ``revoke()`` after changing users that way.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def revision(self, user_id):
+        """Read before loading the user, and pass to ``set()``, so a revocation in between is not missed."""
+        return get_cache().get(_revision_key(user_id))
+
+    async def arevision(self, user_id):
+        return await get_cache().aget(_revision_key(user_id))
+
+    def _lookup(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires, revision = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user, revision
+
+    def _checked(self, user_id, user, revision, current):
+        if current != revision:
+            self.invalidate(user_id)
+            return None
+        # Requests get their own copy so nothing they set leaks into the cache
+        return copy.copy(user)
+
+    def get(self, user_id):
+        entry = self._lookup(user_id)
+        if entry is None:
+            return None
+        return self._checked(user_id, *entry, self.revision(user_id))
+
+    async def aget(self, user_id):
+        """``get()`` reading the revision through the cache's async API."""
+        entry = self._lookup(user_id)
+        if entry is None:
+            return None
+        return self._checked(user_id, *entry, await self.arevision(user_id))
+
+    def set(self, user_id, user, revision=_UNREAD):
+        if self.max_size <= 0:
+            return
+        if revision is _UNREAD:
+            revision = self.revision(user_id)
+        with self._lock:
+            self._entries[user_id] = (copy.copy(user), time.monotonic() + self.ttl, revision)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def revoke(self, user_id):
+        """Make every process reload ``user_id`` from the database."""
+        # Entries older than the TTL are gone anyway, so the revision need not outlive it
+        get_cache().set(_revision_key(user_id), uuid.uuid4().hex, self.ttl)
+        self.invalidate(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` with an ``aauthenticate`` for async views.
+
+    Token validation is pure computation; only the user lookup touches the
+    database, through the async ORM.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_user(user, validated_token)
+
+    def check_user(self, user, validated_token):
+        """The checks ``JWTAuthentication.get_user`` runs once the user is loaded."""
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    JWT authentication that serves users from ``user_cache``.
+
+    On a warm cache a request is authenticated without any query: the token
+    signature and expiry are checked in process and the user, including its
+    ``is_active`` flag and password hash, comes from memory.
+    """
+    cache = user_cache
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        user = self.cache.get(user_id)
+        if user is None:
+            revision = self.cache.revision(user_id)
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.cache.set(user_id, user, revision)
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        # The revision may live in Redis or Memcached, which must not block the event loop
+        user = await self.cache.aget(user_id)
+        if user is None:
+            revision = await self.cache.arevision(user_id)
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.cache.set(user_id, user, revision)
+        return self.check_user(user, validated_token)
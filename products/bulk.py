@@ -0,0 +1,79 @@
+import csv
+import io
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def copy_rows(cursor, table, columns, rows):
+    """
+    Load ``rows`` into ``table`` with PostgreSQL's ``COPY ... FROM STDIN``.
+
+    Strings are quoted so that only ``None`` is read back as NULL.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows(rows)
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    column_list = ', '.join(quote(column) for column in columns)
+    # Django only translates driver errors for the cursor methods it wraps
+    with connection.wrap_database_errors:
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def prepare_row(fields, values):
+    """Convert ``values`` to what ``COPY`` expects for ``fields``, e.g. ``Money`` to integer cents."""
+    return [field.get_db_prep_save(value, connection) for field, value in zip(fields, values)]
+
+
+def insert_rows(model, fields, rows, batch_size=1000):
+    """Insert value tuples through ``COPY`` on PostgreSQL and ``bulk_create`` elsewhere."""
+    if connection.vendor == 'postgresql':
+        model_fields = [model._meta.get_field(field) for field in fields]
+        with connection.cursor() as cursor:
+            copy_rows(
+                cursor,
+                connection.ops.quote_name(model._meta.db_table),
+                [field.column for field in model_fields],
+                [prepare_row(model_fields, row) for row in rows],
+            )
+    else:
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in rows],
+            batch_size=batch_size,
+        )
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    Drop the plain secondary indexes of ``models`` and rebuild them on exit.
+
+    Building an index once over a loaded table is much cheaper than updating
+    it row by row. Primary key and unique indexes are kept because they back
+    constraints. This is a no-op outside PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        definitions = []
+        for model in models:
+            cursor.execute(
+                "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+                "JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE x.indrelid = %s::regclass AND NOT x.indisprimary AND NOT x.indisunique",
+                [model._meta.db_table],
+            )
+            definitions.extend(cursor.fetchall())
+        for name, _ in definitions:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, definition in definitions:
+                cursor.execute(definition)
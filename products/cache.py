@@ -0,0 +1,110 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import CatalogVersion
+
+# Created by migration 0013 on PostgreSQL, where it replaces the CatalogVersion row
+CATALOG_VERSION_SEQUENCE = 'products_catalog_version_seq'
+
+
+def get_cache():
+    return caches[settings.PRODUCT_CACHE_ALIAS]
+
+
+def _catalog_versions():
+    # Always the primary, a lagging replica would hand out stale versions
+    return CatalogVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def get_catalog_version():
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT last_value FROM {CATALOG_VERSION_SEQUENCE}')
+            return cursor.fetchone()[0]
+    return _catalog_versions().filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def _increment_catalog_version():
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == 'postgresql':
+        # Sequences are not transactional, so this never waits on another writer
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [CATALOG_VERSION_SEQUENCE])
+    elif not _catalog_versions().filter(pk=1).update(version=F('version') + 1):
+        # Seed from the clock so a recreated counter never reuses old versions
+        _catalog_versions().get_or_create(pk=1, defaults={'version': time.time_ns()})
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog response, in every process.
+
+    The version is bumped straight away and again once the surrounding
+    transaction commits, so a response built from pre-commit data in between
+    is never served under the final version.
+    """
+    _increment_catalog_version()
+    transaction.on_commit(_increment_catalog_version)
+
+
+def response_cache_key(request, version, source='primary'):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    digest = hashlib.sha256(
+        f'{version}|{source}|{request.accepted_renderer.format}|{url}'.encode()
+    ).hexdigest()
+    return f'products:response:{digest}'
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the cache, keyed on the catalog version.
+
+    The same key doubles as a strong ETag, so ``If-None-Match`` is answered
+    with a 304 after reading the catalog version, without touching the cache
+    entry. Responses are also keyed on ``get_read_source()``, so one built
+    from a lagging replica is never served to a request that must read the
+    primary.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_timeout(self):
+        return settings.PRODUCT_CACHE_TIMEOUT
+
+    def get_read_source(self):
+        return 'primary'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache_key(request, get_catalog_version(), self.get_read_source())
+        etag = f'"{key.rsplit(":", 1)[-1][:32]}"'
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache = get_cache()
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, self.get_cache_timeout())
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,128 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import ProductChange
+
+START = (0, 0)
+
+
+def _transaction_id():
+    if connection.vendor == 'postgresql':
+        return RawSQL('txid_current()', [])
+    # SQLite runs one writer at a time, so ids already follow commit order
+    return 0
+
+
+def record_changes(product_ids, kind):
+    """Append a ``kind`` entry per product to the change feed, in the current transaction."""
+    txid = _transaction_id()
+    ProductChange.objects.bulk_create(
+        [ProductChange(txid=txid, product_id=product_id, kind=kind) for product_id in sorted(product_ids)]
+    )
+
+
+def encode_position(position):
+    return '{}-{}'.format(*position)
+
+
+def decode_position(value):
+    """Parse a cursor made by ``encode_position``, raising ``ValueError`` if it is not one."""
+    txid, pk = value.split('-')
+    position = (int(txid), int(pk))
+    if min(position) < 0:
+        raise ValueError(value)
+    return position
+
+
+def _after(position):
+    txid, pk = position
+    return Q(txid__gt=txid) | Q(txid=txid, id__gt=pk)
+
+
+def visible_changes():
+    """
+    Entries no entry with a smaller position can appear before anymore.
+
+    Ids are drawn when a row is inserted, not when it commits, so a
+    transaction can commit an entry with a smaller id after a reader has
+    moved past it. On PostgreSQL entries are therefore ordered by the id of
+    their transaction and only served once every transaction with a smaller
+    id has finished, i.e. when it is below the snapshot's ``xmin``.
+    """
+    changes = ProductChange.objects.all()
+    if connection.vendor == 'postgresql':
+        changes = changes.filter(txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+    return changes
+
+
+def head_position():
+    """Position of the last visible entry, where a consumer that just crawled the catalog starts."""
+    return visible_changes().order_by('-txid', '-id').values_list('txid', 'id').first() or START
+
+
+def read_changes(position, limit):
+    """
+    Read up to ``limit`` entries after ``position``, coalesced per product.
+
+    Returns ``(changes, position, has_more)``: the kinds of change of each
+    product, ordered by its last change, the position reached and whether
+    more entries follow.
+    """
+    entries = list(
+        visible_changes().filter(_after(position)).order_by('txid', 'id')
+        .values_list('txid', 'id', 'product_id', 'kind')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    changes = {}
+    for txid, pk, product_id, kind in entries[:limit]:
+        kinds = changes.pop(product_id, [])
+        if kind not in kinds:
+            kinds.append(kind)
+        changes[product_id] = kinds
+        position = (txid, pk)
+    return changes, position, has_more
+
+
+def wait_for_changes(position, limit, wait):
+    """``read_changes``, polling for up to ``wait`` seconds while there are none."""
+    deadline = time.monotonic() + wait
+    while True:
+        changes, position, has_more = read_changes(position, limit)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            return changes, position, has_more
+        time.sleep(min(settings.CHANGE_FEED_POLL_INTERVAL, remaining))
+
+
+def compact_changes(older_than=None, batch_size=1000):
+    """
+    Delete entries older than ``older_than`` seconds that a later entry of the same product supersedes.
+
+    The feed serves each product's current state, so a consumer reading from
+    any position still gets the same products afterwards; only the kinds of
+    the dropped entries are lost. ``older_than`` defaults to
+    ``CHANGE_FEED_RETENTION``. Returns the number of entries deleted.
+    """
+    if older_than is None:
+        older_than = settings.CHANGE_FEED_RETENTION
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    superseded = Exists(
+        ProductChange.objects.filter(product_id=OuterRef('product_id')).filter(
+            Q(txid__gt=OuterRef('txid')) | Q(txid=OuterRef('txid'), id__gt=OuterRef('id'))
+        )
+    )
+    old = ProductChange.objects.filter(created_at__lt=cutoff).order_by('id')
+    last_id = 0
+    deleted = 0
+    while True:
+        ids = list(old.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        last_id = ids[-1]
+        deleted += ProductChange.objects.filter(pk__in=ids).filter(superseded).delete()[0]
@@ -0,0 +1,155 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import chain, islice
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer
+
+from .fastpath import compile_serializer
+from .importers import CSV, NDJSON
+from .inventory import with_available_stock
+from .models import Order, OrderItem, Product
+from .serializers import ProductSerializer
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv',
+}
+
+ORDER_CSV_HEADER = [
+    'order_id', 'status', 'total_price', 'created_at', 'product', 'quantity', 'price',
+]
+
+_datetime = serializers.DateTimeField()
+
+
+def product_rows(chunk_size=2000):
+    """Yield every product as its API representation, in primary key order."""
+    plan = compile_serializer(ProductSerializer())
+    rows = (
+        with_available_stock(Product.objects.order_by('id'))
+        .values_list(*plan.sources)
+        .iterator(chunk_size=chunk_size)
+    )
+    yield from plan.iter_representation(rows)
+
+
+def order_rows(chunk_size=2000):
+    """
+    Yield every order with its line items, in primary key order.
+
+    Orders are read through a server-side cursor and the items of each chunk
+    of orders are fetched with one range query on ``order_id``.
+    """
+    orders = (
+        Order.objects.order_by('id')
+        .values_list('id', 'status', 'total_price', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(orders, chunk_size)):
+        items = defaultdict(list)
+        for order_id, product_id, quantity, price in (
+            OrderItem.objects
+            .filter(order_id__gte=chunk[0][0], order_id__lte=chunk[-1][0])
+            .order_by('order_id', 'id')
+            .values_list('order_id', 'product_id', 'quantity', 'price')
+        ):
+            items[order_id].append({
+                'product': product_id,
+                'quantity': quantity,
+                'price': str(price),
+            })
+
+        for order_id, status, total_price, created_at in chunk:
+            yield {
+                'id': order_id,
+                'status': status,
+                'total_price': str(total_price),
+                'created_at': _datetime.to_representation(created_at),
+                'items': items[order_id],
+            }
+
+
+def flatten_orders(orders):
+    """One CSV row per order item, repeating the order columns."""
+    for order in orders:
+        for item in order['items']:
+            yield [
+                order['id'], order['status'], order['total_price'], order['created_at'],
+                item['product'], item['quantity'], item['price'],
+            ]
+
+
+def _batched(lines, size=500):
+    # Hand the server a few hundred rows at a time rather than one per write
+    lines = iter(lines)
+    while batch := list(islice(lines, size)):
+        yield ''.join(batch).encode()
+
+
+def to_ndjson(rows):
+    return _batched(
+        json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+        for row in rows
+    )
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the formatted line back."""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(header, rows):
+    writer = csv.writer(_Echo())
+    return _batched(chain([writer.writerow(header)], (writer.writerow(row) for row in rows)))
+
+
+def export_stream(kind, fmt, chunk_size=2000):
+    """Return an iterator of encoded chunks exporting ``kind`` in ``fmt``."""
+    if kind == 'products':
+        rows = product_rows(chunk_size)
+        if fmt == CSV:
+            fields = list(ProductSerializer().fields)
+            return to_csv(fields, ([row[field] for field in fields] for row in rows))
+    else:
+        rows = order_rows(chunk_size)
+        if fmt == CSV:
+            return to_csv(ORDER_CSV_HEADER, flatten_orders(rows))
+    return to_ndjson(rows)
+
+
+def streaming_response(kind, fmt, chunk_size=2000):
+    response = StreamingHttpResponse(
+        export_stream(kind, fmt, chunk_size), content_type=CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Content negotiation target for the streaming export actions.
+
+    Exports bypass rendering with a ``StreamingHttpResponse``; only error
+    payloads, such as a failed authentication, are rendered here.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode()
+
+
+class NDJSONRenderer(_ExportRenderer):
+    media_type = CONTENT_TYPES[NDJSON]
+    format = NDJSON
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = CONTENT_TYPES[CSV]
+    format = CSV
@@ -0,0 +1,162 @@
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .metrics import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def _identity(value):
+    return value
+
+
+def _decimal_transform(field):
+    """A ``DecimalField.to_representation`` with its quantum and context built once."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.decimal_places is None:
+        return field.to_representation
+
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+    Decimal = decimal.Decimal
+
+    def transform(value):
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value).strip())
+        quantized = value.quantize(quantum, rounding=rounding, context=context)
+        return '{:f}'.format(quantized) if coerce_to_string else quantized
+
+    return transform
+
+
+def _field_transform(field):
+    # Values coming back from values_list() are already ints and strs, which
+    # is exactly what these fields' to_representation() would return
+    if type(field) in (serializers.IntegerField, serializers.CharField):
+        return _identity
+    if type(field) is serializers.DecimalField:
+        return _decimal_transform(field)
+    return field.to_representation
+
+
+class ReadPlan:
+    """
+    Precomputed column list and per-field transforms for a serializer.
+
+    ``to_representation`` turns ``values_list()`` rows into the same dicts
+    the serializer would produce from model instances, without building the
+    instances or walking the fields for every row.
+    """
+
+    def __init__(self, names, sources, transforms):
+        self.names = names
+        self.sources = sources
+        self.transforms = transforms
+
+    def to_representation(self, rows):
+        with timed_serialization():
+            return list(self.iter_representation(rows))
+
+    def iter_representation(self, rows):
+        columns = list(zip(self.names, range(len(self.names)), self.transforms))
+        for row in rows:
+            yield {
+                name: None if row[index] is None else transform(row[index])
+                for name, index, transform in columns
+            }
+
+
+@lru_cache(maxsize=128)
+def _compile(serializer_class, field_names):
+    serializer = serializer_class()
+    model = serializer.Meta.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    fields = [serializer.fields[name] for name in field_names]
+    if any(field.source not in concrete for field in fields):
+        return None
+    return ReadPlan(
+        names=list(field_names),
+        # Fields may read an annotation the view's queryset provides instead
+        sources=[getattr(field, 'read_source', field.source) for field in fields],
+        transforms=[_field_transform(field) for field in fields],
+    )
+
+
+def compile_serializer(serializer):
+    """
+    Return a ``ReadPlan`` for ``serializer``'s current fields, or ``None``.
+
+    Only serializers whose fields all map straight onto model columns can be
+    compiled; anything else must go through the regular serializer.
+    """
+    return _compile(type(serializer), tuple(serializer.fields))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when it is installed and the output would match."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed_serialization():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            # Dates and dataclasses are left to JSONRenderer's own formatting
+            ret = orjson.dumps(
+                data, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Mirror JSONRenderer, which escapes these for JavaScript compatibility
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from ``values_list()`` rows through a compiled ``ReadPlan``.
+
+    Falls back to the regular serializer path when the fast path is switched
+    off or the serializer cannot be compiled.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.PRODUCT_LIST_FAST_PATH:
+            return super().list(request, *args, **kwargs)
+        plan = compile_serializer(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        # Paginators may need more columns than the serializer, e.g. to build
+        # keyset cursors, so rows are fetched as named tuples
+        extra = [
+            field for field in getattr(self.paginator, 'get_cursor_fields', lambda r: [])(request)
+            if field not in plan.sources
+        ]
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*plan.sources, *extra, named=True)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.to_representation(page))
+        return Response(plan.to_representation(rows))
@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .changes import decode_position
+from .inventory import hot_product_ids_in_stock
+from .models import Order
+from .search import search_products
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    """
+    Whitelisted query parameters for the product list.
+
+    Every combination is served by one of the ``Product.Meta.indexes``:
+    ``(price, id)`` and ``(created_at, id)`` for ordering and price ranges,
+    their ``stock > 0`` and ``stock <= 0`` partial twins for ``in_stock`` and
+    ``(updated_at, id)`` for ``updated_since``.
+    """
+    ORDERINGS = {
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    in_stock = serializers.BooleanField(required=False, default=None, allow_null=True)
+    updated_since = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), required=False)
+
+    def validate(self, attrs):
+        min_price, max_price = attrs.get('min_price'), attrs.get('max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("min_price cannot be greater than max_price.")
+        return attrs
+
+
+def list_products(queryset, query_params):
+    """Validate the product list query parameters and apply them, search included."""
+    filters = ProductFilterSerializer(data=query_params)
+    filters.is_valid(raise_exception=True)
+    queryset = queryset.order_by('id')
+    query = query_params.get('q', '').strip()
+    if query:
+        queryset = search_products(queryset, query)
+    # An explicit ordering takes precedence over search relevance
+    return filter_products(queryset, filters.validated_data)
+
+
+def filter_products(queryset, params):
+    """Apply validated ``ProductFilterSerializer`` data to a product queryset."""
+    if 'min_price' in params:
+        queryset = queryset.filter(price__gte=params['min_price'])
+    if 'max_price' in params:
+        queryset = queryset.filter(price__lte=params['max_price'])
+    if params.get('in_stock') is not None:
+        # Hot products keep their stock in shard rows, see products.inventory
+        hot_ids = hot_product_ids_in_stock()
+        if params['in_stock']:
+            in_stock = Q(stock__gt=0)
+            if hot_ids:
+                in_stock |= Q(pk__in=hot_ids)
+            queryset = queryset.filter(in_stock)
+        else:
+            # Spelled like the partial indexes' condition, which SQLite only
+            # matches literally
+            queryset = queryset.filter(stock__lte=0)
+            if hot_ids:
+                queryset = queryset.exclude(pk__in=hot_ids)
+    if 'updated_since' in params:
+        queryset = queryset.filter(updated_at__gte=params['updated_since'])
+    if 'ordering' in params:
+        queryset = queryset.order_by(*ProductFilterSerializer.ORDERINGS[params['ordering']])
+    return queryset
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    """
+    Whitelisted query parameters for the order list.
+
+    Served by ``(created_at, id)`` or, with ``status``, by
+    ``(status, created_at, id)``; see ``Order.Meta.indexes``.
+    """
+    ORDERINGS = ['created_at', '-created_at']
+
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(choices=ORDERINGS, required=False)
+
+    def validate(self, attrs):
+        after, before = attrs.get('created_after'), attrs.get('created_before')
+        if after is not None and before is not None and after > before:
+            raise serializers.ValidationError("created_after cannot be later than created_before.")
+        return attrs
+
+
+def filter_orders(queryset, params):
+    """Apply validated ``OrderFilterSerializer`` data to an order queryset."""
+    if 'status' in params:
+        queryset = queryset.filter(status=params['status'])
+    if 'created_after' in params:
+        queryset = queryset.filter(created_at__gte=params['created_after'])
+    if 'created_before' in params:
+        queryset = queryset.filter(created_at__lt=params['created_before'])
+    return queryset
+
+
+def list_orders(queryset, query_params):
+    """Validate the order list query parameters and apply them."""
+    filters = OrderFilterSerializer(data=query_params)
+    filters.is_valid(raise_exception=True)
+    return filter_orders(queryset, filters.validated_data)
+
+
+class SalesFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of the sales reports, answered from ``ProductSalesDaily``.
+
+    ``start`` is inclusive and ``end`` exclusive; without them the report
+    covers the last ``DEFAULT_DAYS`` days up to and including today.
+    """
+    DEFAULT_DAYS = 7
+    MAX_DAYS = 366
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    product = serializers.IntegerField(min_value=1, required=False)
+    by = serializers.ChoiceField(choices=['units', 'revenue'], default='units')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate() + timedelta(days=1)
+        start = attrs.get('start') or end - timedelta(days=self.DEFAULT_DAYS)
+        if start >= end:
+            raise serializers.ValidationError("start must be earlier than end.")
+        if (end - start).days > self.MAX_DAYS:
+            raise serializers.ValidationError(f"Reports cover at most {self.MAX_DAYS} days.")
+        return {**attrs, 'start': start, 'end': end}
+
+
+def sales_params(query_params):
+    filters = SalesFilterSerializer(data=query_params)
+    filters.is_valid(raise_exception=True)
+    return filters.validated_data
+
+
+class ChangeFeedFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of the catalog change feed.
+
+    Without ``since`` the feed answers with the current cursor only, for
+    consumers that have just crawled the whole catalog. ``wait`` holds the
+    request open until changes arrive, for at most ``CHANGE_FEED_MAX_WAIT``.
+    """
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    wait = serializers.FloatField(min_value=0, default=0)
+
+    def validate_since(self, value):
+        try:
+            return decode_position(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid cursor.")
+
+    def validate_wait(self, value):
+        return min(value, settings.CHANGE_FEED_MAX_WAIT)
+
+
+def change_feed_params(query_params):
+    filters = ChangeFeedFilterSerializer(data=query_params)
+    filters.is_valid(raise_exception=True)
+    return filters.validated_data
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+# Seconds since a replica replayed its last transaction; this grows while the
+# primary is idle too, so it is an upper bound on the lag
+REPLICA_LAG_SQL = (
+    'SELECT CASE WHEN pg_is_in_recovery() '
+    'THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def check_database(alias):
+    """Time a ``SELECT 1`` on ``alias`` and describe its connection."""
+    connection = connections[alias]
+    state = {
+        # Whether this thread's persistent connection was open before the check
+        'connected': connection.connection is not None,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+    }
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            state['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            if alias in settings.DATABASE_REPLICAS and connection.vendor == 'postgresql':
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = cursor.fetchone()[0]
+                state['lag_seconds'] = None if lag is None else round(float(lag), 3)
+    except DatabaseError as error:
+        # Messages can name hosts and users, and the probes are unauthenticated
+        return {**state, 'status': 'unavailable', 'error': type(error).__name__}
+    return {**state, 'status': 'ok'}
+
+
+def check_migrations():
+    """List migrations the code has and the primary has not applied yet."""
+    try:
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    except DatabaseError as error:
+        return {'status': 'unavailable', 'error': type(error).__name__}
+    pending = [f'{migration.app_label}.{migration.name}' for migration, backwards in plan]
+    return {'status': 'pending' if pending else 'ok', 'pending': pending}
+
+
+def run_checks():
+    """
+    Check the primary, every replica and the migrations.
+
+    Only the primary and the migrations decide readiness; an unreachable
+    replica makes the status ``degraded``, as taking every instance out of
+    rotation would not bring it back.
+    """
+    databases = {
+        alias: check_database(alias) for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+    }
+    migrations = check_migrations()
+    if migrations['status'] != 'ok' or databases[DEFAULT_DB_ALIAS]['status'] != 'ok':
+        state = 'unavailable'
+    elif any(db['status'] != 'ok' for db in databases.values()):
+        state = 'degraded'
+    else:
+        state = 'ok'
+    return {'status': state, 'databases': databases, 'migrations': migrations}
+
+
+class ReadinessCheck:
+    """
+    ``run_checks()`` reused for ``settings.HEALTH_CHECK_CACHE_SECONDS``.
+
+    Each process keeps its own result. Probes arriving while the checks run
+    wait for them instead of starting their own.
+    """
+
+    def __init__(self):
+        self._result = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._result is None or self._expires <= time.monotonic():
+                self._result = run_checks()
+                self._expires = time.monotonic() + settings.HEALTH_CHECK_CACHE_SECONDS
+            return self._result
+
+    def clear(self):
+        with self._lock:
+            self._result = None
+
+
+readiness = ReadinessCheck()
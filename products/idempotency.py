@@ -0,0 +1,108 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+# Response headers stored with the body and replayed with it
+REPLAYED_HEADERS = ['Location']
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = f'{HEADER} was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def request_fingerprint(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Return the ``IdempotencyKey`` row for ``key`` and whether this request created it.
+
+    Must run inside a transaction. Inserting the row takes the key's unique
+    index entry, so a concurrent request with the same key blocks here until
+    the first one commits, and then finds its stored response, or rolls back,
+    and then claims the key itself. Expired rows are replaced.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    record, created = IdempotencyKey.objects.get_or_create(
+        user=user, key=key, defaults={'fingerprint': fingerprint, 'expires_at': expires_at},
+    )
+    if not created and record.expires_at <= now:
+        record.delete()
+        record = IdempotencyKey.objects.create(
+            user=user, key=key, fingerprint=fingerprint, expires_at=expires_at
+        )
+        created = True
+    return record, created
+
+
+class IdempotentCreateMixin:
+    """
+    Make ``create`` safe to retry with an ``Idempotency-Key`` header.
+
+    The key, scoped to the user, is stored with the response in the
+    transaction that creates the object. A retry with the same key and body
+    gets that response, including its ``REPLAYED_HEADERS``, back with
+    ``Idempotent-Replayed: true`` and writes nothing; the same key with
+    another body is rejected. Failed requests store nothing and may be
+    retried. Requests without the header are not affected.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: [f'Must be 1 to {MAX_KEY_LENGTH} characters.']})
+
+        fingerprint = request_fingerprint(request.data)
+        with transaction.atomic():
+            record, created = claim_key(request.user, key, fingerprint)
+            if not created:
+                if record.fingerprint != fingerprint:
+                    raise KeyReused()
+                response = Response(
+                    record.response_body, status=record.response_status,
+                    headers=record.response_headers,
+                )
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            response = super().create(request, *args, **kwargs)
+            if response.status_code == status.HTTP_201_CREATED:
+                record.order_id = response.data['id']
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.response_headers = {
+                name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)
+            }
+            record.save(update_fields=['order', 'response_status', 'response_body', 'response_headers'])
+        return response
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired keys in batches of ``batch_size``, returning how many went."""
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,277 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .bulk import copy_rows, prepare_row
+from .cache import bump_catalog_version
+from .changes import record_changes
+from .models import Product
+from .serializers import MoneyFieldsMixin
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = {
+    'application/x-ndjson': NDJSON,
+    'application/jsonlines': NDJSON,
+    'text/csv': CSV,
+}
+
+IMPORT_FIELDS = ['sku', 'name', 'description', 'price', 'stock']
+UPSERT_KEY = 'sku'
+SKU_EXISTS = 'product with this sku already exists.'
+
+
+class ProductImportSerializer(MoneyFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        fields = IMPORT_FIELDS
+        # Uniqueness is checked once per chunk instead of one query per row
+        extra_kwargs = {'sku': {'validators': [], 'default': None}}
+
+    def validate_sku(self, value):
+        return value or None
+
+
+def _decode(lines, encoding, errors):
+    """Decode line by line, blanking lines that are not ``encoding`` and adding an error for each to ``errors``."""
+    for line in lines:
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError as exc:
+            errors.append(ValueError(f"Invalid {encoding} text: {exc.reason} at byte {exc.start}."))
+            yield ''
+
+
+def read_rows(lines, fmt, encoding='utf-8'):
+    """
+    Lazily parse an iterable of raw byte lines into row dicts.
+
+    Lines that cannot be decoded or parsed are yielded as ``ValueError``
+    instances so the importer can report them against their row number.
+    """
+    errors = []
+    lines = _decode(lines, encoding, errors)
+    if fmt == CSV:
+        rows = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except csv.Error as exc:
+                # The reader has consumed the offending line and carries on after it
+                row = ValueError(f"Invalid CSV: {exc}")
+            yield from errors
+            errors.clear()
+            yield row
+        yield from errors
+        return
+
+    for line in lines:
+        yield from errors
+        errors.clear()
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(row, dict):
+            yield ValueError("Expected a JSON object.")
+            continue
+        yield row
+
+
+class ProductImporter:
+    """
+    Validate and write product rows in fixed-size chunks.
+
+    Rows are streamed through in chunks of ``chunk_size``, so memory use does
+    not depend on the size of the input. Each valid chunk is committed in its
+    own transaction, through ``COPY`` on PostgreSQL and ``bulk_create``
+    elsewhere. With ``upsert`` rows whose ``sku`` already exists update the
+    existing product instead of being rejected. A chunk that conflicts with
+    SKUs inserted meanwhile is written again row by row, rejecting only
+    those rows. Errors are reported in row order.
+    """
+
+    def __init__(self, upsert=False, chunk_size=1000, max_errors=1000):
+        self.upsert = upsert
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.chunk_errors = []
+
+    def run(self, rows):
+        rows = enumerate(rows, start=1)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.import_chunk(chunk)
+        return self.report()
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        self.chunk_errors.append((row_number, errors))
+
+    def import_chunk(self, chunk):
+        self.chunk_errors = []
+        try:
+            self.write_chunk(chunk)
+        finally:
+            # Reported in row order, whichever check found them
+            for row_number, errors in sorted(self.chunk_errors, key=lambda error: error[0]):
+                if len(self.errors) < self.max_errors:
+                    self.errors.append({'row': row_number, 'errors': errors})
+
+    def write_chunk(self, chunk):
+        self.rows += len(chunk)
+        valid = {}
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                self.add_error(row_number, {'non_field_errors': [str(row)]})
+                continue
+            serializer = ProductImportSerializer(data=row)
+            if not serializer.is_valid():
+                self.add_error(row_number, serializer.errors)
+                continue
+            valid[row_number] = serializer.validated_data
+
+        valid = self.check_skus(valid)
+        if not valid:
+            return
+
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    self.copy(list(valid.values()), now)
+                else:
+                    self.bulk_create(list(valid.values()), now)
+                self.record_changes(now)
+                bump_catalog_version()
+        except IntegrityError:
+            # A SKU was inserted by someone else after check_skus()
+            self.write_rows(valid, now)
+        else:
+            self.imported += len(valid)
+
+    def write_rows(self, valid, now):
+        """Insert ``valid`` rows one at a time, rejecting those that conflict."""
+        imported = 0
+        with transaction.atomic():
+            for row_number, data in valid.items():
+                try:
+                    with transaction.atomic():
+                        self.bulk_create([data], now)
+                except IntegrityError:
+                    self.add_error(row_number, {'sku': [SKU_EXISTS]})
+                else:
+                    imported += 1
+            if imported:
+                self.record_changes(now)
+                bump_catalog_version()
+        self.imported += imported
+
+    def check_skus(self, valid):
+        """Reject rows whose SKU repeats within the chunk or, unless upserting, already exists."""
+        seen = {}
+        for row_number, data in valid.items():
+            if data['sku'] is not None:
+                seen.setdefault(data['sku'], []).append(row_number)
+
+        existing = set()
+        if not self.upsert and seen:
+            existing = set(
+                Product.objects.filter(sku__in=seen).values_list('sku', flat=True)
+            )
+
+        rejected = set()
+        for sku, row_numbers in seen.items():
+            if sku in existing:
+                duplicates = row_numbers
+            elif self.upsert:
+                # The last occurrence of a SKU wins
+                duplicates = row_numbers[:-1]
+            else:
+                duplicates = row_numbers[1:]
+            for row_number in duplicates:
+                rejected.add(row_number)
+                self.add_error(row_number, {'sku': [SKU_EXISTS]})
+
+        return {
+            row_number: data for row_number, data in valid.items()
+            if row_number not in rejected
+        }
+
+    def record_changes(self, since):
+        """
+        Append change feed entries for the products written from ``since`` on.
+
+        Products other transactions touched meanwhile get an extra entry,
+        which only makes feed consumers fetch them once more.
+        """
+        created, updated = [], []
+        rows = Product.objects.filter(updated_at__gte=since).values_list('pk', 'created_at')
+        for pk, created_at in rows:
+            (created if created_at >= since else updated).append(pk)
+        record_changes(created, 'created')
+        record_changes(updated, 'updated')
+
+    def bulk_create(self, rows, now):
+        products = [Product(created_at=now, updated_at=now, **data) for data in rows]
+        options = {}
+        if self.upsert:
+            options = {
+                'update_conflicts': True,
+                'unique_fields': [UPSERT_KEY],
+                'update_fields': [f for f in IMPORT_FIELDS if f != UPSERT_KEY] + ['updated_at'],
+            }
+        Product.objects.bulk_create(products, batch_size=self.chunk_size, **options)
+
+    def copy(self, rows, now):
+        columns = IMPORT_FIELDS + ['created_at', 'updated_at']
+        fields = [Product._meta.get_field(column) for column in columns]
+        values = [
+            prepare_row(fields, [data[field] for field in IMPORT_FIELDS] + [now, now])
+            for data in rows
+        ]
+
+        quote = connection.ops.quote_name
+        table = quote(Product._meta.db_table)
+        with connection.cursor() as cursor:
+            if not self.upsert:
+                copy_rows(cursor, table, columns, values)
+                return
+
+            column_list = ', '.join(quote(column) for column in columns)
+            cursor.execute(
+                f"CREATE TEMP TABLE product_import ON COMMIT DROP AS "
+                f"SELECT {column_list} FROM {table} WITH NO DATA"
+            )
+            copy_rows(cursor, 'product_import', columns, values)
+            updates = ', '.join(
+                f"{quote(column)} = EXCLUDED.{quote(column)}"
+                for column in columns
+                if column not in (UPSERT_KEY, 'created_at')
+            )
+            cursor.execute(
+                f"INSERT INTO {table} ({column_list}) "
+                f"SELECT {column_list} FROM product_import "
+                f"ON CONFLICT ({quote(UPSERT_KEY)}) DO UPDATE SET {updates}"
+            )
@@ -0,0 +1,215 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from .models import OrderIntakeJob
+from .serializers import OrderIntakeJobSerializer
+from .services import place_orders
+
+# Jobs whose time to commit feeds the latency gauges on /metrics
+COMMIT_LATENCY_WINDOW = timedelta(minutes=5)
+COMMIT_LATENCY_SAMPLE = 1000
+# Longest pause of a worker whose groups keep failing, in seconds
+MAX_BACKOFF = 30
+
+logger = logging.getLogger(__name__)
+
+
+def async_intake_enabled():
+    return settings.ORDER_INTAKE == 'async'
+
+
+def enqueue_order(user, items):
+    """Queue validated order ``items`` for the workers, returning the job."""
+    return OrderIntakeJob.objects.create(
+        user=user,
+        items=[{'product_id': item['product_id'], 'quantity': item['quantity']} for item in items],
+    )
+
+
+def _place_group(jobs):
+    payloads = [{'items': job.items} for job in jobs]
+    try:
+        with transaction.atomic():
+            return place_orders(payloads, atomic=False)
+    except serializers.ValidationError:
+        # A hot product's shards ran dry between the check and the decrement,
+        # which fails the whole group; retry the jobs one by one
+        results = []
+        for payload in payloads:
+            try:
+                with transaction.atomic():
+                    results.extend(place_orders([payload], atomic=False))
+            except serializers.ValidationError as exc:
+                results.append((None, exc.detail))
+        return results
+
+
+def process_jobs(batch_size=100):
+    """
+    Claim up to ``batch_size`` queued jobs and place them in one transaction.
+
+    Jobs are claimed with ``FOR UPDATE SKIP LOCKED``, so any number of
+    workers can run side by side without waiting on each other's groups.
+    The group goes through ``place_orders``, which locks its products once
+    and merges the stock decrements per product, and commits once for all
+    its orders. Returns the number of jobs processed.
+
+    Any other error rolls the group back and is raised. A job that fails on
+    its own ``ORDER_INTAKE_MAX_ATTEMPTS`` times is rejected.
+    """
+    ids = []
+    try:
+        with transaction.atomic():
+            jobs = list(
+                OrderIntakeJob.objects.select_for_update(skip_locked=True)
+                .filter(status='queued')
+                .order_by('id')[:batch_size]
+            )
+            if not jobs:
+                return 0
+            ids = [job.pk for job in jobs]
+
+            results = _place_group(jobs)
+            now = timezone.now()
+            for job, (order, errors) in zip(jobs, results):
+                job.status = 'placed' if order is not None else 'rejected'
+                job.order = order
+                job.errors = errors
+                job.processed_at = now
+            OrderIntakeJob.objects.bulk_update(jobs, ['status', 'order', 'errors', 'processed_at'])
+    except Exception:
+        # Only a failure on its own pins the error on a job
+        if len(ids) == 1:
+            _record_failure(ids[0])
+        raise
+    return len(jobs)
+
+
+def _record_failure(job_id):
+    with transaction.atomic():
+        OrderIntakeJob.objects.filter(pk=job_id, status='queued').update(attempts=F('attempts') + 1)
+        OrderIntakeJob.objects.filter(
+            pk=job_id, status='queued', attempts__gte=settings.ORDER_INTAKE_MAX_ATTEMPTS
+        ).update(
+            status='rejected',
+            # Exception messages can name hosts and tables, the details are logged
+            errors={'detail': 'The order could not be placed.'},
+            processed_at=timezone.now(),
+        )
+
+
+def purge_processed_jobs(batch_size=1000):
+    """Delete jobs processed more than ``ORDER_INTAKE_RETENTION`` seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=settings.ORDER_INTAKE_RETENTION)
+    expired = OrderIntakeJob.objects.filter(processed_at__lt=cutoff)
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += OrderIntakeJob.objects.filter(pk__in=ids).delete()[0]
+
+
+def _pause(seconds, should_stop):
+    deadline = time.monotonic() + seconds
+    while not should_stop() and time.monotonic() < deadline:
+        time.sleep(min(0.1, deadline - time.monotonic()))
+
+
+def run_worker(batch_size, poll_interval, should_stop, drain=False):
+    """
+    Process jobs until ``should_stop()`` is true, or the queue is empty with ``drain``.
+
+    Sleeps ``poll_interval`` seconds whenever the queue is empty, and purges
+    old processed jobs about once a minute. Errors are logged and back the
+    worker off exponentially, up to ``MAX_BACKOFF`` seconds; the next
+    ``batch_size`` jobs are then placed one at a time, so a job that keeps
+    failing is found and eventually rejected by ``process_jobs``.
+    """
+    purged_at = 0
+    processed = 0
+    failures = 0
+    isolating = 0
+    while not should_stop():
+        try:
+            if time.monotonic() - purged_at > 60:
+                purge_processed_jobs()
+                purged_at = time.monotonic()
+            done = process_jobs(1 if isolating else batch_size)
+        except Exception:
+            failures += 1
+            delay = min(poll_interval * 2 ** failures, MAX_BACKOFF)
+            logger.exception(
+                'Order intake failed %d times in a row, retrying in %.1f seconds', failures, delay
+            )
+            # A dropped connection is reopened by the next query
+            connection.close_if_unusable_or_obsolete()
+            isolating = isolating or batch_size
+            _pause(delay, should_stop)
+            continue
+        failures = 0
+        isolating = max(isolating - done, 0)
+        processed += done
+        if not done:
+            if drain:
+                break
+            time.sleep(poll_interval)
+    return processed
+
+
+def intake_metrics():
+    """Queue depth and time-to-commit gauges for ``metrics.registry``."""
+    queue = OrderIntakeJob.objects.filter(status='queued').aggregate(
+        depth=Count('id'), oldest=Min('created_at')
+    )
+    depth, oldest = queue['depth'], queue['oldest']
+    now = timezone.now()
+    lines = [
+        '# HELP order_intake_queue_depth Orders waiting for an intake worker.',
+        '# TYPE order_intake_queue_depth gauge',
+        f'order_intake_queue_depth {depth}',
+        '# HELP order_intake_oldest_job_seconds Age of the oldest queued order.',
+        '# TYPE order_intake_oldest_job_seconds gauge',
+        f'order_intake_oldest_job_seconds {(now - oldest).total_seconds() if oldest else 0}',
+    ]
+
+    latencies = sorted(
+        (processed_at - created_at).total_seconds()
+        for created_at, processed_at in OrderIntakeJob.objects.filter(
+            processed_at__gte=now - COMMIT_LATENCY_WINDOW
+        ).order_by('-processed_at').values_list('created_at', 'processed_at')[:COMMIT_LATENCY_SAMPLE]
+    )
+    lines += [
+        '# HELP order_intake_commit_seconds Time from enqueue to commit of recently processed orders.',
+        '# TYPE order_intake_commit_seconds gauge',
+    ]
+    for quantile in (0.5, 0.95, 0.99):
+        value = latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] if latencies else 0
+        lines.append(f'order_intake_commit_seconds{{quantile="{quantile}"}} {value}')
+    return lines
+
+
+class QueuedCreateMixin:
+    """
+    Queue orders instead of placing them while ``ORDER_INTAKE`` is ``async``.
+
+    The order is validated as usual, stored as an ``OrderIntakeJob`` and
+    answered with ``202 Accepted`` and the job's status URL in ``Location``.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not async_intake_enabled():
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue_order(request.user, serializer.validated_data['items'])
+        data = OrderIntakeJobSerializer(job, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': data['url']})
@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from .models import Product, ProductStockShard
+
+SHARD_ATTEMPTS = 3
+
+
+def shard_stock_total():
+    """Sum of the outer product's shard rows, 0 when it has none."""
+    total = (
+        ProductStockShard.objects.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(total=Sum('stock'))
+        .values('total')
+    )
+    return Coalesce(Subquery(total, output_field=IntegerField()), 0)
+
+
+def available_stock():
+    """
+    Expression for a product's sellable stock.
+
+    Plain products only have their ``stock`` column. Hot products hold most of
+    it in ``ProductStockShard`` rows, and whatever was added to ``stock``
+    since the last reshard, e.g. by an import, on top.
+    """
+    return Case(
+        When(stock_shard_count=0, then=F('stock')),
+        default=F('stock') + shard_stock_total(),
+        output_field=IntegerField(),
+    )
+
+
+def with_available_stock(queryset):
+    return queryset.annotate(available_stock=available_stock())
+
+
+def hot_product_ids_in_stock():
+    # Hot products are few, so listing them keeps the in_stock filter on the
+    # partial stock > 0 indexes for everything else
+    return list(
+        ProductStockShard.objects.filter(stock__gt=0)
+        .values_list('product_id', flat=True)
+        .distinct()
+    )
+
+
+def take_stock(product_id, quantity):
+    """
+    Take ``quantity`` units of a hot product, returning whether it succeeded.
+
+    A random shard that can cover the whole quantity is decremented with one
+    conditional UPDATE, so concurrent orders mostly touch different rows.
+    Orders that no single shard can cover lock every shard and the product
+    row and draw from several of them.
+    """
+    candidates = ProductStockShard.objects.filter(product_id=product_id, stock__gte=quantity)
+    for _ in range(SHARD_ATTEMPTS):
+        updated = ProductStockShard.objects.filter(
+            pk=Subquery(candidates.order_by('?').values('pk')[:1]),
+            stock__gte=quantity,
+        ).update(stock=F('stock') - quantity)
+        if updated:
+            return True
+    return _take_spread(product_id, quantity)
+
+
+def _take_spread(product_id, quantity):
+    product = Product.objects.select_for_update().only('id', 'stock').get(pk=product_id)
+    shards = list(
+        ProductStockShard.objects.select_for_update()
+        .filter(product_id=product_id, stock__gt=0)
+        .order_by('shard')
+    )
+    if product.stock + sum(shard.stock for shard in shards) < quantity:
+        return False
+
+    remaining = quantity
+    for shard in shards:
+        taken = min(shard.stock, remaining)
+        shard.stock -= taken
+        remaining -= taken
+    ProductStockShard.objects.bulk_update(shards, ['stock'])
+    if remaining:
+        Product.objects.filter(pk=product_id).update(stock=F('stock') - remaining)
+    return True
+
+
+def reshard_stock(product_id, shard_count):
+    """
+    Spread a product's whole stock evenly over ``shard_count`` shards.
+
+    A count of 0 folds the stock back into ``Product.stock``. Running it again
+    with the same count rebalances shards drained unevenly by orders.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        shards = ProductStockShard.objects.select_for_update().filter(product_id=product_id)
+        total = product.stock + sum(shards.values_list('stock', flat=True))
+        ProductStockShard.objects.filter(product_id=product_id).delete()
+
+        if shard_count:
+            base, extra = divmod(total, shard_count)
+            ProductStockShard.objects.bulk_create([
+                ProductStockShard(product_id=product_id, shard=shard, stock=base + (shard < extra))
+                for shard in range(shard_count)
+            ])
+            total = 0
+        product.stock = total
+        product.stock_shard_count = shard_count
+        product.save(update_fields=['stock', 'stock_shard_count', 'updated_at'])
+    return product
@@ -0,0 +1,322 @@
+import http.client
+import io
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from products.cache import bump_catalog_version
+from products.models import Product
+
+SKU_PREFIX = 'BENCH-'
+# Enough that no run sells a seeded product out
+SEED_STOCK = 10 ** 9
+DEFAULT_MIX = 'product-list=30,product-page=20,product-detail=30,order-create=20'
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise CommandError(f'Unknown endpoint "{name}", choose from {", ".join(ENDPOINTS)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted ``values``."""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['latency'] for sample in samples)
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(sample['status'] >= 400 for sample in samples),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Describe each endpoint that got worse than ``baseline`` by more than ``threshold``.
+
+    Latency and throughput are compared with the relative ``threshold``;
+    queries per request are deterministic, so any increase counts.
+    """
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        for metric in ['p50_ms', 'p95_ms', 'p99_ms']:
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f'{name}: {metric} {previous[metric]} -> {current[metric]}')
+        if current['rps'] < previous['rps'] * (1 - threshold):
+            regressions.append(f'{name}: rps {previous["rps"]} -> {current["rps"]}')
+        if None not in (current['queries_per_request'], previous['queries_per_request']) and (
+            current['queries_per_request'] > previous['queries_per_request']
+        ):
+            regressions.append(
+                f'{name}: queries/request {previous["queries_per_request"]} '
+                f'-> {current["queries_per_request"]}'
+            )
+        if current['errors'] > previous['errors']:
+            regressions.append(f'{name}: errors {previous["errors"]} -> {current["errors"]}')
+    return regressions
+
+
+def product_list(rng, product_ids, page_count):
+    return 'GET', '/api/products/', {}, None
+
+
+def product_page(rng, product_ids, page_count):
+    return 'GET', '/api/products/', {'page': rng.randint(1, max(1, page_count))}, None
+
+
+def product_detail(rng, product_ids, page_count):
+    return 'GET', f'/api/products/{rng.choice(product_ids)}/', {}, None
+
+
+def order_create(rng, product_ids, page_count):
+    items = [
+        {'product': product_id, 'quantity': rng.randint(1, 3)}
+        for product_id in rng.sample(product_ids, rng.randint(1, min(20, len(product_ids))))
+    ]
+    return 'POST', '/api/orders/', {}, {'items': items}
+
+
+ENDPOINTS = {
+    'product-list': product_list,
+    'product-page': product_page,
+    'product-detail': product_detail,
+    'order-create': order_create,
+}
+
+
+class InProcessTransport:
+    """Calls the WSGI application directly, without a server or sockets."""
+
+    def __init__(self, host):
+        self.handler = WSGIHandler()
+        self.host = host
+
+    def request(self, method, path, query, body, headers):
+        payload = b'' if body is None else json.dumps(body).encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(query),
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            environ[f'HTTP_{name.upper().replace("-", "_")}'] = value
+        started = []
+        response = self.handler(environ, lambda status, headers: started.append((status, headers)))
+        b''.join(response)
+        response.close()
+        status, response_headers = started[0]
+        return int(status.split()[0]), dict(response_headers)
+
+
+class HTTPTransport:
+    """Keeps one connection per thread to a running server."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise CommandError(f'Unsupported URL "{url}"')
+        self.parts = parts
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            factory = (
+                http.client.HTTPSConnection if self.parts.scheme == 'https'
+                else http.client.HTTPConnection
+            )
+            conn = self.local.connection = factory(self.parts.netloc, timeout=60)
+        return conn
+
+    def request(self, method, path, query, body, headers):
+        url = self.parts.path.rstrip('/') + path + (f'?{urlencode(query)}' if query else '')
+        payload = None if body is None else json.dumps(body).encode()
+        headers = {**headers, 'Content-Type': 'application/json'}
+        conn = self.connection()
+        try:
+            conn.request(method, url, payload, headers)
+            response = conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.connection = None
+            raise
+        return response.status, dict(response.getheaders())
+
+
+class Command(BaseCommand):
+    help = 'Load-test the API with a mixed workload and report latency, throughput and queries per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Benchmark a running server sharing this database, '
+                                          'e.g. http://localhost:8000; default is in-process')
+        parser.add_argument('--products', type=int, default=1000,
+                            help='Benchmark products seeded before the run')
+        parser.add_argument('--users', type=int, default=10, help='Users requests are spread over')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=100, help='Unrecorded requests run first')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight')
+        parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                            help=f'Endpoint weights, default "{DEFAULT_MIX}"')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the request sequence')
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Results JSON of an earlier run to compare with')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Allowed relative slowdown against the baseline, in percent')
+
+    def handle(self, *args, **options):
+        if not options['url'] and connection.vendor == 'sqlite' and options['concurrency'] > 1:
+            raise CommandError('SQLite serializes connections, use --concurrency 1 or PostgreSQL')
+        if options['products'] < 1:
+            raise CommandError('--products must be at least 1')
+        self.options = options
+
+        product_ids = self.seed_products(options['products'])
+        page_count = math.ceil(Product.objects.count() / 10)
+        tokens = [self.mint_token(index) for index in range(options['users'])]
+        transport = (
+            HTTPTransport(options['url']) if options['url'] else InProcessTransport(options['host'])
+        )
+        names, weights = zip(*options['mix'].items())
+
+        def run(index):
+            rng = random.Random(f'{options["seed"]}-{index}')
+            name = rng.choices(names, weights)[0]
+            method, path, query, body = ENDPOINTS[name](rng, product_ids, page_count)
+            headers = {'Authorization': f'Bearer {tokens[index % len(tokens)]}'}
+            started = time.perf_counter()
+            status, response_headers = transport.request(method, path, query, body, headers)
+            latency = time.perf_counter() - started
+            match = QUERIES_RE.search(response_headers.get('Server-Timing', ''))
+            return name, {
+                'status': status,
+                'latency': latency,
+                'queries': int(match[1]) if match else None,
+            }
+
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(run, range(-options['warmup'], 0)))
+            started = time.perf_counter()
+            samples = list(executor.map(run, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+        results = self.collect(samples, elapsed)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['baseline']:
+            self.compare(results)
+
+    def seed_products(self, count):
+        existing = set(
+            Product.objects.filter(sku__startswith=SKU_PREFIX).values_list('sku', flat=True)
+        )
+        missing = [
+            Product(
+                sku=f'{SKU_PREFIX}{index:07d}',
+                name=f'Benchmark product {index}',
+                description='Seeded by benchmark_api',
+                price=Decimal(index % 500 + 1),
+                stock=SEED_STOCK,
+            )
+            for index in range(count)
+            if f'{SKU_PREFIX}{index:07d}' not in existing
+        ]
+        Product.objects.bulk_create(missing, batch_size=1000)
+        # Top up what earlier runs sold
+        Product.objects.filter(sku__startswith=SKU_PREFIX).update(stock=SEED_STOCK)
+        bump_catalog_version()
+        return list(
+            Product.objects.filter(sku__startswith=SKU_PREFIX).order_by('sku')
+            .values_list('id', flat=True)[:count]
+        )
+
+    def mint_token(self, index):
+        user, _ = User.objects.get_or_create(username=f'benchmark-{index}')
+        return str(RefreshToken.for_user(user).access_token)
+
+    def collect(self, samples, elapsed):
+        by_endpoint = {}
+        for name, sample in samples:
+            by_endpoint.setdefault(name, []).append(sample)
+        options = {
+            name: self.options[name]
+            for name in ['url', 'products', 'users', 'requests', 'warmup', 'concurrency', 'seed']
+        }
+        return {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'options': {**options, 'mix': self.options['mix']},
+            'total': summarize([sample for _, sample in samples], elapsed),
+            'endpoints': {
+                name: summarize(by_endpoint[name], elapsed) for name in sorted(by_endpoint)
+            },
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"endpoint":<16}{"requests":>9}{"errors":>8}{"req/s":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        for name, row in [*results['endpoints'].items(), ('total', results['total'])]:
+            queries = '-' if row['queries_per_request'] is None else row['queries_per_request']
+            self.stdout.write(
+                f'{name:<16}{row["requests"]:>9}{row["errors"]:>8}{row["rps"]:>9}'
+                f'{row["p50_ms"]:>9}{row["p95_ms"]:>9}{row["p99_ms"]:>9}{queries:>9}'
+            )
+
+    def compare(self, results):
+        with open(self.options['baseline']) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, self.options['threshold'] / 100)
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'{len(regressions)} regression(s) against {self.options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {self.options["baseline"]}'))
@@ -0,0 +1,188 @@
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import RefreshToken
+
+ENDPOINTS = {
+    'products': ('/api/products/', '/api/async/products/'),
+    'orders': ('/api/orders/', '/api/async/orders/'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrency and memory of the WSGI and ASGI read paths in-process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoint', nargs='?', choices=list(ENDPOINTS), default='products')
+        parser.add_argument('--query', default='', help='Query string, e.g. "page_size=50"')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight')
+        parser.add_argument('--db-latency', type=float, default=0.0,
+                            help='Milliseconds added to every query to simulate a slow database')
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor == 'sqlite' and options['concurrency'] > 1:
+            raise CommandError('SQLite serializes connections, run against PostgreSQL')
+        user, _ = User.objects.get_or_create(username='benchmark')
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.options = options
+
+        latency = options['db_latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # Wrappers outlive reconnects of the same connection object
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        if latency:
+            connection_created.connect(add_latency)
+            connections.close_all()
+
+        wsgi_path, asgi_path = ENDPOINTS[options['endpoint']]
+        try:
+            for label, run in [('wsgi', lambda: self.run_wsgi(wsgi_path)),
+                               ('asgi', lambda: asyncio.run(self.run_asgi(asgi_path)))]:
+                self.report(label, *self.measure(run))
+        finally:
+            connection_created.disconnect(add_latency)
+
+    def measure(self, run):
+        peak_threads = threading.active_count()
+        stop = threading.Event()
+
+        def sample():
+            nonlocal peak_threads
+            while not stop.wait(0.01):
+                peak_threads = max(peak_threads, threading.active_count())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            latencies = run()
+        finally:
+            elapsed = time.perf_counter() - started
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            stop.set()
+            sampler.join()
+        return latencies, elapsed, peak_memory, peak_threads
+
+    def report(self, label, latencies, elapsed, peak_memory, peak_threads):
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:,.0f} req/s, '
+            f'p50 {quantiles[49] * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms, '
+            f'{peak_threads} threads, '
+            f'{peak_memory / self.options["concurrency"] / 1024:,.0f} KiB per in-flight request'
+        )
+
+    def query(self, index):
+        # A distinct URL per request keeps the product response cache out of the comparison
+        return '&'.join(filter(None, [self.options['query'], f'_={index}']))
+
+    def check_status(self, status, body):
+        if status != 200:
+            raise CommandError(f'Request failed with {status}: {body[:200]!r}')
+
+    def run_wsgi(self, path):
+        handler = WSGIHandler()
+        host = self.options['host']
+
+        def request(index):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': self.query(index),
+                'SERVER_NAME': host,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': host,
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+                'wsgi.version': (1, 0),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            body = b''.join(response)
+            response.close()
+            self.check_status(int(statuses[0].split()[0]), body)
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(self.options['concurrency']) as executor:
+            return list(executor.map(request, range(self.options['requests'])))
+
+    async def run_asgi(self, path):
+        handler = ASGIHandler()
+        host = self.options['host']
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', host.encode()),
+                (b'authorization', f'Bearer {self.token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (host, 80),
+        }
+        in_flight = asyncio.Semaphore(self.options['concurrency'])
+
+        async def request(index):
+            messages = []
+            requested, finished = False, asyncio.Event()
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Django listens for a disconnect while the view runs
+                await finished.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if message['type'] == 'http.response.body' and not message.get('more_body'):
+                    finished.set()
+
+            async with in_flight:
+                started = time.perf_counter()
+                await handler({**scope, 'query_string': self.query(index).encode()}, receive, send)
+                elapsed = time.perf_counter() - started
+            self.check_status(
+                messages[0]['status'],
+                b''.join(message.get('body', b'') for message in messages[1:]),
+            )
+            return elapsed
+
+        return await asyncio.gather(*[request(index) for index in range(self.options['requests'])])
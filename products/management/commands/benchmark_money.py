@@ -0,0 +1,75 @@
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from products.money import Money
+from products.serializers import MoneyField
+
+
+class Command(BaseCommand):
+    help = 'Compare Decimal and integer minor-unit Money for price serialization and order totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prices', type=int, default=10000, help='Prices per round')
+        parser.add_argument('--items', type=int, default=20, help='Line items per order total')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options['prices'], options['items'], options['iterations']) < 1:
+            raise CommandError('--prices, --items and --iterations must be at least 1')
+        rng = random.Random(options['seed'])
+        cents = [rng.randint(1, 10 ** 8 - 1) for _ in range(options['prices'])]
+        quantities = [rng.randint(1, 5) for _ in cents]
+        decimals = [Decimal(value).scaleb(-2) for value in cents]
+        amounts = [Money(value) for value in cents]
+        items = options['items']
+        decimal_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+        money_field = MoneyField(max_digits=10)
+
+        def serialize_decimals():
+            return [decimal_field.to_representation(value) for value in decimals]
+
+        def serialize_money():
+            return [money_field.to_representation(value) for value in amounts]
+
+        def total_decimals():
+            return [
+                str(sum(
+                    price * quantity
+                    for price, quantity in zip(decimals[start:start + items], quantities[start:start + items])
+                ).quantize(Decimal('0.01')))
+                for start in range(0, len(decimals), items)
+            ]
+
+        def total_money():
+            return [
+                str(Money(sum(
+                    price.minor * quantity
+                    for price, quantity in zip(amounts[start:start + items], quantities[start:start + items])
+                )))
+                for start in range(0, len(amounts), items)
+            ]
+
+        self.stdout.write(f'{len(cents)} prices, {items} items per order, '
+                          f'{options["iterations"]} iterations')
+        for label, decimal_path, money_path in [
+            ('serialization', serialize_decimals, serialize_money),
+            ('order totals', total_decimals, total_money),
+        ]:
+            if decimal_path() != money_path():
+                raise CommandError(f'{label}: Money output differs from the Decimal output')
+            rates = [self.measure(func, len(cents), options['iterations'])
+                     for func in (decimal_path, money_path)]
+            self.stdout.write(
+                f'{label:>14}: Decimal {rates[0]:>12,.0f}/s  Money {rates[1]:>12,.0f}/s  '
+                f'speed-up {rates[1] / rates[0]:.1f}x'
+            )
+
+    def measure(self, func, count, iterations):
+        func()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return count * iterations / (time.perf_counter() - started)
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from products.fastpath import FastJSONRenderer, compile_serializer, orjson
+from products.inventory import with_available_stock
+from products.models import Product
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare product list serialization throughput of the serializer and fast paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Products per simulated page')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        items, iterations = options['items'], options['iterations']
+        queryset = with_available_stock(Product.objects.order_by('id'))[:items]
+        if queryset.count() < items:
+            raise CommandError(f'Need at least {items} products, run populate_db first')
+        plan = compile_serializer(ProductSerializer())
+
+        def serializer_path():
+            return JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(
+                plan.to_representation(queryset.values_list(*plan.sources))
+            )
+
+        if serializer_path() != fast_path():
+            raise CommandError('Fast path output differs from the serializer output')
+
+        self.stdout.write(f'{items} items per page, {iterations} iterations, '
+                          f'orjson {"enabled" if orjson else "not installed"}')
+        results = {}
+        for label, func in [('serializer', serializer_path), ('fast path', fast_path)]:
+            func()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = time.perf_counter() - started
+            results[label] = items * iterations / elapsed
+            self.stdout.write(f'{label:>12}: {results[label]:>12,.0f} items/s')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Speed-up: {results["fast path"] / results["serializer"]:.1f}x'
+        ))
@@ -0,0 +1,93 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class Command(BaseCommand):
+    help = 'Measure gunicorn startup time and first-request latency with and without worker warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/products/', help='Path requested by each run')
+        parser.add_argument('--runs', type=int, default=3, help='Server starts per mode')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Requests after the first one, for the steady-state latency')
+        parser.add_argument('--boot-wait', type=float, default=3.0,
+                            help='Seconds between the socket opening and the first request')
+        parser.add_argument('--host', default='localhost', help='Must be in ALLOWED_HOSTS')
+
+    def handle(self, *args, **options):
+        if min(options['runs'], options['requests']) < 1:
+            raise CommandError('--runs and --requests must be at least 1')
+        user, _ = User.objects.get_or_create(username='benchmark')
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.options = options
+
+        self.stdout.write(f'GET {options["path"]}, {options["runs"]} runs per mode, one worker')
+        for label, warm_up in [('cold', '0'), ('warm-up', '1')]:
+            runs = [self.run(warm_up) for _ in range(options['runs'])]
+            listening, first, steady = (statistics.median(values) for values in zip(*runs))
+            self.stdout.write(
+                f'{label:>8}: listening {listening:7.0f} ms  first request {first:7.1f} ms  '
+                f'later requests p50 {steady:6.1f} ms'
+            )
+
+    def run(self, warm_up):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        env = {
+            **os.environ,
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': '1',
+            'GUNICORN_WARMUP': warm_up,
+        }
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            listening = self.wait_for_socket(port, server) - started
+            time.sleep(self.options['boot_wait'])
+            url = f'http://127.0.0.1:{port}{self.options["path"]}'
+            first = self.request(url)
+            steady = statistics.median(self.request(url) for _ in range(self.options['requests']))
+        finally:
+            server.terminate()
+            server.wait()
+        return listening * 1000, first, steady
+
+    def wait_for_socket(self, port, server):
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return time.perf_counter()
+            except OSError:
+                time.sleep(0.005)
+        raise CommandError('gunicorn did not open its socket within 30 seconds')
+
+    def request(self, url):
+        request = urllib.request.Request(url, headers={
+            'Host': self.options['host'],
+            'Authorization': f'Bearer {self.token}',
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except urllib.error.HTTPError as error:
+            raise CommandError(f'{url} answered {error.code}')
+        return (time.perf_counter() - started) * 1000
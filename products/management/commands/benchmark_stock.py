@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework import serializers
+from products.inventory import reshard_stock, with_available_stock
+from products.models import Product, Order
+from products.services import place_order
+
+
+class Command(BaseCommand):
+    help = 'Measure order throughput on a single hot product with and without stock shards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000, help='Orders placed per run')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent order placers')
+        parser.add_argument('--shards', type=int, nargs='+', default=[0, 16],
+                            help='Shard counts to compare, 0 is the plain stock column')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and options['threads'] > 1:
+            raise CommandError('SQLite serializes every writer, use --threads 1 or PostgreSQL')
+        results = {}
+        for shards in options['shards']:
+            results[shards] = self.run(shards, options['orders'], options['threads'])
+            self.stdout.write(f'{shards:>4} shards: {results[shards]:>10,.0f} orders/s')
+
+        baseline = results[options['shards'][0]]
+        for shards in options['shards'][1:]:
+            self.stdout.write(self.style.SUCCESS(
+                f'{shards} shards vs {options["shards"][0]}: {results[shards] / baseline:.1f}x'
+            ))
+
+    def run(self, shards, orders, threads):
+        product = Product.objects.create(
+            name='Benchmark hot product', description='', price=Decimal('1.00'), stock=orders
+        )
+        reshard_stock(product.pk, shards)
+        items = [{'product_id': product.pk, 'quantity': 1}]
+
+        def place(count):
+            placed = []
+            try:
+                for _ in range(count):
+                    try:
+                        placed.append(place_order(items).pk)
+                    except serializers.ValidationError:
+                        pass
+            finally:
+                connections.close_all()
+            return placed
+
+        per_thread = [orders // threads + (i < orders % threads) for i in range(threads)]
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(threads) as executor:
+                order_ids = [pk for placed in executor.map(place, per_thread) for pk in placed]
+            elapsed = time.perf_counter() - started
+
+            remaining = with_available_stock(Product.objects.filter(pk=product.pk)).values_list(
+                'available_stock', flat=True
+            ).get()
+            if remaining != orders - len(order_ids):
+                raise CommandError(
+                    f'Stock is {remaining} after {len(order_ids)} of {orders} orders'
+                )
+            return len(order_ids) / elapsed
+        finally:
+            Order.objects.filter(items__product=product).delete()
+            product.delete()
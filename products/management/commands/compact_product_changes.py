@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from products.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Drop old catalog change feed entries superseded by a later change, e.g. from a periodic job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.CHANGE_FEED_RETENTION,
+                            help='Only compact entries older than this many seconds')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Entries examined per statement, keeping row locks short')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['older_than'] < 0:
+            raise CommandError('--batch-size must be at least 1 and --older-than not negative')
+        deleted = compact_changes(options['older_than'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} superseded change feed entries'))
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from products.exporters import export_stream
+from products.importers import CSV, NDJSON
+
+
+class Command(BaseCommand):
+    help = 'Stream the product catalog or the order history to NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['products', 'orders'])
+        parser.add_argument('--format', choices=[NDJSON, CSV], default=NDJSON)
+        parser.add_argument('--output', default='-', help='File to write, "-" writes standard output')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        chunks = export_stream(options['kind'], options['format'], options['chunk_size'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        try:
+            with open(options['output'], 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except OSError as exc:
+            raise CommandError(exc)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']}"))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from products.importers import CSV, NDJSON, ProductImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream products from an NDJSON or CSV file into the catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, "-" reads standard input')
+        parser.add_argument('--format', choices=[NDJSON, CSV],
+                            help='Input format, guessed from the file extension by default')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Update products whose sku already exists instead of rejecting them')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        fmt = options['format']
+        if fmt is None:
+            fmt = CSV if options['path'].endswith('.csv') else NDJSON
+
+        importer = ProductImporter(upsert=options['upsert'], chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            report = importer.run(read_rows(sys.stdin.buffer, fmt))
+        else:
+            try:
+                with open(options['path'], 'rb') as f:
+                    report = importer.run(read_rows(f, fmt))
+            except OSError as exc:
+                raise CommandError(exc)
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if report['errors_truncated']:
+            self.stderr.write(f"... {report['failed'] - len(report['errors'])} more errors")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} of {report['rows']} rows ({report['failed']} failed)"
+        ))
@@ -1,112 +1,246 @@
 # products/management/commands/populate_db.py
+import os
 import random
-from decimal import Decimal
+import time
+from array import array
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from products.bulk import deferred_indexes, insert_rows
+from products.cache import bump_catalog_version
 from products.models import Product, Order, OrderItem
+from products.money import Money
+from products.sales import rebuild_sales_rollups
 from faker import Faker
 
+PRODUCT_CATEGORIES = ['Electronics', 'Books', 'Clothing', 'Home & Garden', 'Sports']
+
+
+def generate_product_name(fake, category):
+    adjectives = ['Premium', 'Deluxe', 'Essential', 'Classic', 'Modern', 'Pro', 'Elite', 'Basic']
+    product_types = {
+        'Electronics': ['Laptop', 'Smartphone', 'Headphones', 'Tablet', 'Smart Watch', 'Camera', 'Speaker',
+                        'Monitor'],
+        'Books': ['Novel', 'Textbook', 'Biography', 'Cookbook', 'Magazine', 'Comic Book', 'Guide', 'Journal'],
+        'Clothing': ['T-Shirt', 'Jeans', 'Jacket', 'Dress', 'Shoes', 'Hat', 'Socks', 'Sweater'],
+        'Home & Garden': ['Chair', 'Lamp', 'Rug', 'Plant Pot', 'Cushion', 'Vase', 'Clock', 'Mirror'],
+        'Sports': ['Ball', 'Racket', 'Shoes', 'Bag', 'Mat', 'Gloves', 'Helmet', 'Water Bottle']
+    }
+
+    adjective = random.choice(adjectives)
+    product_type = random.choice(product_types[category])
+    brand = fake.company()
+
+    return f"{brand} {adjective} {product_type}"
+
+
+def generate_product_description(fake, name, category):
+    features = {
+        'Electronics': ['wireless', 'rechargeable', 'smart', 'HD', '4K', 'bluetooth', 'portable'],
+        'Books': ['hardcover', 'illustrated', 'bestseller', 'award-winning', 'comprehensive'],
+        'Clothing': ['comfortable', 'durable', 'stylish', 'waterproof', 'breathable'],
+        'Home & Garden': ['decorative', 'handmade', 'modern', 'vintage', 'eco-friendly'],
+        'Sports': ['professional', 'lightweight', 'durable', 'high-performance', 'comfort-grip']
+    }
+
+    category_features = features[category]
+    selected_features = random.sample(category_features, min(3, len(category_features)))
+
+    description = f"{name}. {fake.sentence()}\n\n"
+    description += "Key Features:\n"
+    for feature in selected_features:
+        description += f"- {feature.capitalize()}: {fake.sentence()}\n"
+
+    description += f"\nMaterial: {fake.word()}\n"
+    description += f"Made in: {fake.country()}"
+
+    return description
+
+
+# Per-process state for pool workers, set once by _init_worker
+_fake = None
+_product_ids = None
+_product_prices = None
+
+
+def _init_worker(product_ids=None, product_prices=None):
+    global _fake, _product_ids, _product_prices
+    _fake = Faker()
+    _product_ids = product_ids
+    _product_prices = product_prices
+
+
+def _seed_chunk(seed, index):
+    # Every chunk gets its own seed so output does not depend on scheduling
+    chunk_seed = None if seed is None else seed * 1_000_003 + index
+    random.seed(chunk_seed)
+    if chunk_seed is not None:
+        _fake.seed_instance(chunk_seed)
+
+
+def generate_products(task):
+    seed, index, count = task
+    _seed_chunk(seed, index)
+    rows = []
+    for _ in range(count):
+        category = random.choice(PRODUCT_CATEGORIES)
+        name = generate_product_name(_fake, category)
+        rows.append((
+            name,
+            generate_product_description(_fake, name, category),
+            Money(random.randint(1000, 100000)),
+            random.randint(5, 100),
+        ))
+    return rows
+
+
+def generate_orders(task):
+    seed, index, count, max_items = task
+    _seed_chunk(seed, index)
+    orders = []
+    for _ in range(count):
+        num_items = min(random.randint(1, max_items), len(_product_ids))
+        items = []
+        total_cents = 0
+        for position in random.sample(range(len(_product_ids)), num_items):
+            quantity = random.randint(1, 3)
+            price_cents = _product_prices[position]
+            total_cents += price_cents * quantity
+            items.append((_product_ids[position], quantity, price_cents))
+        orders.append((random.choice(['pending', 'completed']), total_cents, items))
+    return orders
+
 
 class Command(BaseCommand):
     help = 'Populate database with sample data'
 
-    def generate_product_name(self, fake, category):
-        adjectives = ['Premium', 'Deluxe', 'Essential', 'Classic', 'Modern', 'Pro', 'Elite', 'Basic']
-        product_types = {
-            'Electronics': ['Laptop', 'Smartphone', 'Headphones', 'Tablet', 'Smart Watch', 'Camera', 'Speaker',
-                            'Monitor'],
-            'Books': ['Novel', 'Textbook', 'Biography', 'Cookbook', 'Magazine', 'Comic Book', 'Guide', 'Journal'],
-            'Clothing': ['T-Shirt', 'Jeans', 'Jacket', 'Dress', 'Shoes', 'Hat', 'Socks', 'Sweater'],
-            'Home & Garden': ['Chair', 'Lamp', 'Rug', 'Plant Pot', 'Cushion', 'Vase', 'Clock', 'Mirror'],
-            'Sports': ['Ball', 'Racket', 'Shoes', 'Bag', 'Mat', 'Gloves', 'Helmet', 'Water Bottle']
-        }
-
-        adjective = random.choice(adjectives)
-        product_type = random.choice(product_types[category])
-        brand = fake.company()
-
-        return f"{brand} {adjective} {product_type}"
-
-    def generate_product_description(self, fake, name, category):
-        features = {
-            'Electronics': ['wireless', 'rechargeable', 'smart', 'HD', '4K', 'bluetooth', 'portable'],
-            'Books': ['hardcover', 'illustrated', 'bestseller', 'award-winning', 'comprehensive'],
-            'Clothing': ['comfortable', 'durable', 'stylish', 'waterproof', 'breathable'],
-            'Home & Garden': ['decorative', 'handmade', 'modern', 'vintage', 'eco-friendly'],
-            'Sports': ['professional', 'lightweight', 'durable', 'high-performance', 'comfort-grip']
-        }
-
-        category_features = features[category]
-        selected_features = random.sample(category_features, min(3, len(category_features)))
-
-        description = f"{name}. {fake.sentence()}\n\n"
-        description += "Key Features:\n"
-        for feature in selected_features:
-            description += f"- {feature.capitalize()}: {fake.sentence()}\n"
-
-        description += f"\nMaterial: {fake.word()}\n"
-        description += f"Made in: {fake.country()}"
-
-        return description
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50, help='Number of products to create')
+        parser.add_argument('--orders', type=int, default=50, help='Number of orders to create')
+        parser.add_argument('--max-items', type=int, default=5, help='Maximum line items per order')
+        parser.add_argument('--seed', type=int, help='Seed for reproducible data')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Generator processes, 1 generates in-process')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows generated and inserted per batch')
+        parser.add_argument('--defer-indexes', action='store_true',
+                            help='Drop secondary indexes during the load and rebuild them afterwards (PostgreSQL)')
+        parser.add_argument('--progress-interval', type=float, default=5.0,
+                            help='Minimum seconds between progress lines')
 
     def handle(self, *args, **options):
-        fake = Faker()
+        self.options = options
 
         # Create superuser if it doesn't exist
         if not User.objects.filter(username='admin').exists():
             User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
             self.stdout.write(self.style.SUCCESS('Superuser created'))
 
-        # Create products
-        products = []
-        product_categories = ['Electronics', 'Books', 'Clothing', 'Home & Garden', 'Sports']
-
-        for _ in range(50):
-            category = random.choice(product_categories)
-            name = self.generate_product_name(fake, category)
-            description = self.generate_product_description(fake, name, category)
-
-            product = Product.objects.create(
-                name=name,
-                description=description,
-                price=Decimal(random.uniform(10.0, 1000.0)).quantize(Decimal('0.01')),
-                stock=random.randint(5, 100)
-            )
-            products.append(product)
-            self.stdout.write(f'Created product: {product.name}')
-
-        # Create orders
-        for _ in range(50):
-            # Create order
-            order = Order.objects.create(
-                total_price=Decimal('0.00'),
-                status=random.choice(['pending', 'completed'])
-            )
-
-            # Add random products to order
-            num_items = random.randint(1, 5)
-            total_price = Decimal('0.00')
-
-            # Make sure we don't try to sample more items than available
-            num_items = min(num_items, len(products))
-            selected_products = random.sample(products, num_items)
+        with deferred_indexes(Product, Order, OrderItem) if options['defer_indexes'] else nullcontext():
+            if options['products']:
+                self.create_products()
+            if options['orders']:
+                self.create_orders()
+        bump_catalog_version()
+        if options['orders']:
+            # Orders are inserted directly, bypassing the incremental rollups
+            rebuild_sales_rollups()
 
-            for product in selected_products:
-                quantity = random.randint(1, 3)
-                price = product.price * quantity
-                total_price += price
+        self.stdout.write(self.style.SUCCESS('Successfully populated database'))
 
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=quantity,
-                    price=product.price
+    def tasks(self, total, *extra):
+        chunk_size = self.options['chunk_size']
+        for index, start in enumerate(range(0, total, chunk_size)):
+            yield (self.options['seed'], index, min(chunk_size, total - start), *extra)
+
+    def run(self, func, tasks, initargs=()):
+        """Yield ``func(task)`` results in task order, keeping few chunks in flight."""
+        workers = self.options['workers']
+        if workers <= 1:
+            _init_worker(*initargs)
+            for task in tasks:
+                yield func(task)
+            return
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(func, task))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def create_products(self):
+        total = self.options['products']
+        progress = Progress(self, 'products', total, self.options['progress_interval'])
+        fields = ['name', 'description', 'price', 'stock', 'created_at', 'updated_at']
+        for rows in self.run(generate_products, self.tasks(total)):
+            now = timezone.now()
+            with transaction.atomic():
+                insert_rows(Product, fields, [row + (now, now) for row in rows],
+                            batch_size=self.options['chunk_size'])
+            progress.advance(len(rows))
+        progress.done()
+
+    def create_orders(self):
+        # Compact id/price columns keep memory small even for millions of products
+        product_ids, product_prices = array('q'), array('q')
+        for product_id, price in Product.objects.values_list('id', 'price').iterator(chunk_size=10000):
+            product_ids.append(product_id)
+            product_prices.append(price.minor)
+        if not product_ids:
+            self.stdout.write(self.style.WARNING('No products available, skipping orders'))
+            return
+
+        total = self.options['orders']
+        progress = Progress(self, 'orders', total, self.options['progress_interval'])
+        tasks = self.tasks(total, self.options['max_items'])
+        for orders in self.run(generate_orders, tasks, initargs=(product_ids, product_prices)):
+            with transaction.atomic():
+                created = Order.objects.bulk_create(
+                    [Order(status=status, total_price=Money(total_cents))
+                     for status, total_cents, _ in orders],
+                    batch_size=self.options['chunk_size'],
                 )
+                insert_rows(
+                    OrderItem,
+                    ['order_id', 'product_id', 'quantity', 'price'],
+                    [
+                        (order.pk, product_id, quantity, Money(price_cents))
+                        for order, (_, _, items) in zip(created, orders)
+                        for product_id, quantity, price_cents in items
+                    ],
+                    batch_size=self.options['chunk_size'],
+                )
+            progress.advance(len(orders))
+        progress.done()
+
+
+class Progress:
+    """Report progress at most once every ``interval`` seconds."""
+
+    def __init__(self, command, label, total, interval):
+        self.command = command
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.count = 0
+        self.started = self.reported = time.monotonic()
+
+    def advance(self, count):
+        self.count += count
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            rate = self.count / (now - self.started)
+            self.command.stdout.write(
+                f'Created {self.count}/{self.total} {self.label} ({rate:.0f}/s)'
+            )
 
-            # Update order total price
-            order.total_price = total_price
-            order.save()
-
-            self.stdout.write(f'Created order: {order.id} with {num_items} items')
-
-        self.stdout.write(self.style.SUCCESS('Successfully populated database'))
+    def done(self):
+        elapsed = time.monotonic() - self.started
+        self.command.stdout.write(f'Created {self.count} {self.label} in {elapsed:.1f}s')
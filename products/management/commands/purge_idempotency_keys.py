@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired order idempotency keys, e.g. from a periodic job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Keys deleted per statement, keeping row locks short')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        deleted = purge_expired_keys(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
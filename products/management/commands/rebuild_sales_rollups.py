@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.sales import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily sales rollups from the order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Orders aggregated and committed per transaction')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        def progress(done, total):
+            self.stdout.write(f'{done:,}/{total:,} orders')
+
+        rebuild_sales_rollups(options['chunk_size'], progress)
+        self.stdout.write(self.style.SUCCESS('Rebuilt the sales rollups'))
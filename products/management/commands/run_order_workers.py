@@ -0,0 +1,79 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from products.intake import run_worker
+
+
+def _work(batch_size, poll_interval, drain):
+    """Run a worker that finishes its current group on SIGTERM or SIGINT, then returns."""
+    stop = threading.Event()
+    handlers = {
+        signum: signal.signal(signum, lambda *args: stop.set())
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        return run_worker(batch_size, poll_interval, stop.is_set, drain)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+
+def _worker_process(*args):
+    try:
+        _work(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Place orders queued by the asynchronous intake mode (ORDER_INTAKE=async)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Orders claimed and committed together')
+        parser.add_argument('--poll-interval', type=float, default=0.1,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--drain', action='store_true',
+                            help='Exit once the queue is empty instead of waiting for more orders')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--processes and --batch-size must be at least 1')
+        if connection.vendor == 'sqlite' and options['processes'] > 1:
+            raise CommandError('SQLite serializes every writer, use --processes 1 or PostgreSQL')
+        worker_args = (options['batch_size'], options['poll_interval'], options['drain'])
+
+        if options['processes'] == 1:
+            processed = _work(*worker_args)
+            self.stdout.write(f'Processed {processed} orders')
+            return
+
+        # Children must open their own connections
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_worker_process, args=worker_args, daemon=True)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} order workers')
+
+        def stop(*args):
+            # Workers finish their current group before exiting
+            for worker in workers:
+                worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop()
+            for worker in workers:
+                worker.join()
+        if any(worker.exitcode for worker in workers):
+            raise CommandError('An order worker failed')
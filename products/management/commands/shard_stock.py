@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.inventory import reshard_stock
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Split a hot product\'s stock across shard rows, or fold it back with --shards 0'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='+', type=int)
+        parser.add_argument('--shards', type=int, default=16,
+                            help='Shard rows per product, 0 turns sharding off')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['shards'] <= 1024:
+            raise CommandError('--shards must be between 0 and 1024')
+        for product_id in options['product_ids']:
+            try:
+                product = reshard_stock(product_id, options['shards'])
+            except Product.DoesNotExist:
+                raise CommandError(f'Product {product_id} does not exist')
+            self.stdout.write(self.style.SUCCESS(
+                f'{product.name}: {options["shards"]} shards'
+            ))
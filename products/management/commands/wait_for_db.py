@@ -1,18 +1,36 @@
 import time
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Seconds to keep trying before giving up')
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help='Seconds before the first retry, doubled after every failure')
+        parser.add_argument('--max-interval', type=float, default=5)
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        interval = options['interval']
+        while True:
             try:
-                db_conn = connections['default']
-                self.stdout.write(self.style.SUCCESS('Database available!'))
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                # Opening the connection is what proves the server accepts us
+                connection.ensure_connection()
+                break
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(f'Database unavailable after {options["timeout"]:g} seconds: {error}')
+                delay = min(interval, remaining)
+                self.stdout.write(f'Database unavailable, waiting {delay:.1f} seconds...')
+                time.sleep(delay)
+                interval = min(interval * 2, options['max_interval'])
+        connection.close()
+        self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,196 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What a single request spent its time on, filled in while it runs."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+    @property
+    def view(self):
+        # Resolved by the handler after the middleware has started collecting
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def server_timing(self, duration, response_size=None):
+        """``Server-Timing`` header value; durations are in milliseconds."""
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ]
+        if response_size is not None:
+            entries.append(f'response;desc="{response_size} bytes"')
+        return ', '.join(entries)
+
+
+@contextmanager
+def collect(request=None):
+    """Record the queries and serialization of the block in a new ``RequestMetrics``."""
+    metrics = RequestMetrics(request)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed_serialization():
+    """Count the block as serialization time of the current request, if any."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper feeding the current request's query count and time."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += elapsed
+        if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning(
+                'Slow query in %s (%.1f ms): %s',
+                metrics.view or 'unknown view', elapsed * 1000, sql[:1000],
+            )
+
+
+def instrument_connection(connection):
+    # Persistent connections are reopened on the same wrapper object
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class _RouteStats:
+    __slots__ = ('buckets', 'count', 'duration', 'queries', 'db_time', 'serialize_time',
+                 'response_bytes')
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.response_bytes = 0
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """
+    Per-route latency histograms and totals, rendered in the Prometheus text format.
+
+    Each process aggregates its own requests, so every worker is a separate
+    scrape target. Collectors added with ``add_collector`` contribute lines
+    computed at scrape time, e.g. from the database.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._responses = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def add_collector(self, collector):
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def observe(self, view, method, status, duration, metrics, response_size=None):
+        with self._lock:
+            stats = self._routes.get((view, method))
+            if stats is None:
+                stats = self._routes[(view, method)] = _RouteStats()
+            # Buckets are stored non-cumulatively and summed up when rendered
+            index = bisect.bisect_left(LATENCY_BUCKETS, duration)
+            if index < len(LATENCY_BUCKETS):
+                stats.buckets[index] += 1
+            stats.count += 1
+            stats.duration += duration
+            stats.queries += metrics.queries
+            stats.db_time += metrics.db_time
+            stats.serialize_time += metrics.serialize_time
+            stats.response_bytes += response_size or 0
+            key = (view, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+            self._responses.clear()
+
+    def render(self):
+        with self._lock:
+            text = self._render(sorted(self._routes.items()), sorted(self._responses.items()))
+        return text + ''.join(f'{line}\n' for collector in self._collectors for line in collector())
+
+    def _render(self, routes, responses):
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by view.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (view, method), stats in routes:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                labels = _labels(view=view, method=method, le=bound)
+                lines.append(f'http_request_duration_seconds_bucket{labels} {cumulative}')
+            labels = _labels(view=view, method=method, le='+Inf')
+            lines.append(f'http_request_duration_seconds_bucket{labels} {stats.count}')
+            labels = _labels(view=view, method=method)
+            lines.append(f'http_request_duration_seconds_sum{labels} {stats.duration}')
+            lines.append(f'http_request_duration_seconds_count{labels} {stats.count}')
+
+        for name, attribute, help_text in [
+            ('http_request_db_queries_total', 'queries', 'Database queries run by requests.'),
+            ('http_request_db_seconds_total', 'db_time', 'Time requests spent in the database.'),
+            ('http_request_serialize_seconds_total', 'serialize_time',
+             'Time requests spent serializing and rendering responses.'),
+            ('http_response_size_bytes_total', 'response_bytes', 'Size of non-streaming responses.'),
+        ]:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (view, method), stats in routes:
+                lines.append(f'{name}{_labels(view=view, method=method)} {getattr(stats, attribute)}')
+
+        lines.append('# HELP http_responses_total Responses by view and status code.')
+        lines.append('# TYPE http_responses_total counter')
+        for (view, method, status), count in responses:
+            lines.append(f'http_responses_total{_labels(view=view, method=method, status=status)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
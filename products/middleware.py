@@ -0,0 +1,130 @@
+import cProfile
+import logging
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.core.exceptions import MiddlewareNotUsed
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def is_api_request(request):
+    return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+
+class SkipForAPIMixin:
+    """
+    Pass requests under ``settings.API_PATH_PREFIX`` straight through.
+
+    The API authenticates every request with a JWT and never renders
+    templates, so it has no use for sessions, CSRF cookies, the session
+    user or messages. The browser-facing admin keeps the full stack.
+    """
+
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_api_request(request) or not hasattr(super(), 'process_view'):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class SessionMiddleware(SkipForAPIMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForAPIMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(SkipForAPIMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipForAPIMixin, messages.MessageMiddleware):
+    pass
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request and add it to ``metrics.registry``.
+
+    Query count and time come from ``metrics.record_query``, serialization
+    time from the serializers and the JSON renderer. Each response carries the
+    numbers in a ``Server-Timing`` header. A ``PROFILE_SAMPLE_RATE`` share of
+    WSGI requests runs under cProfile, and the profiles of those slower than
+    ``PROFILE_SLOW_MS`` are written to ``PROFILE_DIR``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profiler = self.start_profiler()
+        started = time.perf_counter()
+        try:
+            with metrics.collect(request) as collected:
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        duration = time.perf_counter() - started
+        if profiler is not None and duration * 1000 >= settings.PROFILE_SLOW_MS:
+            self.dump_profile(profiler, collected)
+        return self.finish(request, response, collected, duration)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with metrics.collect(request) as collected:
+            response = await self.get_response(request)
+        return self.finish(request, response, collected, time.perf_counter() - started)
+
+    def finish(self, request, response, collected, duration):
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = collected.server_timing(duration, size)
+        metrics.registry.observe(
+            collected.view or 'unmatched', request.method, response.status_code,
+            duration, collected, size,
+        )
+        return response
+
+    def start_profiler(self):
+        if random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running
+            return None
+        return profiler
+
+    def dump_profile(self, profiler, collected):
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(
+            settings.PROFILE_DIR,
+            f'{collected.view or "unmatched"}-{time.time_ns()}-{os.getpid()}.prof'.replace(':', '_'),
+        )
+        profiler.dump_stats(path)
+        logger.info('Profiled slow request to %s: %s', collected.view, path)
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:05
+
+import django.contrib.postgres.search
+from django.db import migrations
+from products.search import install_search, uninstall_search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
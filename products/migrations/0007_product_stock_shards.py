@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:16
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from products.search import install_search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProductStockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('stock', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='products.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productstockshard',
+            constraint=models.UniqueConstraint(fields=('product', 'shard'), name='product_stock_shard_unique'),
+        ),
+        # SQLite rebuilds products_product for the new column, dropping the search triggers
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:42
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed')], max_length=10)),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'status'], name='product_sales_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productsalesdaily',
+            constraint=models.UniqueConstraint(fields=('product', 'day', 'status', 'shard'), name='product_sales_daily_unique'),
+        ),
+    ]
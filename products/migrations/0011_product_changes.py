@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_order_intake_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(default=0)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('stock', 'Stock'), ('deleted', 'Deleted')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='product_change_position_idx'), models.Index(fields=['product', 'txid', 'id'], name='product_change_product_idx'), models.Index(fields=['created_at'], name='product_change_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:59
+
+import django.core.validators
+import products.money
+from decimal import Decimal
+from django.db import migrations
+
+# (model, field, max_digits of the former DecimalField)
+MONEY_COLUMNS = [
+    ('order', 'total_price', 10),
+    ('orderitem', 'price', 10),
+    ('product', 'price', 10),
+    ('productsalesdaily', 'revenue', 14),
+]
+
+
+def _columns(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for model_name, field_name, max_digits in MONEY_COLUMNS:
+        model = apps.get_model('products', model_name)
+        column = quote(model._meta.get_field(field_name).column)
+        yield quote(model._meta.db_table), column, max_digits
+
+
+def to_minor_units(apps, schema_editor):
+    for table, column, _ in _columns(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bigint "
+                f"USING round({column} * 100)::bigint"
+            )
+        else:
+            # SQLite keeps numbers of any declared type, so only the values change
+            schema_editor.execute(f"UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER)")
+
+
+def to_major_units(apps, schema_editor):
+    for table, column, max_digits in _columns(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE numeric({max_digits}, 2) "
+                f"USING {column} / 100.0"
+            )
+        else:
+            schema_editor.execute(f"UPDATE {table} SET {column} = {column} / 100.0")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_changes'),
+    ]
+
+    operations = [
+        # Converted in place rather than through AlterField, which would cast
+        # the amounts without scaling them and rebuild the tables on SQLite
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(to_minor_units, to_major_units),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='order',
+                    name='total_price',
+                    field=products.money.MoneyField(max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name='orderitem',
+                    name='price',
+                    field=products.money.MoneyField(max_digits=10),
+                ),
+                migrations.AlterField(
+                    model_name='product',
+                    name='price',
+                    field=products.money.MoneyField(max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+                ),
+                migrations.AlterField(
+                    model_name='productsalesdaily',
+                    name='revenue',
+                    field=products.money.MoneyField(default=0, max_digits=14),
+                ),
+            ],
+        ),
+    ]
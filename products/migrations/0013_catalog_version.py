@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:20
+
+import time
+
+from django.db import migrations, models
+
+SEQUENCE = 'products_catalog_version_seq'
+
+
+def create_counter(apps, schema_editor):
+    # Starts from the clock so versions never repeat those of a cache that
+    # outlived the database
+    start = time.time_ns()
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'CREATE SEQUENCE {SEQUENCE} START {start}')
+    else:
+        apps.get_model('products', 'CatalogVersion').objects.using(
+            schema_editor.connection.alias
+        ).create(pk=1, version=start)
+
+
+def drop_counter(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_money_minor_units'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(create_counter, drop_counter),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__lte', 0)), fields=['price', 'id'], name='product_no_stock_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__lte', 0)), fields=['created_at', 'id'], name='product_no_stock_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_product_out_of_stock_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderintakejob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_order_intake_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='response_headers',
+            field=models.JSONField(default=dict),
+        ),
+    ]
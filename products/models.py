@@ -1,36 +1,112 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from .money import MoneyField
+
 
 class Product(models.Model):
+    # Supplier stock keeping unit, the natural key used by bulk imports
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     description = models.TextField()
-    price = models.DecimalField(
+    # Integer cents, see products.money
+    price = MoneyField(
         max_digits=10,
-        decimal_places=2,
         validators=[MinValueValidator(Decimal('0.01'))]
     )
     stock = models.IntegerField(validators=[MinValueValidator(0)])
+    # Hot products keep most of their stock in this many ProductStockShard
+    # rows so concurrent orders do not queue on this row, see products.inventory
+    stock_shard_count = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL, see products.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination orderings, see KeysetPagination.orderings
+            models.Index(fields=['created_at', 'id'], name='product_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            # Filters and orderings, see ProductFilterSerializer
+            models.Index(
+                fields=['price', 'id'],
+                name='product_in_stock_price_idx',
+                condition=models.Q(stock__gt=0),
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='product_in_stock_created_idx',
+                condition=models.Q(stock__gt=0),
+            ),
+            models.Index(
+                fields=['price', 'id'],
+                name='product_no_stock_price_idx',
+                condition=models.Q(stock__lte=0),
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='product_no_stock_created_idx',
+                condition=models.Q(stock__lte=0),
+            ),
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Round price to 2 decimal places before saving
-        self.price = Decimal(str(self.price)).quantize(Decimal('0.01'))
-        super().save(*args, **kwargs)
+        # The change feed entry appended on post_save commits with the row
+        using = kwargs.get('using') or router.db_for_write(Product, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class ProductStockShard(models.Model):
+    """One slice of a hot product's stock, see ``Product.stock_shard_count``."""
+    product = models.ForeignKey(
+        Product,
+        related_name='stock_shards',
+        on_delete=models.CASCADE
+    )
+    shard = models.PositiveSmallIntegerField()
+    stock = models.IntegerField(validators=[MinValueValidator(0)])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='product_stock_shard_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.shard}: {self.stock}"
+
+
+class CatalogVersion(models.Model):
+    """
+    Version of the catalog that cached product responses are keyed on.
+
+    Kept in the database so bumps from any process, e.g. order workers and
+    imports, reach every web process. A single row, except on PostgreSQL,
+    where a sequence bumped outside the writing transaction takes its place
+    so concurrent writers never wait on each other. See ``products.cache``.
+    """
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return str(self.version)
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('completed', 'Completed'),
     ]
 
-    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    total_price = MoneyField(max_digits=10)
     status = models.CharField(
         max_length=10,
         choices=STATUS_CHOICES,
@@ -39,10 +115,19 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Order list keyset pagination, optionally narrowed by status,
+            # see OrderFilterSerializer
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        # Round total_price to 2 decimal places before saving
-        self.total_price = Decimal(str(self.total_price)).quantize(Decimal('0.01'))
-        super().save(*args, **kwargs)
+        # A status change moves the order's sales rollups on post_save, with the row
+        using = kwargs.get('using') or router.db_for_write(Order, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Order {self.id} - {self.status}"
@@ -60,7 +145,176 @@ class OrderItem(models.Model):
         on_delete=models.CASCADE
     )
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
-    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = MoneyField(max_digits=10)
 
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
+
+
+class ProductSalesDaily(models.Model):
+    """
+    Units and revenue of a product per day and order status.
+
+    Maintained by ``place_orders`` in the transaction that places the orders
+    and by ``Order.save()`` when the status changes, and rebuilt from
+    ``OrderItem`` by the ``rebuild_sales_rollups`` command;
+    see ``products.sales``. Hot products spread their sales over
+    ``stock_shard_count`` rows per day, like their stock.
+    """
+    product = models.ForeignKey(
+        Product,
+        related_name='daily_sales',
+        on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    shard = models.PositiveSmallIntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    revenue = MoneyField(max_digits=14, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'day', 'status', 'shard'], name='product_sales_daily_unique'
+            ),
+        ]
+        indexes = [
+            # Date range reports, see products.sales
+            models.Index(fields=['day', 'status'], name='product_sales_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.day} {self.status}: {self.units}"
+
+
+class ProductChange(models.Model):
+    """
+    An entry of the catalog change feed, ``GET /api/products/changes/``.
+
+    Appended in the transaction that changed the product. Entries only name
+    the product and the kind of change; the feed serves the product's
+    current state. See ``products.changes``.
+    """
+    KIND_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('stock', 'Stock'),
+        ('deleted', 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # Id of the writing transaction on PostgreSQL, 0 elsewhere; the feed is
+    # ordered by (txid, id)
+    txid = models.BigIntegerField(default=0)
+    # No constraint, so entries outlive deleted products
+    product = models.ForeignKey(
+        Product,
+        related_name='changes',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Feed reads, see products.changes.read_changes
+            models.Index(fields=['txid', 'id'], name='product_change_position_idx'),
+            # Compaction, see products.changes.compact_changes
+            models.Index(fields=['product', 'txid', 'id'], name='product_change_product_idx'),
+            models.Index(fields=['created_at'], name='product_change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.txid}-{self.id} {self.product_id} {self.kind}"
+
+
+class OrderIntakeJob(models.Model):
+    """
+    An order accepted by ``POST /api/orders/`` in asynchronous intake mode.
+
+    Jobs are placed in groups by the ``run_order_workers`` command; see
+    ``products.intake``.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('placed', 'Placed'),
+        ('rejected', 'Rejected'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='order_intake_jobs',
+        on_delete=models.CASCADE
+    )
+    # Validated line items as [{"product_id": ..., "quantity": ...}, ...]
+    items = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    order = models.ForeignKey(
+        Order,
+        related_name='intake_jobs',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    errors = models.JSONField(null=True)
+    # Failed attempts to place the job on its own, see products.intake
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued jobs, see products.intake
+            models.Index(
+                fields=['id'],
+                name='order_intake_queued_idx',
+                condition=models.Q(status='queued'),
+            ),
+            # Time-to-commit metrics and the cleanup of processed jobs
+            models.Index(fields=['processed_at'], name='order_intake_processed_idx'),
+        ]
+
+    def __str__(self):
+        return f"Intake job {self.id} - {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's ``Idempotency-Key`` and the response of the order it created.
+
+    Stored in the transaction that creates the order, so a key exists exactly
+    when its order does. See ``products.idempotency``.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='idempotency_keys',
+        on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    # Hash of the request body, so a key cannot be reused for another order
+    fingerprint = models.CharField(max_length=64)
+    order = models.ForeignKey(
+        Order,
+        related_name='idempotency_keys',
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    # The response headers a retry must see again, e.g. the intake job's Location
+    response_headers = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_user_key_unique'),
+        ]
+        indexes = [
+            # Bulk cleanup, see the purge_idempotency_keys command
+            models.Index(fields=['expires_at'], name='idempotency_key_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
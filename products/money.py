@@ -0,0 +1,201 @@
+from decimal import Decimal, InvalidOperation
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import cached_property
+
+DEFAULT_CURRENCY = 'USD'
+# ISO 4217 currencies whose minor unit is not a hundredth of the major unit
+MINOR_UNIT_EXPONENTS = {
+    'BHD': 3, 'CLP': 0, 'IQD': 3, 'ISK': 0, 'JOD': 3, 'JPY': 0, 'KRW': 0,
+    'KWD': 3, 'LYD': 3, 'OMR': 3, 'PYG': 0, 'TND': 3, 'UGX': 0, 'VND': 0,
+}
+
+
+def minor_unit_exponent(currency):
+    return MINOR_UNIT_EXPONENTS.get(currency, 2)
+
+
+class Money:
+    """
+    An amount as an integer count of ``currency`` minor units, e.g. cents.
+
+    Adding, subtracting and multiplying by integer quantities stays in
+    integers. Amounts compare and hash like the ``Decimal`` of their major
+    units, so ``Money(1050) == Decimal('10.50')``, and ``str()`` gives the
+    same ``'10.50'`` as a quantized ``Decimal``. Instances are immutable.
+    """
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, minor, currency=DEFAULT_CURRENCY):
+        self.minor = minor
+        self.currency = currency
+
+    @classmethod
+    def from_amount(cls, amount, currency=DEFAULT_CURRENCY):
+        """Convert an amount of major units, rounding half to even like ``Decimal.quantize``."""
+        minor = Decimal(str(amount).strip()).scaleb(minor_unit_exponent(currency)).to_integral_value()
+        return cls(int(minor), currency)
+
+    @property
+    def amount(self):
+        return Decimal(self.minor).scaleb(-minor_unit_exponent(self.currency))
+
+    def _same_currency(self, other):
+        if other.currency != self.currency:
+            raise ValueError(f'Cannot combine {self.currency} and {other.currency} amounts')
+        return other.minor
+
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.minor + self._same_currency(other), self.currency)
+        # Lets sum() start from its default 0
+        if type(other) is int and other == 0:
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.minor - self._same_currency(other), self.currency)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if type(other) is int:
+            return Money(self.minor * other, self.currency)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __bool__(self):
+        return bool(self.minor)
+
+    def _operands(self, other):
+        if isinstance(other, Money):
+            return self.minor, self._same_currency(other)
+        if isinstance(other, (int, Decimal)):
+            return self.amount, other
+        return None
+
+    def __eq__(self, other):
+        operands = self._operands(other)
+        return NotImplemented if operands is None else operands[0] == operands[1]
+
+    def __lt__(self, other):
+        operands = self._operands(other)
+        return NotImplemented if operands is None else operands[0] < operands[1]
+
+    def __le__(self, other):
+        operands = self._operands(other)
+        return NotImplemented if operands is None else operands[0] <= operands[1]
+
+    def __gt__(self, other):
+        operands = self._operands(other)
+        return NotImplemented if operands is None else operands[0] > operands[1]
+
+    def __ge__(self, other):
+        operands = self._operands(other)
+        return NotImplemented if operands is None else operands[0] >= operands[1]
+
+    def __hash__(self):
+        return hash(self.amount)
+
+    def __str__(self):
+        exponent = minor_unit_exponent(self.currency)
+        if not exponent:
+            return str(self.minor)
+        whole, fraction = divmod(abs(self.minor), 10 ** exponent)
+        return f'{"-" if self.minor < 0 else ""}{whole}.{fraction:0{exponent}d}'
+
+    def __format__(self, format_spec):
+        return format(self.amount, format_spec) if format_spec else str(self)
+
+    def __repr__(self):
+        return f"Money('{self}', '{self.currency}')"
+
+
+class MoneyAttribute(DeferredAttribute):
+    """Converts assigned amounts to ``Money`` so instances never hold anything else."""
+
+    def __set__(self, instance, value):
+        try:
+            value = self.field.to_python(value)
+        except exceptions.ValidationError:
+            # Left for full_clean() and the database to reject
+            pass
+        instance.__dict__[self.field.attname] = value
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    An amount stored as a ``BIGINT`` of minor units and read as ``Money``.
+
+    Comparisons, ordering, indexes and aggregates run on the integer column.
+    ``Decimal``, ``int`` and string values are taken as major units, so
+    ``filter(price__lte=Decimal('9.99'))`` compares with 999. ``max_digits``
+    bounds the amounts accepted through the API, like ``DecimalField``'s.
+    """
+    descriptor_class = MoneyAttribute
+    description = 'Amount in integer minor units'
+
+    def __init__(self, *args, max_digits=None, currency=DEFAULT_CURRENCY, **kwargs):
+        self.max_digits = max_digits
+        self.currency = currency
+        super().__init__(*args, **kwargs)
+
+    @property
+    def decimal_places(self):
+        return minor_unit_exponent(self.currency)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.max_digits is not None:
+            kwargs['max_digits'] = self.max_digits
+        if self.currency != DEFAULT_CURRENCY:
+            kwargs['currency'] = self.currency
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # IntegerField's range validators would compare amounts with minor units
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        # PostgreSQL sums bigints into numerics
+        return None if value is None else Money(int(value), self.currency)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        try:
+            return Money.from_amount(value, self.currency)
+        except (InvalidOperation, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'], code='invalid', params={'value': value}
+            )
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if value is None:
+            return None
+        if value.currency != self.currency:
+            raise ValueError(f'{self.name} holds {self.currency}, not {value.currency}')
+        return value.minor
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return '' if value is None else str(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'max_digits': self.max_digits,
+            'decimal_places': self.decimal_places,
+            **kwargs,
+        })
@@ -0,0 +1,234 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CustomPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, counting and fetching through the async ORM."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class([], page_size)
+        # Stand in for the synchronous COUNT(*) Paginator would run
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+
+        bottom = (number - 1) * paginator.per_page
+        rows = [row async for row in queryset[bottom:bottom + paginator.per_page]]
+        self.page = paginator._get_page(rows, number, paginator)
+        self.request = request
+        return rows
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset`` on PostgreSQL.
+
+    This is what ``EXPLAIN`` reports rather than an exact ``COUNT(*)``, so it
+    costs the same no matter how large the table is. Other backends get
+    ``None``.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over an indexed ``(<field>, id)`` ordering.
+
+    Each page is fetched with a ``WHERE (field, id) > (last_field, last_id)``
+    range condition instead of ``OFFSET``, so deep pages cost the same as the
+    first one. The total count is replaced by a planner estimate.
+    """
+    mode_query_param = 'pagination'
+    mode = 'keyset'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    # Every ordering must be backed by a composite index ending in ``id``
+    orderings = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+    }
+    default_ordering = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == cls.mode
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.estimated_count = estimate_count(queryset)
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching through the async ORM."""
+        self.estimated_count = await sync_to_async(estimate_count)(queryset)
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """Narrow ``queryset`` to the rows of the requested page plus one."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.seek_condition(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Moving backwards from a cursor means there is always a next page
+        # and a previous page only if the extra row was found, and vice versa.
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('estimated_count', self.estimated_count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'estimated_count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_cursor_fields(self, request):
+        """Attributes every paginated row must carry to build its cursor."""
+        return [field.lstrip('-') for field in self.get_ordering(request)]
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        return self.orderings.get(ordering, self.orderings[self.default_ordering])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def seek_condition(self, ordering, position):
+        """
+        Build ``(a, b) > (x, y)`` as ``a >= x AND (a > x OR (a = x AND b > y))``.
+
+        The redundant leading ``a >= x`` gives the planner a plain index range
+        to scan from.
+        """
+        (first, tiebreak), (first_value, tiebreak_value) = ordering, position
+        first_name, first_op = self._lookup(first)
+        tiebreak_name, tiebreak_op = self._lookup(tiebreak)
+        return Q(**{f'{first_name}__{first_op}e': first_value}) & (
+            Q(**{f'{first_name}__{first_op}': first_value})
+            | Q(**{first_name: first_value, f'{tiebreak_name}__{tiebreak_op}': tiebreak_value})
+        )
+
+    def encode_cursor(self, obj, reverse):
+        position = [str(getattr(obj, field.lstrip('-'))) for field in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = remove_query_param(self.base_url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            position, reverse = payload['p'], bool(payload['r'])
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position, strict=True)
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _lookup(field):
+        if field.startswith('-'):
+            return field[1:], 'lt'
+        return field, 'gt'
+
+
+class OrderKeysetPagination(KeysetPagination):
+    """Keyset pagination for orders, newest first unless ``?ordering=created_at``."""
+    orderings = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+    default_ordering = '-created_at'
@@ -0,0 +1,133 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import get_cache
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Let reads made inside the block go to a replica, see ``PrimaryReplicaRouter``."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads_active():
+    return bool(_replica_reads.get() and settings.DATABASE_REPLICAS)
+
+
+def choose_replica():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+STICKY_COOKIE = 'primary_sticky'
+_STICKY_SALT = 'products.routers.primary-sticky'
+
+
+def _sticky_key(user_id):
+    return f'products:primary-sticky:{user_id}'
+
+
+def pin_to_primary(user_id, response=None):
+    """
+    Send ``user_id``'s reads to the primary until replicas have caught up with its write.
+
+    The pin is kept in the product cache and, given a ``response``, in a
+    signed cookie too, which every worker can check whether or not the
+    cache is shared between them.
+    """
+    get_cache().set(_sticky_key(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+    if response is not None:
+        response.set_signed_cookie(
+            STICKY_COOKIE, user_id, salt=_STICKY_SALT,
+            max_age=settings.DATABASE_REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+        )
+
+
+def is_pinned_to_primary(user_id, request=None):
+    if get_cache().get(_sticky_key(user_id)):
+        return True
+    if request is None:
+        return False
+    # The signature's timestamp expires the pin even if the client keeps the cookie
+    pinned = request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=_STICKY_SALT,
+        max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+    )
+    return pinned == str(user_id)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to ``settings.DATABASE_REPLICAS`` where a view opted in.
+
+    Only reads made inside ``replica_reads()`` are eligible, and never while
+    the primary has a transaction open, so locked rows and anything read
+    back after a write come from the primary. All writes go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads_active() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+class ReplicaRoutingMixin:
+    """
+    Serve a viewset's safe requests from replicas, with read-your-writes.
+
+    With ``replica_reads`` set, GET requests may read from a replica unless
+    the user wrote within the last ``DATABASE_REPLICA_STICKY_SECONDS``,
+    in which case replicas may not have the write yet. Successful writes
+    through any viewset using the mixin start that window, see
+    ``pin_to_primary()``.
+    """
+    replica_reads = False
+
+    def dispatch(self, request, *args, **kwargs):
+        enabled = self.replica_reads and request.method in SAFE_METHODS
+        with replica_reads(enabled):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if replica_reads_active() and is_pinned_to_primary(request.user.pk, request):
+            _replica_reads.set(False)
+
+    def get_read_source(self):
+        # Decided in initial(), so pinned users only see responses built on the primary
+        return 'replica' if replica_reads_active() else 'primary'
+
+    def get_cache_timeout(self):
+        # A lagging replica may have served pre-write data under the new
+        # catalog version, so such entries only live as long as the lag allowance
+        timeout = super().get_cache_timeout()
+        if replica_reads_active():
+            return min(timeout, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return timeout
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk, response)
+        return super().finalize_response(request, response, *args, **kwargs)
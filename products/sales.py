@@ -0,0 +1,167 @@
+import random
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import OrderItem, Order, ProductSalesDaily
+from .money import Money, MoneyField
+
+COLUMNS = ['product', 'day', 'status', 'shard', 'units', 'revenue']
+# Keeps statements within SQLite's limit on query parameters
+UPSERT_BATCH_SIZE = 150
+
+
+def add_sales(totals):
+    """
+    Add ``{(product_id, day, status, shard): (units, revenue)}`` to the rollups.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE`` per batch creates missing rows
+    and increments existing ones. Rows are written in key order so
+    concurrent transactions lock them in the same sequence.
+    """
+    fields = [ProductSalesDaily._meta.get_field(name) for name in COLUMNS]
+    quote = connection.ops.quote_name
+    table = quote(ProductSalesDaily._meta.db_table)
+    columns = ', '.join(quote(field.column) for field in fields)
+    key_columns = ', '.join(quote(field.column) for field in fields[:4])
+    units, revenue = quote(fields[4].column), quote(fields[5].column)
+
+    rows = [(*key, *values) for key, values in sorted(totals.items())]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            values = ', '.join([f"({', '.join(['%s'] * len(fields))})"] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {values} "
+                f"ON CONFLICT ({key_columns}) DO UPDATE SET "
+                f"{units} = {table}.{units} + EXCLUDED.{units}, "
+                f"{revenue} = {table}.{revenue} + EXCLUDED.{revenue}",
+                [
+                    field.get_db_prep_value(value, connection)
+                    for row in batch
+                    for field, value in zip(fields, row)
+                ],
+            )
+
+
+def record_sales(placed, products):
+    """
+    Add freshly placed orders to the rollups.
+
+    ``placed`` holds ``(order, items)`` pairs as built by ``place_orders``
+    and ``products`` the products they were priced from, by id.
+    """
+    totals = {}
+    for order, items in placed:
+        day = timezone.localdate(order.created_at)
+        for item in items:
+            product = products[item['product_id']]
+            # Hot products would otherwise queue on their one rollup row per day
+            shard = random.randrange(product.stock_shard_count) if product.stock_shard_count else 0
+            key = (product.pk, day, order.status, shard)
+            units, revenue = totals.get(key, (0, 0))
+            totals[key] = (units + item['quantity'], revenue + product.price.minor * item['quantity'])
+    add_sales({key: (units, Money(revenue)) for key, (units, revenue) in totals.items()})
+
+
+def move_sales(order, from_status):
+    """
+    Move ``order``'s units and revenue from its ``from_status`` rollups to its current status.
+
+    Called when a saved order changes status, see ``products.signals``.
+    ``QuerySet.update()`` bypasses that; call this or rebuild the rollups
+    after changing statuses in bulk.
+    """
+    day = timezone.localdate(order.created_at)
+    rows = (
+        OrderItem.objects.filter(order=order)
+        .values('product_id', shard_count=F('product__stock_shard_count'))
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('price'), output_field=MoneyField()),
+        )
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        # Only the sums over shards are read, so any one shard can give and take
+        shard = random.randrange(row['shard_count']) if row['shard_count'] else 0
+        totals[(row['product_id'], day, from_status, shard)] = (-row['units'], -row['revenue'])
+        totals[(row['product_id'], day, order.status, shard)] = (row['units'], row['revenue'])
+    add_sales(totals)
+
+
+def order_item_sales(after_id, last_id):
+    """Rollup totals of the orders with ids in ``(after_id, last_id]``, computed from their items."""
+    rows = (
+        OrderItem.objects.filter(order_id__gt=after_id, order_id__lte=last_id)
+        .values('product_id', day=TruncDate('order__created_at'), status=F('order__status'))
+        .annotate(
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('price'), output_field=MoneyField()),
+        )
+        .order_by()
+    )
+    return {
+        (row['product_id'], row['day'], row['status'], 0): (row['units'], row['revenue'])
+        for row in rows
+    }
+
+
+def rebuild_sales_rollups(chunk_size=10000, progress=None):
+    """
+    Recompute the rollups from ``OrderItem``, ``chunk_size`` orders at a time.
+
+    The rollups are emptied and the current last order id noted in one
+    transaction; later orders keep adding themselves as usual while earlier
+    ones are backfilled in primary key ranges, each chunk committed on its own.
+    Orders still in flight when the rebuild starts may end up counted twice,
+    so run it outside peak hours.
+    """
+    with transaction.atomic():
+        ProductSalesDaily.objects.all().delete()
+        last_id = Order.objects.aggregate(last=Max('id'))['last'] or 0
+
+    for start in range(0, last_id, chunk_size):
+        end = min(start + chunk_size, last_id)
+        with transaction.atomic():
+            add_sales(order_item_sales(start, end))
+        if progress:
+            progress(end, last_id)
+
+
+def sales_in_range(start, end, status=None):
+    """Rollup rows of days in ``[start, end)``, optionally of one order status."""
+    rows = ProductSalesDaily.objects.filter(day__gte=start, day__lt=end)
+    if status is not None:
+        rows = rows.filter(status=status)
+    return rows
+
+
+def top_sellers(start, end, status=None, by='units', limit=20):
+    """The ``limit`` products that sold the most ``units`` or ``revenue`` in ``[start, end)``."""
+    return list(
+        sales_in_range(start, end, status)
+        .values('product_id', product_name=F('product__name'))
+        .annotate(units=Sum('units'), revenue=Sum('revenue'))
+        .order_by(f'-{by}', 'product_id')[:limit]
+    )
+
+
+def daily_sales(start, end, status=None, product_id=None):
+    """Units and revenue for every day in ``[start, end)``, zero on days without sales."""
+    rows = sales_in_range(start, end, status)
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+    totals = {
+        row['day']: row
+        for row in rows.values('day').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by()
+    }
+    empty = {'units': 0, 'revenue': Money(0)}
+    return [
+        {**totals.get(day, empty), 'day': day}
+        for day in (start + timedelta(days=offset) for offset in range((end - start).days))
+    ]
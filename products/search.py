@@ -0,0 +1,148 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'products_product_fts'
+
+POSTGRESQL_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE OR REPLACE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product",
+    """
+    CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update()
+    """,
+    # Fire the trigger once for existing rows
+    "UPDATE products_product SET name = name",
+    "CREATE INDEX IF NOT EXISTS product_search_vector_idx ON products_product USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON products_product USING gin (name gin_trgm_ops)",
+]
+
+POSTGRESQL_UNINSTALL = [
+    "DROP INDEX IF EXISTS product_name_trgm_idx",
+    "DROP INDEX IF EXISTS product_search_vector_idx",
+    "DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product",
+    "DROP FUNCTION IF EXISTS products_product_search_vector_update()",
+]
+
+# External-content FTS5 table kept in sync with products_product by triggers
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='products_product', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products_product BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search(apps, schema_editor):
+    """
+    Create the search triggers and indexes for the current backend.
+
+    Safe to run again, e.g. after a migration rebuilds the product table on
+    SQLite and drops its triggers.
+    """
+    statements = {
+        'postgresql': POSTGRESQL_INSTALL,
+        'sqlite': SQLITE_INSTALL,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall_search(apps, schema_editor):
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def fts5_query(text):
+    # Quote every term so user input cannot inject FTS5 syntax, and match
+    # the last one as a prefix for search-as-you-type
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_products(queryset, text):
+    """
+    Filter ``queryset`` to products matching ``text``, annotated with a ``rank``.
+
+    PostgreSQL matches the ``search_vector`` GIN index or the name trigram
+    index, so partial and misspelt names are still found. SQLite uses the
+    FTS5 shadow table. Other backends fall back to ``icontains``.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(text, 'name'),
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_word_similar=text)
+        ).order_by('-rank', 'id')
+
+    if vendor == 'sqlite':
+        match = fts5_query(text)
+        if match is None:
+            return queryset.none()
+        matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        # bm25() is lower for better matches; name hits weigh more than description ones
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = products_product.id",
+            [match],
+        )
+        return queryset.filter(id__in=matches).annotate(rank=rank).order_by('-rank', 'id')
+
+    return queryset.filter(
+        Q(name__icontains=text) | Q(description__icontains=text)
+    ).order_by('id')
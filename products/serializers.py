@@ -1,36 +1,174 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Product, Order, OrderItem
+from rest_framework.settings import api_settings
+from . import money
+from .inventory import with_available_stock
+from .metrics import timed_serialization
+from .models import Product, Order, OrderIntakeJob, OrderItem
+from .services import BATCH_ABORTED_ERROR, merge_quantities, place_order, place_orders
 
 
-class ProductSerializer(serializers.ModelSerializer):
+def split_query_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class SparseFieldsMixin:
+    """
+    Let GET requests trim the representation with ``?fields=`` and ``?exclude=``.
+
+    Dropped fields are remembered so the view can defer their columns as well.
+    Only the top-level serializer is trimmed.
+    """
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dropped_fields = {}
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        requested = split_query_list(request.query_params.get(self.fields_query_param))
+        excluded = split_query_list(request.query_params.get(self.exclude_query_param))
+        unknown = (requested | excluded) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({
+                self.fields_query_param: [f"Unknown field(s): {', '.join(sorted(unknown))}."]
+            })
+
+        for name in list(self.fields):
+            if (requested and name not in requested) or name in excluded:
+                self.dropped_fields[name] = self.fields.pop(name)
+
+    @property
+    def data(self):
+        # Lists are timed by TimedListSerializer, see the serializers' Meta
+        with timed_serialization():
+            return super().data
+
+    def deferred_model_fields(self):
+        """Model columns that no remaining field reads and can be left unloaded."""
+        concrete = {
+            field.name for field in self.Meta.model._meta.concrete_fields
+            if not field.primary_key
+        }
+        return [
+            field.source for field in self.dropped_fields.values()
+            if field.source in concrete
+        ]
+
+
+class MoneyField(serializers.DecimalField):
+    """
+    Reads and writes ``Money`` in the wire format of a ``DecimalField``.
+
+    Amounts are formatted straight from their integer minor units instead of
+    quantizing a ``Decimal`` per value.
+    """
+
+    def __init__(self, *, currency=money.DEFAULT_CURRENCY, **kwargs):
+        self.currency = currency
+        kwargs.setdefault('decimal_places', money.minor_unit_exponent(currency))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return money.Money.from_amount(super().to_internal_value(data), self.currency)
+
+    def to_representation(self, value):
+        if not isinstance(value, money.Money):
+            value = money.Money.from_amount(value, self.currency)
+        if getattr(self, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+            return str(value)
+        return value.amount
+
+
+class MoneyFieldsMixin:
+    """Build a ``MoneyField`` for each ``money.MoneyField`` of the model."""
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if isinstance(model_field, money.MoneyField):
+            # max_digits and decimal_places are already copied from the model field
+            field_class = MoneyField
+            field_kwargs['currency'] = model_field.currency
+        return field_class, field_kwargs
+
+
+class StockField(serializers.IntegerField):
+    """
+    Writes ``Product.stock`` but reads the ``available_stock`` annotation.
+
+    Hot products keep most of their stock in shard rows, so the column alone
+    is only correct for plain products; see ``products.inventory``.
+    """
+    read_source = 'available_stock'
+
+    def get_attribute(self, instance):
+        if hasattr(instance, self.read_source):
+            return getattr(instance, self.read_source)
+        if instance.stock_shard_count:
+            return with_available_stock(Product.objects.filter(pk=instance.pk)).values_list(
+                self.read_source, flat=True
+            ).get()
+        return super().get_attribute(instance)
+
+
+class ProductSerializer(SparseFieldsMixin, MoneyFieldsMixin, serializers.ModelSerializer):
+    stock = StockField(min_value=0)
+
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'stock']
+        fields = ['id', 'sku', 'name', 'description', 'price', 'stock']
+        list_serializer_class = TimedListSerializer
+
 
+class OrderItemSerializer(MoneyFieldsMixin, serializers.ModelSerializer):
+    # Products are resolved for the whole order at once in
+    # OrderSerializer.validate_items instead of one lookup per item.
+    product = serializers.IntegerField(source='product_id', min_value=1)
+    # Read from the product prefetched with the items, see order_prefetches()
+    product_name = serializers.CharField(source='product.name', read_only=True)
 
-class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
-        fields = ['product', 'quantity']
+        fields = ['product', 'product_name', 'quantity', 'price']
+        read_only_fields = ['price']
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, MoneyFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'items', 'total_price', 'status']
-        read_only_fields = ['total_price', 'status']
+        fields = ['id', 'items', 'total_price', 'status', 'created_at']
+        read_only_fields = ['total_price', 'status', 'created_at']
+        list_serializer_class = TimedListSerializer
 
     def validate_items(self, items):
         if not items:
             raise serializers.ValidationError("Order must contain at least one item.")
 
-        # Validate stock availability
-        for item in items:
-            product = item['product']
-            quantity = item['quantity']
-            if product.stock < quantity:
+        # Early rejection only; stock is re-checked under row locks in create()
+        quantities = merge_quantities(items)
+        products = self.context.get('products')
+        if products is None:
+            products = with_available_stock(Product.objects.only('id', 'name')).in_bulk(quantities)
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                raise serializers.ValidationError(
+                    f'Invalid pk "{product_id}" - object does not exist.'
+                )
+            if product.available_stock < quantity:
                 raise serializers.ValidationError(
                     f"Insufficient stock for product: {product.name}"
                 )
@@ -38,28 +176,111 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        total_price = sum(
-            item['product'].price * item['quantity']
-            for item in items_data
+        return place_order(items_data, **validated_data)
+
+
+def order_prefetches():
+    """
+    Prefetches for everything ``OrderSerializer`` reads from related rows.
+
+    Two queries per page of orders whatever the number of orders or items,
+    each loading only the columns the representation needs.
+    """
+    return [
+        Prefetch('items', queryset=OrderItem.objects.only(
+            'id', 'order_id', 'product_id', 'quantity', 'price',
+        ).order_by('id')),
+        Prefetch('items__product', queryset=Product.objects.only('id', 'name')),
+    ]
+
+
+def requested_product_ids(orders):
+    """Collect the product ids referenced by raw, not yet validated order data."""
+    product_ids = set()
+    for order in orders:
+        items = order.get('items')
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            try:
+                product_ids.add(int(item['product']))
+            except (KeyError, TypeError, ValueError):
+                pass
+    return product_ids
+
+
+class OrderBatchSerializer(serializers.Serializer):
+    orders = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.ORDER_BATCH_MAX_SIZE,
+    )
+    atomic = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        # One product lookup shared by every order in the batch
+        products = with_available_stock(Product.objects.only('id', 'name')).in_bulk(
+            requested_product_ids(attrs['orders'])
         )
+        context = {**self.context, 'products': products}
+        self.order_serializers = [
+            OrderSerializer(data=order, context=context) for order in attrs['orders']
+        ]
+        attrs['errors'] = [
+            None if serializer.is_valid() else serializer.errors
+            for serializer in self.order_serializers
+        ]
+        return attrs
+
+    def create(self, validated_data):
+        if validated_data['atomic'] and any(validated_data['errors']):
+            return [
+                (None, error or BATCH_ABORTED_ERROR)
+                for error in validated_data['errors']
+            ]
+        valid = [
+            serializer.validated_data
+            for serializer, error in zip(self.order_serializers, validated_data['errors'])
+            if error is None
+        ]
+        placed = iter(place_orders(valid, atomic=validated_data['atomic']))
+        return [
+            (None, error) if error else next(placed)
+            for error in validated_data['errors']
+        ]
+
+
+class OrderIntakeJobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name='order-intake-detail')
+
+    class Meta:
+        model = OrderIntakeJob
+        fields = ['id', 'url', 'status', 'order', 'errors', 'created_at', 'processed_at']
+        read_only_fields = fields
+
+
+class TopSellerSerializer(serializers.Serializer):
+    product = serializers.IntegerField(source='product_id')
+    product_name = serializers.CharField()
+    units = serializers.IntegerField()
+    revenue = MoneyField(max_digits=14)
+
 
-        # Create order
-        order = Order.objects.create(total_price=total_price, **validated_data)
+class DailySalesSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    units = serializers.IntegerField()
+    revenue = MoneyField(max_digits=14)
 
-        # Create order items and update stock
-        for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
 
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                price=product.price
-            )
+class TopSellersReportSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    results = TopSellerSerializer(many=True)
 
-            # Update stock
-            product.stock -= quantity
-            product.save()
 
-        return order
+class RevenueReportSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    units = serializers.IntegerField()
+    revenue = MoneyField(max_digits=14)
+    days = DailySalesSerializer(many=True)
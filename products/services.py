@@ -0,0 +1,175 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import bump_catalog_version
+from .changes import record_changes
+from .inventory import take_stock, with_available_stock
+from .models import Product, Order, OrderItem
+from .money import Money
+from .sales import record_sales
+
+
+def merge_quantities(items):
+    """Sum the requested quantity per product id, preserving first-seen order."""
+    quantities = Counter()
+    for item in items:
+        quantities[item['product_id']] += item['quantity']
+    return quantities
+
+
+def lock_products(product_ids):
+    """
+    Load the products of an order, each annotated with its ``available_stock``.
+
+    Plain products are locked in primary key order so concurrent orders
+    touching the same products always acquire locks in the same sequence and
+    cannot deadlock. Hot products are not locked at all; their shards are
+    decremented with conditional UPDATEs instead, see ``take_stock``.
+    """
+    fields = ('id', 'name', 'price', 'stock', 'stock_shard_count')
+    products = {
+        product.pk: product
+        for product in Product.objects.select_for_update()
+        .filter(pk__in=product_ids, stock_shard_count=0)
+        .order_by('pk')
+        .only(*fields)
+        .annotate(available_stock=F('stock'))
+    }
+    hot_ids = set(product_ids) - products.keys()
+    if hot_ids:
+        products.update(with_available_stock(
+            Product.objects.filter(pk__in=hot_ids, stock_shard_count__gt=0).only(*fields)
+        ).in_bulk())
+    return products
+
+
+def decrement_stock(quantities):
+    """
+    Decrement stock for every product in ``quantities`` with a single UPDATE.
+
+    Each row is only touched if it still holds enough stock, so the returned
+    row count tells the caller whether the whole decrement went through.
+    """
+    condition = Q()
+    for product_id, quantity in quantities.items():
+        condition |= Q(pk=product_id, stock__gte=quantity)
+
+    updated = Product.objects.filter(condition).update(
+        stock=Case(
+            *[When(pk=product_id, then=F('stock') - quantity)
+              for product_id, quantity in quantities.items()],
+            output_field=IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    return updated == len(quantities)
+
+
+BATCH_ABORTED_ERROR = {
+    'non_field_errors': ["Not placed because another order in the batch was rejected."]
+}
+
+
+def _stock_error(quantities, products, available):
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            return {'items': [f'Invalid pk "{product_id}" - object does not exist.']}
+        if available[product_id] < quantity:
+            return {'items': [f"Insufficient stock for product: {product.name}"]}
+    return None
+
+
+def place_orders(orders, atomic=True):
+    """
+    Create several orders in one transaction with set-based writes.
+
+    ``orders`` is a list of order field dicts, each holding an ``items`` list
+    of ``{'product_id': ..., 'quantity': ...}`` dicts. Products for the whole
+    batch are locked with one query, stock is checked cumulatively in order of
+    submission and decremented with one UPDATE, orders and items are inserted
+    with one ``bulk_create`` each, the sales rollups updated with one upsert
+    and one change feed entry appended per product.
+
+    Returns one ``(order, errors)`` pair per submitted order. With ``atomic``
+    a single rejected order means nothing is written and every other entry
+    reports that it was not placed.
+    """
+    demands = [merge_quantities(order_data['items']) for order_data in orders]
+
+    with transaction.atomic():
+        products = lock_products(set().union(*demands))
+        available = {product_id: product.available_stock for product_id, product in products.items()}
+        accepted = Counter()
+        errors = []
+        for quantities in demands:
+            error = _stock_error(quantities, products, available)
+            if error is None:
+                for product_id, quantity in quantities.items():
+                    available[product_id] -= quantity
+                accepted.update(quantities)
+            errors.append(error)
+
+        if atomic and any(errors):
+            return [(None, error or BATCH_ABORTED_ERROR) for error in errors]
+        if not accepted:
+            return [(None, error) for error in errors]
+
+        hot = {product_id for product_id in accepted if products[product_id].stock_shard_count}
+        plain = {product_id: quantity for product_id, quantity in accepted.items() if product_id not in hot}
+        if (
+            (plain and not decrement_stock(plain))
+            # Ascending like lock_products, so concurrent orders lock shards in the same order
+            or not all(take_stock(product_id, accepted[product_id]) for product_id in sorted(hot))
+        ):
+            raise serializers.ValidationError(
+                {'items': ["Insufficient stock to fulfil the order."]}
+            )
+        bump_catalog_version()
+        record_changes(accepted, 'stock')
+
+        placed = []
+        for order_data, error in zip(orders, errors):
+            if error is not None:
+                continue
+            order_fields = {key: value for key, value in order_data.items() if key != 'items'}
+            # Prices are integer cents, so the total is exact without rounding
+            total_price = Money(sum(
+                products[item['product_id']].price.minor * item['quantity']
+                for item in order_data['items']
+            ))
+            order = Order(total_price=total_price, **order_fields)
+            placed.append((order, order_data['items']))
+
+        Order.objects.bulk_create([order for order, _ in placed])
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=item['product_id'],
+                quantity=item['quantity'],
+                price=products[item['product_id']].price,
+            )
+            for order, items in placed
+            for item in items
+        ])
+        record_sales(placed, products)
+
+    placed_orders = iter(order for order, _ in placed)
+    return [(None, error) if error else (next(placed_orders), None) for error in errors]
+
+
+def place_order(items, **order_fields):
+    """
+    Create an order with its items and reserve stock as one atomic unit.
+
+    ``items`` is a list of ``{'product_id': ..., 'quantity': ...}`` dicts.
+    The number of queries issued is independent of the number of items.
+    """
+    [(order, errors)] = place_orders([{'items': items, **order_fields}])
+    if errors:
+        raise serializers.ValidationError(errors)
+    return order
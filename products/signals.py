@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import user_cache
+from .cache import bump_catalog_version
+from .changes import record_changes
+from .metrics import instrument_connection
+from .models import Order, Product
+from .sales import move_sales
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+def record_product_saved(sender, instance, created, raw=False, **kwargs):
+    # Fixtures loaded with loaddata are not catalog changes
+    if not raw:
+        record_changes([instance.pk], 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Product)
+def record_product_deleted(sender, instance, **kwargs):
+    record_changes([instance.pk], 'deleted')
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    instance._saved_status = None
+    if raw or instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        return
+    # Locked until Order.save() commits, so concurrent changes move the rollups one at a time
+    instance._saved_status = (
+        Order.objects.using(using).select_for_update().filter(pk=instance.pk)
+        .values_list('status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def move_order_sales(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_saved_status', None)
+    if not created and previous is not None and previous != instance.status:
+        move_sales(instance, previous)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Deactivations and password changes must not be served from any process's cache
+    user_cache.revoke(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(connection_created)
+def instrument_database_connection(sender, connection, **kwargs):
+    if settings.REQUEST_METRICS:
+        instrument_connection(connection)
@@ -0,0 +1,10 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Test transactions roll the catalog version back, so responses cached by
+    # an earlier test could otherwise be served under the same version
+    for cache in caches.all():
+        cache.clear()
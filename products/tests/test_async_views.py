@@ -0,0 +1,112 @@
+import asyncio
+import json
+from unittest import mock
+from asgiref.sync import sync_to_async
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.inventory import reshard_stock
+from products.models import Product, Order, OrderItem
+
+
+class AsyncReadViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.headers = {'Authorization': f'Bearer {str(refresh.access_token)}'}
+
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00') + i,
+                stock=10
+            )
+            for i in range(3)
+        ]
+        self.order = Order.objects.create(total_price=Decimal('21.00'))
+        for product in self.products[:2]:
+            OrderItem.objects.create(order=self.order, product=product, quantity=1, price=product.price)
+
+    async def assert_same(self, sync_url, async_url, params=None):
+        response = await self.async_client.get(async_url, params or {}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        expected = await self.sync_get(sync_url, params)
+        # Pagination links point back at the async endpoints
+        self.assertEqual(json.loads(response.content.replace(b'/api/async/', b'/api/')), expected)
+        return expected
+
+    async def sync_get(self, url, params):
+        response = await sync_to_async(self.client.get)(
+            url, params or {}, headers={'Accept': 'application/json', **self.headers}
+        )
+        return json.loads(response.content)
+
+    async def test_product_list_matches_sync(self):
+        await self.assert_same(reverse('product-list'), reverse('async-product-list'))
+        await self.assert_same(reverse('product-list'), reverse('async-product-list'),
+                               {'page_size': 2, 'page': 2, 'fields': 'id,stock'})
+        data = await self.assert_same(reverse('product-list'), reverse('async-product-list'),
+                                      {'pagination': 'keyset', 'ordering': '-price', 'page_size': 2})
+        self.assertIn('cursor=', data['next'])
+
+    async def test_product_list_filters_that_query(self):
+        await Product.objects.filter(pk=self.products[0].pk).aupdate(stock=0)
+        await sync_to_async(reshard_stock)(self.products[1].pk, 2)
+        for params in [{'in_stock': 'true'}, {'in_stock': 'false'}, {'q': 'Product'}]:
+            with self.subTest(params=params):
+                data = await self.assert_same(reverse('product-list'), reverse('async-product-list'), params)
+                self.assertTrue(data['results'])
+        data = await self.assert_same(reverse('product-list'), reverse('async-product-list'), {'in_stock': 'false'})
+        self.assertEqual([product['id'] for product in data['results']], [self.products[0].pk])
+
+    async def test_product_detail_matches_sync(self):
+        pk = self.products[0].pk
+        await self.assert_same(reverse('product-detail', args=[pk]), reverse('async-product-detail', args=[pk]))
+        response = await self.async_client.get(reverse('async-product-detail', args=[0]), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_order_read_matches_sync(self):
+        data = await self.assert_same(reverse('order-list'), reverse('async-order-list'))
+        self.assertEqual(len(data['results'][0]['items']), 2)
+        await self.assert_same(reverse('order-list'), reverse('async-order-list'), {'status': 'completed'})
+        pk = self.order.pk
+        await self.assert_same(reverse('order-detail', args=[pk]), reverse('async-order-detail', args=[pk]))
+
+    async def test_invalid_parameters(self):
+        response = await self.async_client.get(reverse('async-product-list'), {'min_price': 'x'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('min_price', json.loads(response.content))
+
+    async def test_authentication(self):
+        response = await self.async_client.get(reverse('async-product-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        response = await self.async_client.get(
+            reverse('async-product-list'), headers={'Authorization': 'Bearer invalid'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_authentication_does_not_block_the_event_loop(self):
+        get = LocMemCache.get
+
+        def get_off_the_loop(cache, *args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return get(cache, *args, **kwargs)
+            raise AssertionError('Blocking cache read inside the event loop')
+
+        with mock.patch.object(LocMemCache, 'get', autospec=True, side_effect=get_off_the_loop) as cache_get:
+            # A cold then a warm user cache
+            for _ in range(2):
+                response = await self.async_client.get(reverse('async-order-list'), headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+        self.assertTrue(cache_get.called)
@@ -0,0 +1,98 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.authentication import UserCache
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        self.url = reverse('order-list')
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        return response, [
+            q['sql'] for q in ctx.captured_queries
+            if 'auth_user' in q['sql'] or 'django_session' in q['sql']
+        ]
+
+    def test_warm_cache_needs_no_queries(self):
+        _, cold = self.auth_queries()
+        self.assertEqual(len(cold), 1)
+        response, warm = self.auth_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(warm, [])
+
+    def test_deactivation_invalidates(self):
+        self.auth_queries()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.auth_queries()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_from_another_process(self):
+        self.auth_queries()
+        # Another process changes the user without signals reaching this one
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response, _ = self.auth_queries()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        UserCache(max_size=10, ttl=60).revoke(self.user.pk)
+        response, queries = self.auth_queries()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_reloads_user(self):
+        self.auth_queries()
+        self.user.set_password('changed-pass-456')
+        self.user.save()
+        _, queries = self.auth_queries()
+        self.assertEqual(len(queries), 1)
+
+    def test_api_skips_session_and_csrf(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+
+        response = self.client.get(reverse('admin:login'))
+        self.assertTrue(hasattr(response.wsgi_request, 'session'))
+        self.assertIn('csrftoken', response.cookies)
+
+
+class UserCacheTest(SimpleTestCase):
+    def test_bounded_lru(self):
+        cache = UserCache(max_size=2, ttl=60)
+        for user_id in (1, 2):
+            cache.set(user_id, User(pk=user_id))
+        cache.get(1)
+        cache.set(3, User(pk=3))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1).pk, 1)
+        self.assertEqual(cache.get(3).pk, 3)
+
+    def test_ttl(self):
+        cache = UserCache(max_size=10, ttl=60)
+        with mock.patch('products.authentication.time.monotonic', return_value=100):
+            cache.set(1, User(pk=1))
+        with mock.patch('products.authentication.time.monotonic', return_value=159):
+            self.assertIsNotNone(cache.get(1))
+        with mock.patch('products.authentication.time.monotonic', return_value=160):
+            self.assertIsNone(cache.get(1))
+
+    def test_returns_copies(self):
+        cache = UserCache(max_size=10, ttl=60)
+        cache.set(1, User(pk=1, username='a'))
+        cache.get(1).username = 'b'
+        self.assertEqual(cache.get(1).username, 'a')
@@ -0,0 +1,151 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.changes import compact_changes, record_changes
+from products.importers import NDJSON, ProductImporter, read_rows
+from products.models import Product, ProductChange
+
+
+class ChangeFeedTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00'),
+                stock=100
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('product-changes')
+
+    def feed(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def order(self, *quantities):
+        response = self.client.post(reverse('order-list'), {
+            'items': [
+                {'product': product.id, 'quantity': quantity}
+                for product, quantity in zip(self.products, quantities) if quantity
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_product_saves_append_entries(self):
+        product = self.products[0]
+        product.price = Decimal('12.00')
+        product.save()
+
+        kinds = ProductChange.objects.filter(product=product).order_by('id').values_list('kind', flat=True)
+        self.assertEqual(list(kinds), ['created', 'updated'])
+
+    def test_without_since_returns_head_cursor(self):
+        data = self.feed()
+        self.assertEqual(data['results'], [])
+        self.assertEqual(self.feed(since=data['cursor'])['results'], [])
+
+        self.order(2)
+        self.assertEqual([r['id'] for r in self.feed(since=data['cursor'])['results']], [self.products[0].id])
+
+    def test_order_stock_changes_are_coalesced(self):
+        cursor = self.feed()['cursor']
+        self.order(2, 1)
+        self.order(3)
+
+        data = self.feed(since=cursor)
+        self.assertFalse(data['has_more'])
+        # Ordered by each product's last change
+        self.assertEqual([r['id'] for r in data['results']], [self.products[1].id, self.products[0].id])
+        first = data['results'][1]
+        self.assertEqual(first['changes'], ['stock'])
+        self.assertEqual(first['product']['stock'], 95)
+        self.assertEqual(self.feed(since=data['cursor'])['results'], [])
+
+    def test_limit_and_sparse_fields(self):
+        cursor = self.feed(since='0-0', limit=2)
+        self.assertTrue(cursor['has_more'])
+        self.assertEqual([r['id'] for r in cursor['results']], [p.id for p in self.products[:2]])
+
+        data = self.feed(since=cursor['cursor'], fields='id,stock')
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['results'], [{
+            'id': self.products[2].id,
+            'changes': ['created'],
+            'product': {'id': self.products[2].id, 'stock': 100},
+        }])
+
+    def test_deleted_product(self):
+        cursor = self.feed()['cursor']
+        product_id = self.products[0].id
+        self.products[0].delete()
+
+        [result] = self.feed(since=cursor)['results']
+        self.assertEqual(result, {'id': product_id, 'changes': ['deleted'], 'product': None})
+
+    def test_invalid_cursor(self):
+        for since in ['abc', '1', '1-x', '-1-2']:
+            response = self.client.get(self.url, {'since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, since)
+
+    @override_settings(CHANGE_FEED_MAX_WAIT=0.05, CHANGE_FEED_POLL_INTERVAL=0.01)
+    def test_wait_returns_empty_at_deadline(self):
+        cursor = self.feed()['cursor']
+        data = self.feed(since=cursor, wait=30)
+        self.assertEqual(data, {'cursor': cursor, 'has_more': False, 'results': []})
+
+    def test_import_appends_entries(self):
+        Product.objects.filter(pk=self.products[0].pk).update(sku='A-1')
+        cursor = self.feed()['cursor']
+        lines = [(json.dumps(row) + '\n').encode() for row in [
+            {'sku': 'A-1', 'name': 'Renamed', 'description': 'New', 'price': '2.00', 'stock': 5},
+            {'sku': 'B-1', 'name': 'Fresh', 'description': 'New', 'price': '4.00', 'stock': 7},
+        ]]
+        ProductImporter(upsert=True).run(read_rows(lines, NDJSON))
+
+        changes = {r['id']: r['changes'] for r in self.feed(since=cursor)['results']}
+        self.assertEqual(changes, {
+            self.products[0].id: ['updated'],
+            Product.objects.get(sku='B-1').id: ['created'],
+        })
+
+    def test_compaction_keeps_last_entry_per_product(self):
+        record_changes([self.products[0].id], 'stock')
+        ProductChange.objects.update(created_at=timezone.now() - timedelta(days=30))
+        record_changes([self.products[1].id], 'stock')
+
+        self.assertEqual(compact_changes(older_than=24 * 60 * 60, batch_size=1), 2)
+        self.assertEqual(
+            sorted(ProductChange.objects.values_list('product_id', 'kind')),
+            sorted([
+                (self.products[0].id, 'stock'),
+                (self.products[1].id, 'stock'),
+                (self.products[2].id, 'created'),
+            ]),
+        )
+        results = self.feed(since='0-0')['results']
+        self.assertEqual({r['id'] for r in results}, {p.id for p in self.products})
+
+    def test_compact_command(self):
+        record_changes([self.products[0].id], 'stock')
+        out = StringIO()
+        call_command('compact_product_changes', '--older-than', '0', stdout=out)
+        self.assertIn('Deleted 1 superseded change feed entries', out.getvalue())
+        self.assertEqual(ProductChange.objects.count(), 3)
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase, TransactionTestCase
+from products.models import Product, Order, OrderItem
+
+
+class PopulateDbCommandTest(TestCase):
+    def populate(self, **options):
+        call_command('populate_db', workers=1, stdout=StringIO(), **options)
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('id').values_list('name', 'description', 'price', 'stock')),
+            list(OrderItem.objects.order_by('id').values_list('quantity', 'price')),
+        )
+
+    def test_scale_flags(self):
+        self.populate(products=30, orders=20, max_items=3, seed=1, chunk_size=7)
+        self.assertEqual(Product.objects.count(), 30)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertTrue(OrderItem.objects.exists())
+        for order in Order.objects.prefetch_related('items'):
+            self.assertLessEqual(len(order.items.all()), 3)
+            self.assertEqual(order.total_price, sum(i.price * i.quantity for i in order.items.all()))
+
+    def test_seed_is_reproducible(self):
+        self.populate(products=10, orders=10, seed=42, chunk_size=4)
+        first = self.snapshot()
+        Product.objects.all().delete()
+        Order.objects.all().delete()
+        self.populate(products=10, orders=10, seed=42, chunk_size=4)
+        self.assertEqual(self.snapshot(), first)
+
+
+# The benchmark drives the WSGI handler, which closes connections between
+# requests and so cannot run inside a test transaction
+class BenchmarkApiCommandTest(TransactionTestCase):
+    def benchmark(self, path, **options):
+        call_command(
+            'benchmark_api', products=30, users=2, requests=40, warmup=5, concurrency=1,
+            output=path, stdout=StringIO(), stderr=StringIO(), **options
+        )
+        with open(path) as f:
+            return json.load(f)
+
+    def test_results_and_regressions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = self.benchmark(os.path.join(directory, 'first.json'))
+            self.assertEqual(Product.objects.filter(sku__startswith='BENCH-').count(), 30)
+            self.assertEqual(results['total']['requests'], 40)
+            self.assertEqual(results['total']['errors'], 0)
+            self.assertEqual(
+                set(results['endpoints']),
+                {'product-list', 'product-page', 'product-detail', 'order-create'},
+            )
+            for row in results['endpoints'].values():
+                self.assertLessEqual(row['p50_ms'], row['p95_ms'])
+                self.assertLessEqual(row['p95_ms'], row['p99_ms'])
+                self.assertIsNotNone(row['queries_per_request'])
+            self.assertTrue(Order.objects.exists())
+
+            # A baseline that needed fewer queries per order fails the comparison
+            baseline = os.path.join(directory, 'baseline.json')
+            results['endpoints']['order-create']['queries_per_request'] -= 1
+            with open(baseline, 'w') as f:
+                json.dump(results, f)
+            with self.assertRaisesMessage(CommandError, 'regression'):
+                self.benchmark(
+                    os.path.join(directory, 'second.json'), baseline=baseline, threshold=1000
+                )
+
+
+class BenchmarkMoneyCommandTest(TestCase):
+    def test_reports_both_paths(self):
+        out = StringIO()
+        call_command('benchmark_money', prices=50, items=5, iterations=1, stdout=out)
+        self.assertIn('serialization', out.getvalue())
+        self.assertIn('order totals', out.getvalue())
+
+
+@mock.patch('products.management.commands.wait_for_db.time.sleep')
+class WaitForDbCommandTest(TestCase):
+    def test_retries_with_backoff(self, sleep):
+        out = StringIO()
+        with mock.patch.object(connection, 'ensure_connection',
+                               side_effect=[OperationalError, OperationalError, OperationalError, None]):
+            call_command('wait_for_db', interval=0.5, max_interval=1.5, stdout=out)
+
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.5, 1.0, 1.5])
+        self.assertIn('Database available!', out.getvalue())
+
+    def test_gives_up_at_deadline(self, sleep):
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('refused')):
+            with self.assertRaisesMessage(CommandError, 'Database unavailable after 0 seconds: refused'):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+        sleep.assert_not_called()
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.exporters import order_rows
+from products.models import Product, Order, OrderItem
+
+
+def create_orders(count=5):
+    products = [
+        Product.objects.create(
+            name=f"Product {i}",
+            description="Multi\nline, \"quoted\"",
+            price=Decimal('2.50'),
+            stock=10
+        )
+        for i in range(2)
+    ]
+    for i in range(count):
+        order = Order.objects.create(total_price=Decimal('7.50'), status='pending')
+        OrderItem.objects.create(order=order, product=products[0], quantity=1, price=Decimal('2.50'))
+        OrderItem.objects.create(order=order, product=products[1], quantity=2, price=Decimal('2.50'))
+    return products
+
+
+class ExportViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        self.products = create_orders(3)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_products_ndjson(self):
+        lines = self.get(reverse('product-export')).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['price'], '2.50')
+        self.assertEqual(json.loads(lines[0])['description'], "Multi\nline, \"quoted\"")
+
+    def test_products_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.get(reverse('product-export'), format='csv'))))
+        self.assertEqual([int(row['id']) for row in rows], [p.id for p in self.products])
+        self.assertEqual(rows[0]['description'], "Multi\nline, \"quoted\"")
+
+    def test_orders_include_items(self):
+        orders = [json.loads(line) for line in self.get(reverse('order-export')).splitlines()]
+        self.assertEqual(len(orders), 3)
+        self.assertEqual(orders[0]['total_price'], '7.50')
+        self.assertEqual(
+            orders[0]['items'],
+            [{'product': self.products[0].id, 'quantity': 1, 'price': '2.50'},
+             {'product': self.products[1].id, 'quantity': 2, 'price': '2.50'}]
+        )
+        rows = list(csv.DictReader(io.StringIO(self.get(reverse('order-export'), format='csv'))))
+        self.assertEqual(len(rows), 6)
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.get(reverse('product-export'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderExportTest(TestCase):
+    def test_queries_scale_with_chunks_not_orders(self):
+        create_orders(10)
+        with CaptureQueriesContext(connection) as ctx:
+            orders = list(order_rows(chunk_size=4))
+        self.assertEqual(len(orders), 10)
+        self.assertLessEqual(len(ctx.captured_queries), 2 * 3 + 1)
+
+    def test_command_writes_file(self):
+        create_orders(2)
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            call_command('export_data', 'orders', format='csv', output=path, stderr=io.StringIO())
+            with open(path, newline='') as f:
+                self.assertEqual(len(list(csv.DictReader(f))), 4)
+        finally:
+            os.remove(path)
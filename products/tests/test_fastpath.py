@@ -0,0 +1,65 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.fastpath import FastJSONRenderer, compile_serializer
+from products.inventory import with_available_stock
+from products.models import Product
+from products.serializers import ProductSerializer
+
+
+def create_products():
+    Product.objects.create(
+        sku='SKU-1',
+        name="Café   \"quoted\" \U0001F600",
+        description="Line one\nLine two\t ",
+        price=Decimal('0.10'),
+        stock=0
+    )
+    Product.objects.create(
+        name="Plain",
+        description="",
+        price=Decimal('99999999.99'),
+        stock=7
+    )
+
+
+class ReadPlanTest(TestCase):
+    def setUp(self):
+        create_products()
+
+    def test_output_is_byte_identical(self):
+        serializer = ProductSerializer()
+        plan = compile_serializer(serializer)
+        queryset = with_available_stock(Product.objects.order_by('id'))
+
+        expected = JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+        actual = FastJSONRenderer().render(
+            plan.to_representation(queryset.values_list(*plan.sources))
+        )
+        self.assertEqual(actual, expected)
+
+
+class FastListViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        create_products()
+
+    def fetch(self, fast, params):
+        cache.clear()
+        with override_settings(PRODUCT_LIST_FAST_PATH=fast):
+            return self.client.get(reverse('product-list'), params, HTTP_ACCEPT='application/json').content
+
+    def test_list_matches_serializer_path(self):
+        for params in [{}, {'fields': 'id,price'}, {'pagination': 'keyset', 'page_size': 1}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.fetch(True, params), self.fetch(False, params))
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.filters import ProductFilterSerializer, filter_products
+from products.models import Product
+
+
+class ProductFilterViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        for price, stock in [('60.00', 5), ('20.00', 0), ('45.00', 3), ('10.00', 8)]:
+            Product.objects.create(
+                name=f"Product {price}",
+                description="Test Description",
+                price=Decimal(price),
+                stock=stock
+            )
+
+    def prices(self, **params):
+        response = self.client.get(reverse('product-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['price'] for item in response.data['results']]
+
+    def test_in_stock_under_price_cheapest_first(self):
+        self.assertEqual(
+            self.prices(in_stock='true', max_price='50', ordering='price'),
+            ['10.00', '45.00']
+        )
+
+    def test_price_range_descending(self):
+        self.assertEqual(
+            self.prices(min_price='15', max_price='60', ordering='-price'),
+            ['60.00', '45.00', '20.00']
+        )
+
+    def test_out_of_stock(self):
+        self.assertEqual(self.prices(in_stock='false'), ['20.00'])
+
+    def test_updated_since(self):
+        Product.objects.filter(price=Decimal('45.00')).update(
+            updated_at=timezone.now() + timedelta(days=1)
+        )
+        since = (timezone.now() + timedelta(hours=1)).isoformat()
+        self.assertEqual(self.prices(updated_since=since), ['45.00'])
+
+    def test_invalid_parameters(self):
+        for params in [{'ordering': 'name'}, {'min_price': 'cheap'}, {'min_price': '5', 'max_price': '1'}]:
+            response = self.client.get(reverse('product-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProductFilterIndexTest(TestCase):
+    """Every supported filter/ordering shape must be answered from an index."""
+
+    shapes = [
+        ({'ordering': 'price'}, 'product_price_id_idx'),
+        ({'ordering': '-created_at'}, 'product_created_id_idx'),
+        ({'min_price': '10', 'max_price': '50', 'ordering': 'price'}, 'product_price_id_idx'),
+        ({'in_stock': 'true', 'max_price': '50', 'ordering': 'price'}, 'product_in_stock_price_idx'),
+        ({'in_stock': 'true', 'ordering': '-created_at'}, 'product_in_stock_created_idx'),
+        ({'in_stock': 'false', 'ordering': 'price'}, 'product_no_stock_price_idx'),
+        ({'in_stock': 'false', 'ordering': '-created_at'}, 'product_no_stock_created_idx'),
+        ({'updated_since': '2024-01-01T00:00:00Z'}, 'product_updated_id_idx'),
+    ]
+
+    def explain(self, params):
+        filters = ProductFilterSerializer(data=params)
+        filters.is_valid(raise_exception=True)
+        queryset = filter_products(Product.objects.all(), filters.validated_data)[:20]
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be scanned sequentially
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                return queryset.explain()
+        return queryset.explain()
+
+    def test_query_shapes_use_indexes(self):
+        for params, index in self.shapes:
+            with self.subTest(params=params):
+                plan = self.explain(params)
+                self.assertIn(index, plan)
+                # The ordering must come from the index, not a separate sort
+                self.assertNotIn('TEMP B-TREE', plan.upper())
+                self.assertNotIn('SORT', plan.upper().replace('SORT KEY', ''))
@@ -0,0 +1,93 @@
+from unittest import mock
+from django.db import connection
+from django.db.migrations import Migration
+from django.db.utils import OperationalError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from products import health
+from products.health import readiness
+
+
+@override_settings(METRICS_TOKEN='secret')
+class HealthCheckTest(APITestCase):
+    def setUp(self):
+        readiness.clear()
+        self.addCleanup(readiness.clear)
+        # Details are for operators, probes only get the status
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+
+    def test_liveness(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_ready(self):
+        response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['status'], 'ok')
+        self.assertEqual(data['migrations'], {'status': 'ok', 'pending': []})
+        self.assertEqual(data['databases']['default']['status'], 'ok')
+        self.assertGreaterEqual(data['databases']['default']['latency_ms'], 0)
+
+    def test_result_is_cached(self):
+        self.client.get(reverse('readyz'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('readyz'))
+
+        with override_settings(HEALTH_CHECK_CACHE_SECONDS=0):
+            readiness.clear()
+            self.client.get(reverse('readyz'))
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('readyz'))
+            self.assertEqual(queries[0]['sql'], 'SELECT 1')
+
+    def test_unreachable_database(self):
+        with mock.patch('django.db.backends.base.base.BaseDatabaseWrapper.cursor',
+                        side_effect=OperationalError('could not connect to server')):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        default = response.json()['databases']['default']
+        self.assertEqual(default['status'], 'unavailable')
+        # Connection details stay out of the unauthenticated response
+        self.assertEqual(default['error'], 'OperationalError')
+
+    def test_probes_only_get_the_status(self):
+        self.client.credentials()
+        plan = [(Migration('9999_next', 'products'), False)]
+        with mock.patch('products.health.MigrationExecutor.migration_plan', return_value=plan):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json(), {'status': 'unavailable'})
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_unreachable_replica_is_degraded(self):
+        check_database = health.check_database
+
+        def replica_down(alias):
+            if alias == 'replica_1':
+                return {'status': 'unavailable', 'error': 'OperationalError'}
+            return check_database(alias)
+
+        with mock.patch('products.health.check_database', side_effect=replica_down):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['status'], 'degraded')
+        self.assertEqual(data['databases']['default']['status'], 'ok')
+        self.assertEqual(data['databases']['replica_1']['status'], 'unavailable')
+
+    def test_pending_migrations(self):
+        plan = [(Migration('9999_next', 'products'), False)]
+        with mock.patch('products.health.MigrationExecutor.migration_plan', return_value=plan):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()['migrations'], {'status': 'pending', 'pending': ['products.9999_next']})
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.models import IdempotencyKey, Order, Product
+
+
+class IdempotentOrderCreateTest(APITestCase):
+    def setUp(self):
+        self.user = self.authenticate('testuser')
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+        self.url = reverse('order-list')
+        self.payload = {'items': [{'product': self.product.id, 'quantity': 2}]}
+
+    def authenticate(self, username):
+        user = User.objects.create_user(username=username, password='testpass123')
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return user
+
+    def post(self, payload=None, key='order-1'):
+        headers = {} if key is None else {'HTTP_IDEMPOTENCY_KEY': key}
+        return self.client.post(self.url, payload or self.payload, format='json', **headers)
+
+    def test_retry_replays_response(self):
+        first = self.post()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self.post()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertFalse([q for q in ctx.captured_queries if 'products_product' in q['sql']])
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+        self.assertEqual(IdempotencyKey.objects.get().order_id, first.data['id'])
+
+    def test_key_reused_for_another_request(self):
+        self.post()
+        response = self.post({'items': [{'product': self.product.id, 'quantity': 1}]})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_scoped_to_users(self):
+        self.post()
+        self.authenticate('other')
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_failed_requests_can_be_retried(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=1)
+        self.assertEqual(self.post().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        Product.objects.filter(pk=self.product.pk).update(stock=10)
+        self.assertEqual(self.post().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_creates_a_new_order(self):
+        self.post()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.post()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_without_key(self):
+        self.post(key=None)
+        self.post(key=None)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_invalid_key(self):
+        response = self.post(key='x' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Idempotency-Key', response.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_purge_expired_keys(self):
+        for key in ['a', 'b', 'c']:
+            self.post(key=key)
+        IdempotencyKey.objects.exclude(key='c').update(expires_at=timezone.now())
+        out = StringIO()
+        call_command('purge_idempotency_keys', batch_size=1, stdout=out)
+        self.assertIn('Deleted 2', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['c'])
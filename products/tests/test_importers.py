@@ -0,0 +1,137 @@
+import json
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.importers import CSV, NDJSON, ProductImporter, read_rows
+from products.models import Product
+
+
+def ndjson(*rows):
+    return [(json.dumps(row) + '\n').encode() for row in rows]
+
+
+class ProductImporterTest(TestCase):
+    def test_ndjson_import_reports_bad_rows(self):
+        lines = ndjson(
+            {'sku': 'A-1', 'name': 'Alpha', 'description': 'First', 'price': '1.50', 'stock': 3},
+            {'sku': 'A-2', 'name': 'Beta', 'description': 'Second', 'price': '-1', 'stock': 3},
+        ) + [b'not json\n'] + ndjson(
+            {'name': 'Gamma', 'description': 'No sku', 'price': '2.00', 'stock': 0},
+        )
+        report = ProductImporter(chunk_size=2).run(read_rows(lines, NDJSON))
+
+        self.assertEqual(report['rows'], 4)
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+        self.assertIn('price', report['errors'][0]['errors'])
+        self.assertEqual(Product.objects.get(sku='A-1').price, Decimal('1.50'))
+        self.assertIsNone(Product.objects.get(name='Gamma').sku)
+
+    def test_csv_insert_rejects_existing_sku(self):
+        Product.objects.create(sku='A-1', name='Old', description='Old', price=Decimal('1.00'), stock=1)
+        lines = [
+            b'sku,name,description,price,stock\n',
+            b'A-1,New,New,2.00,5\n',
+            b'A-2,Other,"Multi\n',
+            b'line",3.00,7\n',
+            b'A-2,Dup,Dup,3.00,7\n',
+        ]
+        report = ProductImporter().run(read_rows(lines, CSV))
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [1, 3])
+        self.assertEqual(Product.objects.get(sku='A-1').name, 'Old')
+        self.assertEqual(Product.objects.get(sku='A-2').description, 'Multi\nline')
+
+    def test_sku_inserted_concurrently_is_a_row_error(self):
+        lines = ndjson(
+            {'sku': 'A-1', 'name': 'Alpha', 'description': 'First', 'price': '1.00', 'stock': 1},
+            {'sku': 'A-2', 'name': 'Beta', 'description': 'Second', 'price': '1.00', 'stock': 1},
+            {'sku': 'A-2', 'name': 'Dup', 'description': 'Second again', 'price': '1.00', 'stock': 1},
+            {'sku': 'A-3', 'name': 'Gamma', 'description': 'Third', 'price': '-1', 'stock': 1},
+            {'sku': 'A-4', 'name': 'Delta', 'description': 'Fourth', 'price': '1.00', 'stock': 1},
+        )
+        check_skus = ProductImporter.check_skus
+
+        def then_insert_a_2(importer, valid):
+            valid = check_skus(importer, valid)
+            Product.objects.create(sku='A-2', name='Other', description='Other', price=Decimal('1.00'), stock=1)
+            return valid
+
+        with mock.patch.object(ProductImporter, 'check_skus', autospec=True, side_effect=then_insert_a_2):
+            report = ProductImporter().run(read_rows(lines, NDJSON))
+
+        self.assertEqual((report['imported'], report['failed']), (2, 3))
+        self.assertEqual(
+            [(error['row'], list(error['errors'])) for error in report['errors']],
+            [(2, ['sku']), (3, ['sku']), (4, ['price'])],
+        )
+        self.assertEqual(Product.objects.get(sku='A-2').name, 'Other')
+        self.assertEqual(
+            set(Product.objects.values_list('sku', flat=True)), {'A-1', 'A-2', 'A-4'}
+        )
+
+    def test_undecodable_and_malformed_lines_are_row_errors(self):
+        lines = [
+            b'sku,name,description,price,stock\n',
+            b'A-1,Caf\xe9,Latin-1,2.00,5\n',
+            b'A-2,Huge,' + b'x' * 200000 + b',2.00,5\n',
+            b'A-3,Fine,Fine,2.00,5\n',
+        ]
+        report = ProductImporter().run(read_rows(lines, CSV))
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [1, 2])
+        self.assertIn('utf-8', report['errors'][0]['errors']['non_field_errors'][0])
+        self.assertIn('Invalid CSV', report['errors'][1]['errors']['non_field_errors'][0])
+        self.assertTrue(Product.objects.filter(sku='A-3').exists())
+
+        lines = [b'\xff\xfe\n'] + ndjson(
+            {'sku': 'B-1', 'name': 'Beta', 'description': 'Ok', 'price': '1.00', 'stock': 1},
+        )
+        report = ProductImporter().run(read_rows(lines, NDJSON))
+        self.assertEqual((report['rows'], report['imported'], report['failed']), (2, 1, 1))
+
+    def test_upsert_updates_by_sku(self):
+        Product.objects.create(sku='A-1', name='Old', description='Old', price=Decimal('1.00'), stock=1)
+        lines = ndjson(
+            {'sku': 'A-1', 'name': 'First', 'description': 'New', 'price': '2.00', 'stock': 5},
+            {'sku': 'A-1', 'name': 'Last', 'description': 'New', 'price': '3.00', 'stock': 6},
+            {'sku': 'B-1', 'name': 'Fresh', 'description': 'New', 'price': '4.00', 'stock': 7},
+        )
+        report = ProductImporter(upsert=True).run(read_rows(lines, NDJSON))
+
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(Product.objects.count(), 2)
+        product = Product.objects.get(sku='A-1')
+        self.assertEqual((product.name, product.stock), ('Last', 6))
+
+
+class ProductImportViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        self.url = reverse('product-import-products')
+
+    def test_import_ndjson(self):
+        body = b''.join(ndjson(
+            {'sku': 'A-1', 'name': 'Alpha', 'description': 'First', 'price': '1.50', 'stock': 3},
+            {'sku': 'A-2', 'name': 'Beta', 'description': 'Second', 'price': '2.50', 'stock': 4},
+        ))
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_unsupported_content_type(self):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
@@ -0,0 +1,174 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products import intake
+from products.intake import process_jobs, purge_processed_jobs, run_worker
+from products.models import Order, OrderIntakeJob, Product, ProductSalesDaily
+
+
+class IntakeTestMixin:
+    def setUp(self):
+        self.user = self.authenticate('testuser')
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00'),
+                stock=10
+            )
+            for i in range(3)
+        ]
+
+    def authenticate(self, username):
+        user = User.objects.create_user(username=username, password='testpass123')
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return user
+
+    def enqueue(self, quantity=1, product=None, **headers):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': (product or self.products[0]).id, 'quantity': quantity}]
+        }, format='json', **headers)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response
+
+
+@override_settings(ORDER_INTAKE='async')
+class OrderIntakeTest(IntakeTestMixin, APITestCase):
+    def test_enqueue_and_process(self):
+        response = self.enqueue(2)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(response['Location'], response.data['url'])
+        self.assertFalse(Order.objects.exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 10)
+
+        out = StringIO()
+        call_command('run_order_workers', processes=1, drain=True, stdout=out)
+        self.assertIn('Processed 1 orders', out.getvalue())
+
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], 'placed')
+        self.assertIsNotNone(job['processed_at'])
+        order = Order.objects.get()
+        self.assertEqual(job['order'], order.id)
+        self.assertEqual(order.total_price, Decimal('20.00'))
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 8)
+        self.assertEqual(ProductSalesDaily.objects.get().units, 2)
+
+    def test_groups_are_committed_together(self):
+        for product in self.products:
+            self.enqueue(1, product)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(process_jobs(), 3)
+
+        for _ in range(4):
+            for product in self.products:
+                self.enqueue(2, product)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(process_jobs(), 12)
+
+        # Stock decrements are merged per product, so the group size does not add queries
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Order.objects.count(), 15)
+        self.assertEqual(
+            list(Product.objects.order_by('id').values_list('stock', flat=True)), [1, 1, 1]
+        )
+
+    def test_unavailable_stock_rejects_only_that_order(self):
+        self.enqueue(6)
+        self.enqueue(6)
+        self.enqueue(1, self.products[1])
+        process_jobs()
+        statuses = list(OrderIntakeJob.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(statuses, ['placed', 'rejected', 'placed'])
+        rejected = OrderIntakeJob.objects.get(status='rejected')
+        self.assertIn('Insufficient stock', rejected.errors['items'][0])
+        self.assertIsNone(rejected.order)
+
+    def test_invalid_orders_are_not_queued(self):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': self.products[0].id, 'quantity': 100}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OrderIntakeJob.objects.exists())
+
+    def test_jobs_are_private(self):
+        response = self.enqueue()
+        self.authenticate('other')
+        self.assertEqual(self.client.get(response['Location']).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_idempotent_retry_returns_the_same_job(self):
+        first = self.enqueue(HTTP_IDEMPOTENCY_KEY='order-1')
+        retry = self.enqueue(HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Location'], first['Location'])
+        self.assertEqual(OrderIntakeJob.objects.count(), 1)
+
+    # Without METRICS_TOKEN, /metrics is only open with DEBUG
+    @override_settings(DEBUG=True)
+    def test_metrics(self):
+        self.enqueue()
+        self.enqueue()
+        process_jobs(batch_size=1)
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('order_intake_queue_depth 1\n', body)
+        self.assertIn('order_intake_commit_seconds{quantile="0.5"}', body)
+
+    @override_settings(ORDER_INTAKE_RETENTION=60)
+    def test_purge_processed_jobs(self):
+        self.enqueue()
+        self.enqueue()
+        process_jobs()
+        self.enqueue()
+        OrderIntakeJob.objects.filter(status='placed').update(
+            processed_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(purge_processed_jobs(batch_size=1), 2)
+        self.assertEqual(list(OrderIntakeJob.objects.values_list('status', flat=True)), ['queued'])
+
+
+# Workers recover their connection after errors, which a TestCase's transaction would not survive
+@override_settings(ORDER_INTAKE='async', ORDER_INTAKE_MAX_ATTEMPTS=2)
+class OrderWorkerFailureTest(IntakeTestMixin, APITransactionTestCase):
+    def test_failing_job_is_rejected_and_the_worker_carries_on(self):
+        place_orders = intake.place_orders
+
+        def fail_on_three(payloads, **kwargs):
+            if any(item['quantity'] == 3 for payload in payloads for item in payload['items']):
+                raise DatabaseError('server closed the connection unexpectedly')
+            return place_orders(payloads, **kwargs)
+
+        for quantity in (1, 3, 2):
+            self.enqueue(quantity)
+        with mock.patch.object(intake, 'place_orders', side_effect=fail_on_three), \
+                mock.patch.object(intake, '_pause') as pause, \
+                self.assertLogs('products.intake', 'ERROR') as logs:
+            processed = run_worker(10, 0.1, lambda: False, drain=True)
+
+        self.assertEqual(processed, 2)
+        # The group, then the failing job on its own; job 1 placed in between resets the backoff
+        self.assertEqual([call.args[0] for call in pause.call_args_list], [0.2, 0.2, 0.4])
+        self.assertIn('DatabaseError', logs.output[0])
+        jobs = OrderIntakeJob.objects.order_by('id')
+        self.assertEqual(
+            [(job.status, job.attempts) for job in jobs],
+            [('placed', 0), ('rejected', 2), ('placed', 0)],
+        )
+        self.assertEqual(jobs[1].errors, {'detail': 'The order could not be placed.'})
+        self.assertIsNotNone(jobs[1].processed_at)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 7)
@@ -0,0 +1,122 @@
+import io
+from unittest import mock
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.inventory import reshard_stock, with_available_stock
+from products.models import Product, ProductStockShard
+from products import services
+from products.services import place_order
+
+
+def available(product):
+    return with_available_stock(Product.objects.filter(pk=product.pk)).values_list(
+        'available_stock', flat=True
+    ).get()
+
+
+class ShardedStockTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name="Hot Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+
+    def shard_stocks(self):
+        return list(self.product.stock_shards.order_by('shard').values_list('stock', flat=True))
+
+    def test_reshard_spreads_and_folds_back(self):
+        reshard_stock(self.product.pk, 4)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(self.shard_stocks(), [3, 3, 2, 2])
+
+        reshard_stock(self.product.pk, 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+        self.assertFalse(ProductStockShard.objects.exists())
+
+    def test_order_takes_from_one_shard(self):
+        reshard_stock(self.product.pk, 4)
+        before = self.shard_stocks()
+        place_order([{'product_id': self.product.pk, 'quantity': 2}])
+        changed = [b - a for a, b in zip(self.shard_stocks(), before) if a != b]
+        self.assertEqual(changed, [2])
+        self.assertEqual(available(self.product), 8)
+
+    def test_order_spanning_shards(self):
+        reshard_stock(self.product.pk, 4)
+        Product.objects.filter(pk=self.product.pk).update(stock=1)
+        place_order([{'product_id': self.product.pk, 'quantity': 10}])
+        self.assertEqual(available(self.product), 1)
+
+        with self.assertRaises(serializers.ValidationError):
+            place_order([{'product_id': self.product.pk, 'quantity': 2}])
+        self.assertEqual(available(self.product), 1)
+
+    def test_hot_products_are_taken_in_id_order(self):
+        products = [self.product] + [
+            Product.objects.create(name=f"Hot {i}", description="Test", price=Decimal('1.00'), stock=10)
+            for i in range(8)
+        ]
+        # Ids eight apart share a slot in a small set, which then keeps insertion order
+        low, high = products[0], products[8]
+        for product in (low, high):
+            reshard_stock(product.pk, 2)
+
+        with mock.patch.object(services, 'take_stock', wraps=services.take_stock) as take_stock:
+            place_order([{'product_id': high.pk, 'quantity': 1}, {'product_id': low.pk, 'quantity': 1}])
+        self.assertEqual([c.args[0] for c in take_stock.call_args_list], [low.pk, high.pk])
+
+    def test_command(self):
+        call_command('shard_stock', str(self.product.pk), shards=2, stdout=io.StringIO())
+        self.assertEqual(self.shard_stocks(), [5, 5])
+
+
+class ShardedStockViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.product = Product.objects.create(
+            name="Hot Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+        reshard_stock(self.product.pk, 3)
+
+    def test_serializer_reports_sum(self):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.pk, 'quantity': 4}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse('product-detail', args=[self.product.pk]))
+        self.assertEqual(response.data['stock'], 6)
+        response = self.client.get(reverse('product-list'))
+        self.assertEqual(response.data['results'][0]['stock'], 6)
+
+    def test_insufficient_stock(self):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.pk, 'quantity': 11}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_in_stock_filter(self):
+        url = reverse('product-list')
+        self.assertEqual(len(self.client.get(url, {'in_stock': 'true'}).data['results']), 1)
+        place_order([{'product_id': self.product.pk, 'quantity': 10}])
+        self.assertEqual(len(self.client.get(url, {'in_stock': 'true'}).data['results']), 0)
+        self.assertEqual(len(self.client.get(url, {'in_stock': 'false'}).data['results']), 1)
@@ -0,0 +1,120 @@
+import os
+import re
+import tempfile
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.metrics import MetricsRegistry, RequestMetrics, registry
+from products.models import Product
+
+
+def server_timing(response):
+    return {
+        match['name']: match
+        for match in re.finditer(
+            r'(?P<name>\w+)(?:;dur=(?P<dur>[\d.]+))?(?:;desc="(?P<desc>[^"]*)")?',
+            response['Server-Timing'],
+        )
+    }
+
+
+class RequestMetricsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+        registry.clear()
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = server_timing(response)
+        self.assertRegex(timing['db']['desc'], r'^[1-9]\d* queries$')
+        self.assertIn('serialize', timing)
+        self.assertGreaterEqual(float(timing['total']['dur']), float(timing['db']['dur']))
+        self.assertEqual(timing['response']['desc'], f'{len(response.content)} bytes')
+
+    async def test_async_views_are_measured(self):
+        response = await self.async_client.get(
+            reverse('async-product-list'), headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db', server_timing(response))
+
+    # Without METRICS_TOKEN, /metrics is only open with DEBUG
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint(self):
+        for _ in range(2):
+            self.client.get(reverse('product-detail', args=[self.product.id]))
+        self.client.get(reverse('product-detail', args=[0]))
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="product-detail",method="GET",le="+Inf"} 3',
+            body,
+        )
+        self.assertIn('http_responses_total{view="product-detail",method="GET",status="200"} 2', body)
+        self.assertIn('http_responses_total{view="product-detail",method="GET",status="404"} 1', body)
+        self.assertRegex(body, r'http_request_db_queries_total\{view="product-detail",method="GET"\} [1-9]')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_metrics_need_a_token_without_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(SLOW_QUERY_MS=1e-9)
+    def test_slow_query_log(self):
+        with self.assertLogs('products.metrics', 'WARNING') as logs:
+            self.client.get(reverse('order-list'))
+        self.assertIn('Slow query in order-list', logs.output[0])
+
+    def test_sampled_profiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_MS=0, PROFILE_DIR=directory):
+                self.client.get(reverse('order-list'))
+            with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_MS=60000, PROFILE_DIR=directory):
+                self.client.get(reverse('order-list'))
+            profiles = os.listdir(directory)
+        self.assertEqual(len(profiles), 1)
+        self.assertTrue(profiles[0].startswith('order-list-'))
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        metrics = RequestMetrics()
+        metrics.queries = 2
+        for duration in [0.001, 0.02, 0.02, 20]:
+            registry.observe('product-list', 'GET', 200, duration, metrics, 100)
+        body = registry.render()
+        for bound, count in [('0.005', 1), ('0.01', 1), ('0.025', 3), ('10.0', 3), ('+Inf', 4)]:
+            self.assertIn(
+                f'http_request_duration_seconds_bucket{{view="product-list",method="GET",le="{bound}"}} {count}',
+                body,
+            )
+        self.assertIn('http_request_duration_seconds_count{view="product-list",method="GET"} 4', body)
+        self.assertIn('http_request_db_queries_total{view="product-list",method="GET"} 8', body)
+        self.assertIn('http_response_size_bytes_total{view="product-list",method="GET"} 400', body)
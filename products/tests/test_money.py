@@ -0,0 +1,87 @@
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db.models import Sum
+from django.test import TestCase
+from products.models import Order, Product
+from products.money import Money
+from products.serializers import MoneyField, ProductSerializer
+
+
+class MoneyTest(TestCase):
+    def test_arithmetic_stays_in_minor_units(self):
+        total = sum([Money(1050) * 3, 2 * Money(5)])
+        self.assertEqual(total, Money(3160))
+        self.assertEqual((total - Money(160)).minor, 3000)
+        self.assertEqual(-Money(1), Money(-1))
+        with self.assertRaises(TypeError):
+            Money(100) * Decimal('1.5')
+        with self.assertRaises(ValueError):
+            Money(100) + Money(100, 'EUR')
+
+    def test_compares_and_hashes_like_decimal(self):
+        self.assertEqual(Money(1050), Decimal('10.50'))
+        self.assertEqual(Money(1000), 10)
+        self.assertLess(Money(999), Decimal('10'))
+        self.assertEqual(hash(Money(1050)), hash(Decimal('10.50')))
+        self.assertNotEqual(Money(1050), '10.50')
+
+    def test_formatting(self):
+        self.assertEqual(str(Money(1050)), '10.50')
+        self.assertEqual(str(Money(-5)), '-0.05')
+        self.assertEqual(str(Money(1050, 'JPY')), '1050')
+        self.assertEqual(str(Money(1050, 'KWD')), '1.050')
+        self.assertEqual(f'{Money(1050):f}', '10.50')
+
+    def test_from_amount_rounds_half_to_even(self):
+        self.assertEqual(Money.from_amount('10.005').minor, 1000)
+        self.assertEqual(Money.from_amount(Decimal('10.015')).minor, 1002)
+        self.assertEqual(Money.from_amount(7).minor, 700)
+
+
+class MoneyFieldTest(TestCase):
+    def setUp(self):
+        self.cheap = Product.objects.create(name='Cheap', description='', price=Decimal('9.99'), stock=1)
+        self.dear = Product.objects.create(name='Dear', description='', price='10.00', stock=1)
+
+    def test_stored_as_minor_units(self):
+        self.assertIsInstance(self.dear.price, Money)
+        self.assertEqual(
+            list(Product.objects.order_by('price').values_list('price', flat=True)),
+            [Money(999), Money(1000)],
+        )
+        self.assertEqual(
+            list(Product.objects.filter(price__lte=Decimal('9.99')).values_list('pk', flat=True)),
+            [self.cheap.pk],
+        )
+        self.assertEqual(Product.objects.aggregate(total=Sum('price'))['total'], Money(1999))
+
+    def test_invalid_amount(self):
+        product = Product(name='Bad', description='', price='ten', stock=1)
+        with self.assertRaises(ValidationError):
+            product.full_clean()
+
+    def test_wire_format(self):
+        data = ProductSerializer(self.cheap).data
+        self.assertEqual(data['price'], '9.99')
+
+        serializer = ProductSerializer(data={'name': 'New', 'description': 'New', 'price': '5.5', 'stock': 1})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['price'], Money(550))
+
+        for price in ['0.00', '1.234', '123456789.00']:
+            serializer = ProductSerializer(data={'name': 'New', 'description': 'New', 'price': price, 'stock': 1})
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('price', serializer.errors)
+
+    def test_serializer_field_accepts_decimals(self):
+        field = MoneyField(max_digits=10)
+        self.assertEqual(field.to_representation(Decimal('3.1')), '3.10')
+        self.assertEqual(
+            MoneyField(max_digits=10, coerce_to_string=False).to_representation(Money(310)),
+            Decimal('3.10'),
+        )
+
+    def test_order_total(self):
+        order = Order.objects.create(total_price=Money(1) * 3)
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('0.03'))
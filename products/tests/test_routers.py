@@ -0,0 +1,131 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.models import Product
+from products.routers import STICKY_COOKIE, PrimaryReplicaRouter, choose_replica, replica_reads
+
+
+# TestCase wraps each test in a transaction, which keeps every read on the primary
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class PrimaryReplicaRouterTest(TransactionTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_need_opt_in(self):
+        self.assertIsNone(self.router.db_for_read(Product))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Product), 'replica_1')
+        with replica_reads(False):
+            self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_transactions_stay_on_primary(self):
+        with replica_reads(), transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(Product))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Product))
+
+
+# The test databases of replicas mirror the primary, so "default" stands in
+# for a replica and the router's choices are observed instead
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingViewTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+        patcher = mock.patch('products.routers.choose_replica', wraps=choose_replica)
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_product_reads_use_replicas(self):
+        response = self.client.get(reverse('product-detail', args=[self.product.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.choose_replica.called)
+
+    def test_orders_stay_on_primary(self):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.id, 'quantity': 1}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.get(reverse('order-list'))
+        self.assertFalse(self.choose_replica.called)
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.id, 'quantity': 1}]
+        }, format='json')
+        response = self.client.get(reverse('product-detail', args=[self.product.id]))
+        self.assertEqual(response.data['stock'], 9)
+        self.assertFalse(self.choose_replica.called)
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {str(RefreshToken.for_user(other).access_token)}'
+        )
+        self.client.get(reverse('product-list'))
+        self.assertTrue(self.choose_replica.called)
+
+    def test_pin_reaches_workers_with_their_own_cache(self):
+        self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.id, 'quantity': 1}]
+        }, format='json')
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'another-process',
+        }}):
+            # Caches the user in the other worker, which reads it from the primary
+            self.client.get(reverse('order-list'))
+            self.client.get(reverse('product-detail', args=[self.product.id]))
+            self.assertFalse(self.choose_replica.called)
+
+            # A forged pin is ignored
+            self.client.cookies[STICKY_COOKIE] = str(self.user.pk)
+            self.client.get(reverse('product-list'))
+            self.assertTrue(self.choose_replica.called)
+
+    def test_writer_is_not_served_responses_cached_from_a_replica(self):
+        url = reverse('product-detail', args=[self.product.id])
+        self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.id, 'quantity': 1}]
+        }, format='json')
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {str(RefreshToken.for_user(other).access_token)}'
+        )
+        # The replica has not replayed the order yet when the other user warms the cache
+        Product.objects.filter(pk=self.product.pk).update(stock=10)
+        stale = self.client.get(url)
+        self.assertEqual(stale.data['stock'], 10)
+        self.assertTrue(self.choose_replica.called)
+        Product.objects.filter(pk=self.product.pk).update(stock=9)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {str(RefreshToken.for_user(self.user).access_token)}'
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data['stock'], 9)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=stale['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 9)
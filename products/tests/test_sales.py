@@ -0,0 +1,174 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from products.inventory import reshard_stock
+from products.models import Order, OrderItem, Product, ProductSalesDaily
+
+
+class SalesRollupTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00') * (i + 1),
+                stock=100
+            )
+            for i in range(3)
+        ]
+        self.today = timezone.localdate()
+
+    def order(self, *quantities):
+        response = self.client.post(reverse('order-list'), {
+            'items': [
+                {'product': product.id, 'quantity': quantity}
+                for product, quantity in zip(self.products, quantities) if quantity
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def rollups(self):
+        return {
+            (row['product_id'], row['day'], row['status']): (row['units'], row['revenue'])
+            for row in ProductSalesDaily.objects.values('product_id', 'day', 'status', 'units', 'revenue')
+        }
+
+    def test_orders_update_rollups(self):
+        self.order(2, 1)
+        self.order(1, 0, 3)
+        self.client.post(reverse('order-batch'), {
+            'orders': [{'items': [{'product': self.products[0].id, 'quantity': 4}]}]
+        }, format='json')
+        self.assertEqual(self.rollups(), {
+            (self.products[0].id, self.today, 'pending'): (7, Decimal('70.00')),
+            (self.products[1].id, self.today, 'pending'): (1, Decimal('20.00')),
+            (self.products[2].id, self.today, 'pending'): (3, Decimal('90.00')),
+        })
+
+    def test_rejected_orders_are_not_counted(self):
+        response = self.client.post(reverse('order-list'), {
+            'items': [{'product': self.products[0].id, 'quantity': 1000}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProductSalesDaily.objects.exists())
+
+    def test_hot_products_spread_over_shards(self):
+        reshard_stock(self.products[0].id, 4)
+        for _ in range(10):
+            self.order(1)
+        rows = ProductSalesDaily.objects.filter(product=self.products[0])
+        self.assertLessEqual(rows.count(), 4)
+        self.assertEqual(sum(rows.values_list('units', flat=True)), 10)
+        self.assertTrue(all(0 <= shard < 4 for shard in rows.values_list('shard', flat=True)))
+        response = self.client.get(reverse('sales-top-sellers'))
+        self.assertEqual(response.data['results'][0]['units'], 10)
+
+    def test_status_changes_move_rollups(self):
+        self.order(2, 1)
+        self.order(1)
+        first, second = Order.objects.order_by('id')
+        first.status = 'completed'
+        first.save()
+        # Saves that keep the status move nothing
+        first.save()
+        second.save(update_fields=['updated_at'])
+
+        self.assertEqual(self.rollups(), {
+            (self.products[0].id, self.today, 'pending'): (1, Decimal('10.00')),
+            (self.products[0].id, self.today, 'completed'): (2, Decimal('20.00')),
+            (self.products[1].id, self.today, 'pending'): (0, Decimal('0.00')),
+            (self.products[1].id, self.today, 'completed'): (1, Decimal('20.00')),
+        })
+
+        second.refresh_from_db()
+        second.status = 'completed'
+        second.save(update_fields=['status'])
+        response = self.client.get(reverse('sales-top-sellers'), {'status': 'completed'})
+        self.assertEqual(
+            [(row['product'], row['units']) for row in response.data['results']],
+            [(self.products[0].id, 3), (self.products[1].id, 1)],
+        )
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.order(2, 1)
+        self.order(1, 0, 3)
+        # Orders written without place_orders, e.g. by populate_db
+        old = Order.objects.create(total_price=Decimal('30.00'), status='completed')
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=3))
+        OrderItem.objects.create(order=old, product=self.products[1], quantity=1, price=Decimal('30.00'))
+        expected = {
+            **self.rollups(),
+            (self.products[1].id, self.today - timedelta(days=3), 'completed'): (1, Decimal('30.00')),
+        }
+
+        ProductSalesDaily.objects.update(units=0)
+        call_command('rebuild_sales_rollups', chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.rollups(), expected)
+
+    def test_top_sellers(self):
+        self.order(1, 2, 0)
+        self.order(1, 0, 1)
+        response = self.client.get(reverse('sales-top-sellers'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['end'], str(self.today + timedelta(days=1)))
+        self.assertEqual(
+            [(row['product'], row['product_name'], row['units'], row['revenue'])
+             for row in response.data['results']],
+            [
+                (self.products[0].id, 'Product 0', 2, '20.00'),
+                (self.products[1].id, 'Product 1', 2, '40.00'),
+                (self.products[2].id, 'Product 2', 1, '30.00'),
+            ],
+        )
+
+        response = self.client.get(reverse('sales-top-sellers'), {'by': 'revenue', 'limit': 1})
+        self.assertEqual([row['product'] for row in response.data['results']], [self.products[1].id])
+
+        response = self.client.get(reverse('sales-top-sellers'), {'status': 'completed'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_revenue(self):
+        self.order(1, 2, 0)
+        start = self.today - timedelta(days=2)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('sales-revenue'), {
+                'start': start, 'end': self.today + timedelta(days=1)
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['units'], 3)
+        self.assertEqual(response.data['revenue'], '50.00')
+        self.assertEqual(
+            [(day['day'], day['units'], day['revenue']) for day in response.data['days']],
+            [
+                (str(start), 0, '0.00'),
+                (str(start + timedelta(days=1)), 0, '0.00'),
+                (str(self.today), 3, '50.00'),
+            ],
+        )
+
+        response = self.client.get(reverse('sales-revenue'), {'product': self.products[1].id})
+        self.assertEqual(response.data['revenue'], '40.00')
+        self.assertEqual(len(response.data['days']), 7)
+
+    def test_invalid_ranges(self):
+        for params in [
+            {'start': self.today, 'end': self.today},
+            {'start': self.today - timedelta(days=400), 'end': self.today},
+            {'limit': 0},
+        ]:
+            response = self.client.get(reverse('sales-top-sellers'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
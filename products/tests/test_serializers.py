@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from products.models import Product, OrderItem
+from products.serializers import OrderSerializer
+from rest_framework.exceptions import ValidationError
+from decimal import Decimal
+
+
+class OrderSerializerTest(TestCase):
+    def setUp(self):
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00'),
+                stock=10
+            )
+            for i in range(5)
+        ]
+
+    def place(self, items):
+        serializer = OrderSerializer(data={'items': items})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def count_queries(self, items):
+        with CaptureQueriesContext(connection) as ctx:
+            self.place(items)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_item_count(self):
+        single = self.count_queries([{'product': self.products[0].id, 'quantity': 1}])
+        many = self.count_queries([
+            {'product': product.id, 'quantity': 1} for product in self.products
+        ])
+        self.assertEqual(single, many)
+
+    def test_create_order_decrements_stock_and_totals(self):
+        order = self.place([
+            {'product': self.products[0].id, 'quantity': 2},
+            {'product': self.products[1].id, 'quantity': 3},
+        ])
+        self.assertEqual(order.total_price, Decimal('50.00'))
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 2)
+        self.products[0].refresh_from_db()
+        self.products[1].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 8)
+        self.assertEqual(self.products[1].stock, 7)
+
+    def test_repeated_product_lines_are_checked_together(self):
+        serializer = OrderSerializer(data={'items': [
+            {'product': self.products[0].id, 'quantity': 6},
+            {'product': self.products[0].id, 'quantity': 6},
+        ]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('items', serializer.errors)
+
+    def test_unknown_product(self):
+        serializer = OrderSerializer(data={'items': [{'product': 999999, 'quantity': 1}]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('items', serializer.errors)
+
+    def test_stock_never_goes_negative(self):
+        # Stock drops between validation and save, as with a concurrent buyer
+        serializer = OrderSerializer(data={'items': [
+            {'product': self.products[0].id, 'quantity': 8},
+            {'product': self.products[1].id, 'quantity': 1},
+        ]})
+        self.assertTrue(serializer.is_valid())
+        Product.objects.filter(pk=self.products[0].pk).update(stock=5)
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
+        self.products[0].refresh_from_db()
+        self.products[1].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 5)
+        self.assertEqual(self.products[1].stock, 10)
+        self.assertFalse(OrderItem.objects.exists())
@@ -1,9 +1,16 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
-from products.models import Product
+from django.core.cache import cache
+from products.cache import bump_catalog_version
+from products.models import Product, Order, OrderItem
+from datetime import timedelta
 from decimal import Decimal
+from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -96,3 +103,406 @@ class OrderViewSetTest(APITestCase):
         # Verify stock wasn't changed
         self.product.refresh_from_db()
         self.assertEqual(self.product.stock, 10)
+
+
+class ProductKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        for i in range(25):
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal(10 + i % 5),
+                stock=10
+            )
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_catalog_once(self):
+        url = reverse('product-list') + '?pagination=keyset&page_size=7'
+        ids = self.walk(url)
+        self.assertEqual(ids, list(Product.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+    def test_price_ordering_breaks_ties_on_id(self):
+        url = reverse('product-list') + '?pagination=keyset&ordering=-price&page_size=4'
+        ids = self.walk(url)
+        self.assertEqual(ids, list(Product.objects.order_by('-price', '-id').values_list('id', flat=True)))
+
+    def test_previous_link_returns_prior_page(self):
+        url = reverse('product-list') + '?pagination=keyset&page_size=5'
+        first = self.client.get(url).data
+        second = self.client.get(first['next']).data
+        self.assertIsNone(first['previous'])
+        self.assertNotIn('count', first)
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('product-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deep_page_query_count_matches_first_page(self):
+        url = reverse('product-list') + '?pagination=keyset&page_size=5'
+        self.client.get(reverse('order-list'))  # Warm the authentication cache
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url)
+        for _ in range(3):
+            url = response.data['next']
+            with CaptureQueriesContext(connection) as deep:
+                response = self.client.get(url)
+        self.assertEqual(len(first.captured_queries), len(deep.captured_queries))
+
+
+class ProductResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+        self.url = reverse('product-detail', args=[self.product.id])
+
+    def test_repeated_read_skips_database(self):
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock'], 10)
+        self.assertLess(len(warm.captured_queries), len(cold.captured_queries))
+
+    def test_order_placement_invalidates(self):
+        self.client.get(self.url)
+        self.client.post(reverse('order-list'), {
+            'items': [{'product': self.product.id, 'quantity': 3}]
+        }, format='json')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['stock'], 7)
+
+    def test_product_create_invalidates_list(self):
+        url = reverse('product-list')
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        self.client.post(url, {
+            'name': 'New Product',
+            'description': 'New Description',
+            'price': '15.00',
+            'stock': 20
+        }, format='json')
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+    def test_bump_from_another_process_invalidates(self):
+        self.client.get(self.url)
+        # Processes such as order workers have their own local-memory cache
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'another-process',
+        }}):
+            Product.objects.filter(pk=self.product.pk).update(stock=4)
+            bump_catalog_version()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['stock'], 4)
+
+    def test_etag_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Product.objects.filter(pk=self.product.pk).first().save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class OrderBatchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00'),
+                stock=10
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('order-batch')
+
+    def order(self, *lines):
+        return {'items': [{'product': product.id, 'quantity': quantity} for product, quantity in lines]}
+
+    def test_batch_creates_all_orders(self):
+        response = self.client.post(self.url, {'orders': [
+            self.order((self.products[0], 2)),
+            self.order((self.products[0], 3), (self.products[1], 1)),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created', 'created'])
+        self.assertEqual(response.data['results'][1]['order']['total_price'], '40.00')
+        self.assertEqual(Order.objects.count(), 2)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 5)
+
+    def test_all_or_nothing_rejects_whole_batch(self):
+        response = self.client.post(self.url, {'orders': [
+            self.order((self.products[0], 6)),
+            self.order((self.products[0], 6)),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([r['status'] for r in response.data['results']], ['error', 'error'])
+        self.assertEqual(Order.objects.count(), 0)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 10)
+
+    def test_best_effort_reports_each_order(self):
+        response = self.client.post(self.url, {'atomic': False, 'orders': [
+            self.order((self.products[0], 6)),
+            self.order((self.products[0], 6)),
+            {'items': [{'product': 999999, 'quantity': 1}]},
+            self.order((self.products[1], 1)),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [r['status'] for r in response.data['results']],
+            ['created', 'error', 'error', 'created']
+        )
+        self.assertEqual(Order.objects.count(), 2)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 4)
+
+    def test_query_count_independent_of_batch_size(self):
+        def count(size):
+            orders = [self.order((self.products[i % 3], 1)) for i in range(size)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url, {'orders': orders}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.client.get(reverse('order-list'))  # Warm the authentication cache
+        self.assertEqual(count(2), count(9))
+
+
+class ProductSearchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.laptop = Product.objects.create(
+            name="Acme Premium Laptop",
+            description="A wireless keyboard is included",
+            price=Decimal('900.00'),
+            stock=5
+        )
+        self.keyboard = Product.objects.create(
+            name="Acme Wireless Keyboard",
+            description="Pairs with any laptop",
+            price=Decimal('50.00'),
+            stock=5
+        )
+        Product.objects.create(
+            name="Garden Chair",
+            description="Weatherproof",
+            price=Decimal('30.00'),
+            stock=5
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse('product-list'), {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_ranks_name_matches_first(self):
+        self.assertEqual(self.search('keyboard'), [self.keyboard.id, self.laptop.id])
+        self.assertEqual(self.search('laptop'), [self.laptop.id, self.keyboard.id])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('weatherpr'), [Product.objects.get(name="Garden Chair").id])
+
+    def test_index_follows_updates(self):
+        self.keyboard.name = "Acme Trackpad"
+        self.keyboard.description = "Smooth"
+        self.keyboard.save()
+        self.assertEqual(self.search('keyboard'), [self.laptop.id])
+        self.assertEqual(self.search('trackpad'), [self.keyboard.id])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('"laptop ('), [self.laptop.id, self.keyboard.id])
+        self.assertEqual(self.search('***'), [])
+
+
+class ProductSparseFieldsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.product = Product.objects.create(
+            name="Test Product",
+            description="Test Description",
+            price=Decimal('10.00'),
+            stock=10
+        )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        product_queries = [q['sql'] for q in ctx.captured_queries if 'products_product' in q['sql']]
+        return response, product_queries
+
+    def test_fields_trims_list_and_skips_columns(self):
+        response, queries = self.get(reverse('product-list'), {'fields': 'id,name,price,stock'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name', 'price', 'stock'])
+        self.assertTrue(queries)
+        for sql in queries:
+            self.assertNotIn('"description"', sql)
+
+    def test_exclude_on_retrieve(self):
+        url = reverse('product-detail', args=[self.product.id])
+        response, queries = self.get(url, {'exclude': 'description,sku'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ['id', 'name', 'price', 'stock'])
+        self.assertNotIn('"description"', queries[0])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('product-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OrderReadTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                description="Test Description",
+                price=Decimal('10.00'),
+                stock=10
+            )
+            for i in range(5)
+        ]
+
+    def create_orders(self, count, items, status='pending'):
+        orders = []
+        for _ in range(count):
+            order = Order.objects.create(total_price=Decimal('10.00') * items, status=status)
+            for product in self.products[:items]:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+            orders.append(order)
+        return orders
+
+    def count_queries(self, params, url=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url or reverse('order-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+
+    def test_list_includes_items(self):
+        [order] = self.create_orders(1, 2)
+        response = self.client.get(reverse('order-list'))
+        self.assertEqual(response.data['results'][0]['id'], order.id)
+        self.assertEqual(response.data['results'][0]['items'], [
+            {'product': self.products[0].id, 'product_name': 'Product 0', 'quantity': 1, 'price': '10.00'},
+            {'product': self.products[1].id, 'product_name': 'Product 1', 'quantity': 1, 'price': '10.00'},
+        ])
+
+    def test_query_count_is_constant(self):
+        self.create_orders(2, 1)
+        self.client.get(reverse('order-list'))  # Warm the authentication cache
+        response, small = self.count_queries({'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_orders(20, 5)
+        response, large = self.count_queries({'page_size': 20})
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(small, large)
+
+        _, next_page = self.count_queries({}, url=response.data['next'])
+        self.assertEqual(next_page, large)
+
+    def test_trimmed_items_are_not_prefetched(self):
+        self.create_orders(3, 2)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('order-list'), {'fields': 'id,status'})
+        self.assertEqual(list(response.data['results'][0]), ['id', 'status'])
+        self.assertFalse([q for q in ctx.captured_queries if 'products_orderitem' in q['sql']])
+
+    def test_retrieve(self):
+        [order] = self.create_orders(1, 3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('order-detail', args=[order.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['items']), 3)
+        self.assertFalse([q for q in ctx.captured_queries if 'products_product"' in q['sql']
+                          and '"description"' in q['sql']])
+
+    def test_keyset_pages_newest_first(self):
+        orders = self.create_orders(5, 1)
+        ids, url = [], reverse('order-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, [order.id for order in reversed(orders)])
+
+    def test_filter_by_status_and_date(self):
+        pending = self.create_orders(2, 1)
+        completed = self.create_orders(1, 1, status='completed')
+        Order.objects.filter(pk=pending[0].pk).update(created_at=timezone.now() - timedelta(days=10))
+
+        response = self.client.get(reverse('order-list'), {'status': 'completed'})
+        self.assertEqual([item['id'] for item in response.data['results']], [completed[0].id])
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('order-list'), {'status': 'pending', 'created_after': since})
+        self.assertEqual([item['id'] for item in response.data['results']], [pending[1].id])
+
+        response = self.client.get(reverse('order-list'), {'created_before': since})
+        self.assertEqual([item['id'] for item in response.data['results']], [pending[0].id])
+
+    def test_invalid_filters(self):
+        for params in ({'status': 'shipped'}, {'ordering': 'total_price'},
+                       {'created_after': '2024-02-01', 'created_before': '2024-01-01'}):
+            response = self.client.get(reverse('order-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
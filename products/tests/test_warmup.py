@@ -0,0 +1,31 @@
+import logging
+from django.db import connection
+from django.test import TransactionTestCase
+from products.fastpath import _compile
+from products.metrics import registry
+from products.warmup import warm_up
+
+
+# The dummy request ends like any other and may close the connection,
+# which a TestCase's transaction would not survive
+class WarmUpTest(TransactionTestCase):
+    def test_reports_every_step(self):
+        _compile.cache_clear()
+        timings = warm_up()
+
+        self.assertEqual(list(timings), ['urls', 'serializers', 'database', 'response'])
+        self.assertTrue(all(ms >= 0 for ms in timings.values()))
+        self.assertEqual(_compile.cache_info().currsize, 1)
+
+    def test_leaves_no_trace(self):
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        with self.assertNoLogs('django.request', logging.WARNING):
+            warm_up()
+
+        self.assertEqual(request_logger.level, level)
+        self.assertNotIn('product-list', registry.render())
+
+    def test_keep_connections(self):
+        warm_up(keep_connections=True)
+        self.assertIsNotNone(connection.connection)
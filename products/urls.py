@@ -1,11 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, OrderViewSet
+from . import async_views
+from .views import OrderIntakeViewSet, OrderViewSet, ProductViewSet, SalesViewSet
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
+router.register(r'orders/intake', OrderIntakeViewSet, basename='order-intake')
 router.register(r'orders', OrderViewSet)
+router.register(r'sales', SalesViewSet, basename='sales')
+
+# Async twins of the read endpoints, for deployments behind an ASGI server
+async_urlpatterns = [
+    path('products/', async_views.product_list, name='async-product-list'),
+    path('products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('orders/', async_views.order_list, name='async-order-list'),
+    path('orders/<int:pk>/', async_views.order_detail, name='async-order-detail'),
+]
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/', include(async_urlpatterns)),
 ]
@@ -1,26 +1,253 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
-from .models import Product, Order
-from .serializers import ProductSerializer, OrderSerializer
+from rest_framework.response import Response
+from .cache import CatalogCacheMixin
+from .changes import encode_position, head_position, wait_for_changes
+from .exporters import CSVRenderer, NDJSONRenderer, streaming_response
+from .fastpath import FastListMixin, compile_serializer
+from . import sales
+from .filters import change_feed_params, list_orders, list_products, sales_params
+from .health import readiness
+from .idempotency import IdempotentCreateMixin
+from .intake import QueuedCreateMixin
+from .importers import FORMATS, ProductImporter, read_rows
+from .inventory import with_available_stock
+from .metrics import registry
+from .models import Product, Order, OrderIntakeJob
+from .pagination import CustomPagination, KeysetPagination, OrderKeysetPagination
+from .routers import ReplicaRoutingMixin
+from .serializers import (
+    ProductSerializer, OrderSerializer, OrderBatchSerializer, OrderIntakeJobSerializer,
+    RevenueReportSerializer, TopSellersReportSerializer, order_prefetches,
+)
 
 
-class CustomPagination(PageNumberPagination):
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class SparseFieldsViewMixin:
+    """Defer the columns of fields trimmed away by ``?fields=``/``?exclude=``."""
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            deferred = self.get_serializer().deferred_model_fields()
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return queryset
 
-class ProductViewSet(viewsets.ModelViewSet):
+
+class ProductViewSet(ReplicaRoutingMixin, CatalogCacheMixin, SparseFieldsViewMixin, FastListMixin,
+                     viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Product.objects.all()
+    replica_reads = True
+    queryset = Product.objects.defer('search_vector')
     serializer_class = ProductSerializer
     http_method_names = ['get', 'post']
     pagination_class = CustomPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET' and 'stock' in self.get_serializer().fields:
+            queryset = with_available_stock(queryset)
+        if self.action != 'list':
+            return queryset
+        return list_products(queryset, self.request.query_params)
+
+    @property
+    def paginator(self):
+        # Keyset pagination is opt-in via ?pagination=keyset or a cursor
+        if not hasattr(self, '_paginator'):
+            if KeysetPagination.is_requested(self.request):
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        return streaming_response('products', request.accepted_renderer.format)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Products changed after the ``since`` cursor, once each, in commit order.
+
+        Each result carries the kinds of change seen and the product's current
+        representation, or ``null`` once deleted; ``cursor`` continues the feed.
+        """
+        params = change_feed_params(request.query_params)
+        if 'since' not in params:
+            return Response({'cursor': encode_position(head_position()), 'has_more': False, 'results': []})
 
-class OrderViewSet(viewsets.ModelViewSet):
+        changes, position, has_more = wait_for_changes(params['since'], params['limit'], params['wait'])
+        products = self.represent_products(changes)
+        return Response({
+            'cursor': encode_position(position),
+            'has_more': has_more,
+            'results': [
+                {'id': product_id, 'changes': kinds, 'product': products.get(product_id)}
+                for product_id, kinds in changes.items()
+            ],
+        })
+
+    def represent_products(self, product_ids):
+        """The current representation of each of ``product_ids`` that still exists, by id."""
+        if not product_ids:
+            return {}
+        queryset = self.get_queryset().filter(pk__in=product_ids)
+        plan = compile_serializer(self.get_serializer())
+        if plan is None:
+            products = list(queryset)
+            return dict(zip(
+                (product.pk for product in products),
+                self.get_serializer(products, many=True).data,
+            ))
+        rows = list(queryset.values_list('pk', *plan.sources))
+        return dict(zip((row[0] for row in rows), plan.to_representation(row[1:] for row in rows)))
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_products(self, request):
+        # The body is read line by line and never handed to a parser
+        fmt = FORMATS.get(request.content_type.split(';')[0].strip())
+        if fmt is None:
+            return Response(
+                {'detail': f"Unsupported content type, expected one of: {', '.join(FORMATS)}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        importer = ProductImporter(upsert=request.query_params.get('mode') == 'upsert')
+        report = importer.run(read_rows(request._request, fmt))
+        return Response(report)
+
+
+class OrderViewSet(ReplicaRoutingMixin, SparseFieldsViewMixin, IdempotentCreateMixin,
+                   QueuedCreateMixin, mixins.CreateModelMixin, mixins.ListModelMixin,
+                   mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
-    http_method_names = ['post']
-    pagination_class = CustomPagination
+    http_method_names = ['get', 'post']
+    pagination_class = OrderKeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        if 'items' in self.get_serializer().fields:
+            queryset = queryset.prefetch_related(*order_prefetches())
+        if self.action != 'list':
+            return queryset
+        return list_orders(queryset, self.request.query_params)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        prefetch_related_objects([serializer.instance], *order_prefetches())
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        return streaming_response('orders', request.accepted_renderer.format)
+
+    @action(detail=False, methods=['post'], serializer_class=OrderBatchSerializer)
+    def batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+
+        orders = [order for order, _ in results if order is not None]
+        prefetch_related_objects(orders, *order_prefetches())
+        body = [
+            {'status': 'created', 'order': OrderSerializer(order).data}
+            if order is not None else
+            {'status': 'error', 'errors': errors}
+            for order, errors in results
+        ]
+
+        if not orders:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(orders) < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({'results': body}, status=response_status)
+
+
+class OrderIntakeViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Status of the caller's queued orders, see ``products.intake``."""
+    permission_classes = [IsAuthenticated]
+    queryset = OrderIntakeJob.objects.all()
+    serializer_class = OrderIntakeJobSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+
+class SalesViewSet(ReplicaRoutingMixin, viewsets.ViewSet):
+    """
+    Sales reports answered from the daily rollups, see ``products.sales``.
+
+    Their cost depends on the number of products and days in the range,
+    not on the size of the order history.
+    """
+    permission_classes = [IsAuthenticated]
+    replica_reads = True
+
+    @action(detail=False, methods=['get'], url_path='top-sellers')
+    def top_sellers(self, request):
+        params = sales_params(request.query_params)
+        results = sales.top_sellers(
+            params['start'], params['end'], params.get('status'), params['by'], params['limit']
+        )
+        return Response(TopSellersReportSerializer({**params, 'results': results}).data)
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        params = sales_params(request.query_params)
+        days = sales.daily_sales(
+            params['start'], params['end'], params.get('status'), params.get('product')
+        )
+        return Response(RevenueReportSerializer({
+            **params,
+            'units': sum(day['units'] for day in days),
+            'revenue': sum(day['revenue'] for day in days),
+            'days': days,
+        }).data)
+
+
+def operator_request(request):
+    """Whether ``request`` may see internals: it carries ``METRICS_TOKEN``, or ``DEBUG`` is on without one."""
+    token = settings.METRICS_TOKEN
+    if not token:
+        return bool(settings.DEBUG)
+    return constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics(request):
+    """
+    Request metrics of this process in the Prometheus text format.
+
+    Requires ``METRICS_TOKEN`` as a bearer token; without one configured the
+    endpoint is only open with ``DEBUG``.
+    """
+    if not operator_request(request):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED if settings.METRICS_TOKEN
+                            else status.HTTP_403_FORBIDDEN)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def healthz(request):
+    """Liveness: the process answers, whatever the state of the databases."""
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    """
+    Readiness: the primary answers and all migrations are applied, see ``products.health``.
+
+    Probes only get the status; the details need ``operator_request()``.
+    """
+    result = readiness()
+    body = result if operator_request(request) else {'status': result['status']}
+    return JsonResponse(body, status=status.HTTP_503_SERVICE_UNAVAILABLE
+                        if result['status'] == 'unavailable' else status.HTTP_200_OK)
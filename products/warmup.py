@@ -0,0 +1,119 @@
+import io
+import logging
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.urls import get_resolver, reverse
+from rest_framework.serializers import Serializer
+
+from .fastpath import compile_serializer
+from .metrics import registry
+from .models import Product
+from .serializers import OrderBatchSerializer, OrderSerializer, ProductSerializer
+
+# Routes taken by most traffic, resolved once so their patterns are compiled
+WARM_ROUTES = [
+    ('product-list', {}),
+    ('product-detail', {'pk': 1}),
+    ('order-list', {}),
+    ('order-detail', {'pk': 1}),
+    ('order-batch', {}),
+    ('async-product-list', {}),
+    ('async-order-list', {}),
+]
+# Answers 401 without credentials, which still runs the middleware, URL
+# resolution, authentication, the exception handler and the renderer
+DUMMY_REQUEST_PATH = '/api/products/'
+
+
+def resolve_urls():
+    resolver = get_resolver()
+    for name, kwargs in WARM_ROUTES:
+        resolver.resolve(reverse(name, kwargs=kwargs))
+
+
+def _build_fields(serializer):
+    # ModelSerializer introspects the model the first time fields are read
+    for field in serializer.fields.values():
+        field = getattr(field, 'child', field)
+        if isinstance(field, Serializer):
+            _build_fields(field)
+
+
+def build_serializers():
+    for serializer_class in [ProductSerializer, OrderSerializer, OrderBatchSerializer]:
+        _build_fields(serializer_class())
+    compile_serializer(ProductSerializer())
+
+
+def open_connections():
+    for alias in connections:
+        connections[alias].ensure_connection()
+    # Runs the ORM's query compilation as well as a round trip
+    Product.objects.values_list('pk', flat=True).first()
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def render_dummy_response():
+    host = _host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': DUMMY_REQUEST_PATH,
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    # The expected 401 is not worth a warning in every worker's log
+    request_logger.setLevel(logging.ERROR)
+    try:
+        response = WSGIHandler()(environ, lambda status, headers: None)
+        b''.join(response)
+        response.close()
+    finally:
+        request_logger.setLevel(level)
+        registry.clear()
+
+
+def warm_up(keep_connections=True):
+    """
+    Do the one-off work of a first request before a worker takes traffic.
+
+    Resolves the main routes, builds the serializers' fields and read plan,
+    opens the database connections and renders a response through the whole
+    middleware stack. Connections belong to the calling thread, so workers
+    that serve requests from other threads should not keep them. Returns the
+    milliseconds spent per step.
+    """
+    timings = {}
+    for name, step in [
+        ('urls', resolve_urls),
+        ('serializers', build_serializers),
+        ('database', open_connections),
+        ('response', render_dummy_response),
+    ]:
+        started = time.perf_counter()
+        step()
+        timings[name] = (time.perf_counter() - started) * 1000
+    if not keep_connections:
+        connections.close_all()
+    return timings